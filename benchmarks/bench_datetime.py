@@ -0,0 +1,69 @@
+"""
+Compare parse_list_datetime_keys with parsing every value with datetime.strptime, on a transaction export.
+
+Run with: python benchmarks/bench_datetime.py [number of transactions]
+"""
+
+import sys
+from datetime import datetime, timedelta
+from timeit import repeat
+from typing import Any
+
+from pybluecurrent.utilities import parse_list_datetime_keys
+
+FORMATS = {"started_at": ("%d-%m-%Y %H:%M:%S", False), "end_time": ("%d-%m-%Y %H:%M:%S", False)}
+
+
+def strptime_list_datetime_keys(source: list[dict[str, Any]], formats: dict[str, tuple[str, bool]]) -> None:
+    """The implementation of parse_list_datetime_keys before the fast path."""
+    for element in source:
+        for key, (datetime_format, is_date) in formats.items():
+            if key in element and element[key] is not None:
+                if element[key] == "":
+                    element[key] = None
+                else:
+                    result = datetime.strptime(element[key], datetime_format)
+                    element[key] = result.date() if is_date else result
+
+
+def transactions(n: int) -> list[dict[str, Any]]:
+    start = datetime(2023, 1, 1)
+    return [
+        {
+            "transaction_id": i,
+            "started_at": (start + timedelta(minutes=97 * i)).strftime("%d-%m-%Y %H:%M:%S"),
+            "end_time": (start + timedelta(minutes=97 * i + 61)).strftime("%d-%m-%Y %H:%M:%S"),
+        }
+        for i in range(n)
+    ]
+
+
+def main(n: int = 10_000) -> None:
+    rows = transactions(n)
+    expected = [dict(row) for row in rows]
+    strptime_list_datetime_keys(expected, FORMATS)
+    assert parse_list_datetime_keys([dict(row) for row in rows], FORMATS) == expected
+
+    timings = {}
+    for name, function in [
+        ("strptime", strptime_list_datetime_keys),
+        ("parse_list_datetime_keys", parse_list_datetime_keys),
+    ]:
+        timings[name] = (
+            min(
+                repeat(
+                    "function(batch.pop(), FORMATS)",
+                    setup="batch = [[dict(row) for row in rows] for _ in range(5)]",
+                    globals=dict(function=function, rows=rows, FORMATS=FORMATS),
+                    number=5,
+                    repeat=3,
+                )
+            )
+            / 5
+        )
+        print(f"{name:>26}: {timings[name] * 1000:8.2f} ms for {n} transactions")
+    print(f"{'speedup':>26}: {timings['strptime'] / timings['parse_list_datetime_keys']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""
+Measure how fast BlueCurrentClient._handler decodes and dispatches websocket messages, per serializer.
+
+Run with: python benchmarks/bench_handler.py [number of messages]
+"""
+
+import sys
+from asyncio import run
+from importlib.util import find_spec
+from logging import ERROR, getLogger
+from time import perf_counter
+from typing import AsyncIterator
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.serialization import get_serializer
+
+
+class ReplaySocket:
+    """A websocket that yields the same messages and then closes."""
+
+    def __init__(self, messages: list[str]):
+        self.messages = messages
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        for message in self.messages:
+            yield message
+
+
+def messages(n: int) -> list[str]:
+    serializer = get_serializer("json")
+    return [
+        serializer.dumps(
+            {
+                "object": "CH_STATUS",
+                "data": {
+                    "evse_id": f"BCU{i % 100:06}",
+                    "activity": "charging",
+                    "actual_p1": 16.1,
+                    "actual_p2": 15.9,
+                    "actual_p3": 16.0,
+                    "actual_kwh": i / 10,
+                    "start_datetime": "20230724 15:25:33",
+                    "vehicle_status": "C",
+                },
+            }
+        )
+        for i in range(n)
+    ]
+
+
+async def handle(name: str, frames: list[str]) -> float:
+    client = BlueCurrentClient("username", "password", reconnect=False, serializer=get_serializer(name))
+    client.socket = ReplaySocket(frames)  # type: ignore
+    with client.queue.queue():  # With a subscriber, as when streaming statuses.
+        start = perf_counter()
+        await client._handler()
+        return perf_counter() - start
+
+
+def main(n: int = 100_000) -> None:
+    getLogger("BlueCurrentClient").setLevel(ERROR + 1)  # Do not log that the connection is lost after the messages.
+    frames = messages(n)
+    for name in ("json", "orjson", "msgspec"):
+        if name != "json" and find_spec(name) is None:
+            print(f"{name:>8}: not installed")
+            continue
+        elapsed = min(run(handle(name, frames)) for _ in range(3))
+        print(f"{name:>8}: {elapsed / n * 1e6:6.2f} us per message, {n / elapsed:9.0f} messages per second")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
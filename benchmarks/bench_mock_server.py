@@ -0,0 +1,120 @@
+"""
+Benchmark BlueCurrentClient against a local MockBlueCurrent server, without an account.
+
+Measures the throughput of fleet sweeps, the time to page through transactions, the rate at which pushed
+status updates are dispatched, and the memory used per charge point.
+
+Run with: python benchmarks/bench_mock_server.py [--charge-points 500] [--latency 0.02]
+"""
+
+import tracemalloc
+from argparse import ArgumentParser
+from asyncio import create_task, run, sleep
+from logging import ERROR, getLogger
+from time import perf_counter
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.testing import MockBlueCurrent
+
+
+def report(name: str, elapsed: str, rate: float, unit: str) -> None:
+    print(f"{name:<36}{elapsed}, {rate:9.1f} {unit} per second")
+
+
+async def fleet_sweep(server: MockBlueCurrent, client: BlueCurrentClient, concurrency: int) -> None:
+    start = perf_counter()
+    snapshot = await client.get_fleet_snapshot(server.evse_ids, concurrency=concurrency)
+    elapsed = perf_counter() - start
+    errors = sum(bool(record["errors"]) for record in snapshot.values())
+    report(f"fleet sweep (concurrency {concurrency})", f"{elapsed:7.3f} s", len(snapshot) / elapsed, "charge points")
+    if errors:
+        print(f"{errors} charge points had errors")
+
+
+async def settings_refresh(server: MockBlueCurrent, client: BlueCurrentClient, batched: bool) -> None:
+    evse_ids = server.evse_ids[:50]
+    start = perf_counter()
+    if batched:
+        async with client.batch() as batch:
+            futures = [batch.get_charge_point_settings(evse_id) for evse_id in evse_ids]
+        [future.result() for future in futures]
+    else:
+        for evse_id in evse_ids:
+            await client.get_charge_point_settings(evse_id)
+    elapsed = perf_counter() - start
+    report(
+        f"settings refresh ({'batched' if batched else 'one by one'})",
+        f"{elapsed:7.3f} s",
+        len(evse_ids) / elapsed,
+        "charge points",
+    )
+
+
+async def pagination(server: MockBlueCurrent, client: BlueCurrentClient, prefetch: int) -> None:
+    start = perf_counter()
+    n = 0
+    async for _ in client.iterate_transactions(server.evse_ids[:10], prefetch=prefetch):
+        n += 1
+    elapsed = perf_counter() - start
+    report(f"pagination (prefetch {prefetch})", f"{elapsed:7.3f} s", n / elapsed, "transactions")
+
+
+async def dispatch(server: MockBlueCurrent, client: BlueCurrentClient, n: int) -> None:
+    evse_id = server.evse_ids[0]
+    stream = client.stream_status([evse_id])
+    await stream.__anext__()  # type: ignore
+    while not server.subscribers(evse_id):
+        await sleep(0.01)
+
+    async def push() -> None:
+        for i in range(1, n + 1):
+            await server.push_status(evse_id, actual_kwh=i)
+
+    start = perf_counter()
+    pushing = create_task(push())
+    for _ in range(n):
+        await stream.__anext__()  # type: ignore
+    elapsed = perf_counter() - start
+    await pushing
+    await stream.aclose()  # type: ignore
+    report("dispatch", f"{elapsed:7.3f} s", n / elapsed, "messages")
+
+
+async def memory(server: MockBlueCurrent, client: BlueCurrentClient, models: bool) -> None:
+    client.models = models
+    tracemalloc.start()
+    charge_points = await client.get_charge_points()
+    snapshot = await client.get_fleet_snapshot(server.evse_ids)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    client.models = False
+    del snapshot
+    print(
+        f"{'memory per charge point (models)' if models else 'memory per charge point':<36}"
+        f"{size / len(charge_points) / 1024:7.1f} KiB"
+    )
+
+
+async def main(charge_points: int, transactions: int, latency: float, messages: int) -> None:
+    getLogger("BlueCurrentClient").setLevel(ERROR)
+    async with MockBlueCurrent(n_charge_points=charge_points, n_transactions=transactions, latency=latency) as server:
+        async with server.client() as client:
+            for concurrency in (1, 10, 100):
+                await fleet_sweep(server, client, concurrency)
+            for batched in (False, True):
+                await settings_refresh(server, client, batched)
+            for prefetch in (0, 4):
+                await pagination(server, client, prefetch)
+            await dispatch(server, client, messages)
+            for models in (False, True):
+                await memory(server, client, models)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--charge-points", type=int, default=200, help="Number of charge points.")
+    parser.add_argument("--transactions", type=int, default=250, help="Number of transactions per charge point.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Latency of the server in seconds.")
+    parser.add_argument("--messages", type=int, default=10_000, help="Number of status updates to dispatch.")
+    arguments = parser.parse_args()
+    run(main(arguments.charge_points, arguments.transactions, arguments.latency, arguments.messages))
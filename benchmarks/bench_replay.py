@@ -0,0 +1,55 @@
+"""
+Measure the cost of recording websocket frames in BlueCurrentClient._handler, and how fast a recording replays.
+
+Run with: python benchmarks/bench_replay.py [number of messages]
+"""
+
+import sys
+from asyncio import run
+from logging import ERROR, getLogger
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from bench_handler import ReplaySocket, messages
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.recording import FrameRecorder, replay
+
+
+async def handle(frames: list[str], recorder: FrameRecorder | None) -> float:
+    client = BlueCurrentClient("username", "password", reconnect=False, recorder=recorder)
+    client.socket = ReplaySocket(frames)  # type: ignore
+    with client.queue.queue():
+        start = perf_counter()
+        await client._handler()
+        return perf_counter() - start
+
+
+async def replay_recording(path: Path) -> tuple[int, float]:
+    client = BlueCurrentClient("username", "password")
+    with client.queue.queue():
+        start = perf_counter()
+        n = await replay(client, path, speed=None)
+        return n, perf_counter() - start
+
+
+def report(name: str, n: int, elapsed: float) -> None:
+    print(f"{name:<28}{elapsed / n * 1e6:6.2f} us per message, {n / elapsed:9.0f} messages per second")
+
+
+def main(n: int = 100_000) -> None:
+    getLogger("BlueCurrentClient").setLevel(ERROR + 1)  # Do not log that the connection is lost after the messages.
+    frames = messages(n)
+    report("handler", n, run(handle(frames, None)))
+    with TemporaryDirectory() as directory:
+        path = Path(directory) / "frames.gz"
+        recorder = FrameRecorder(path)
+        with recorder:
+            report("handler with recorder", n, run(handle(frames, recorder)))
+        print(f"{'recorded':<28}{recorder.frames} frames ({recorder.dropped} dropped), {path.stat().st_size} bytes")
+        report("replay (maximum speed)", *run(replay_recording(path)))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
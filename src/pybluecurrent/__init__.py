@@ -1,3 +1,19 @@
-from .client import BlueCurrentClient
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .client import BlueCurrentClient
 
 __all__ = ["BlueCurrentClient"]
+
+
+def __getattr__(name: str) -> Any:
+    # The client is imported when it is first used, because httpx and websockets are slow to import.
+    if name == "BlueCurrentClient":
+        from .client import BlueCurrentClient
+
+        return BlueCurrentClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
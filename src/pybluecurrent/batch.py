@@ -0,0 +1,118 @@
+from asyncio import Future, gather, get_running_loop, wait_for
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from pybluecurrent.client import BlueCurrentClient
+
+
+@dataclass
+class _BatchedRequest:
+    data: dict[str, Any]
+    obj: str
+    keys: tuple[str, ...]
+    transform: Callable[[dict[str, Any]], Any]
+    result: Future
+
+
+class Batch:
+    """
+    Queue websocket commands, and send them back-to-back when the batch exits.
+
+    The replies to all commands are awaited together, so a batch of many commands takes about as long as one.
+    Every queued command returns a future, which has its result (or exception) once the batch has exited.
+
+    For example:
+        async with client.batch() as batch:
+            settings = {evse_id: batch.get_charge_point_settings(evse_id) for evse_id in evse_ids}
+        for evse_id, future in settings.items():
+            print(evse_id, future.result())
+
+    The commands are sent with bulk priority (see BlueCurrentClient.priority).
+    If the body of the batch raises an exception, nothing is sent and the futures are cancelled.
+    """
+
+    def __init__(self, client: "BlueCurrentClient", timeout: float = 10):
+        self.client, self.timeout = client, timeout
+        self._requests: list[_BatchedRequest] = []
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    async def __aenter__(self) -> "Batch":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        requests, self._requests = self._requests, []
+        if exc_type is not None:
+            for request in requests:
+                request.result.cancel()
+            return
+        await self._run(requests)
+
+    def request(
+        self,
+        command: str,
+        obj: str,
+        *keys: str,
+        transform: Callable[[dict[str, Any]], Any] | None = None,
+        **fields: Any,
+    ) -> Future:
+        """
+        Queue a command.
+
+        Args:
+            command: The command, e.g. "GET_CH_SETTINGS".
+            obj: The object of the reply, e.g. "CH_SETTINGS".
+            *keys: Keys to match the reply on, e.g. the evse_id.
+            transform: A function that takes the reply and returns the result. Defaults to None,
+                which means the result is the reply itself.
+            **fields: Other fields of the command, e.g. evse_id="BCU123456".
+
+        Returns:
+            A future of the result.
+        """
+        result = get_running_loop().create_future()
+        self._requests.append(
+            _BatchedRequest(dict(command=command, **fields), obj, keys, transform or (lambda reply: reply), result)
+        )
+        return result
+
+    def get_charge_point_settings(self, evse_id: str) -> Future:
+        """Queue BlueCurrentClient.get_charge_point_settings."""
+        return self.request("GET_CH_SETTINGS", "CH_SETTINGS", evse_id, transform=_data, evse_id=evse_id)
+
+    def get_grid_status(self, evse_id: str) -> Future:
+        """Queue BlueCurrentClient.get_grid_status."""
+        return self.request("GET_GRID_STATUS", "GRID_STATUS", evse_id, transform=_data, evse_id=evse_id)
+
+    async def _run(self, requests: list[_BatchedRequest]) -> None:
+        waiters = [self.client._expect(request.obj, *request.keys) for request in requests]
+        try:
+            with self.client.priority("bulk"):
+                for i, request in enumerate(requests):
+                    try:
+                        await self.client._send(request.data, token=True)
+                    except Exception as e:
+                        for unsent in requests[i:]:
+                            unsent.result.set_exception(e)
+                        requests = requests[:i]
+                        break
+            await gather(*(self._wait(request, waiter) for request, waiter in zip(requests, waiters)))
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            for request in requests:
+                request.result.cancel()  # Only if the batch itself was cancelled.
+
+    async def _wait(self, request: _BatchedRequest, waiter: Future) -> None:
+        try:
+            with self.client.metrics.measure(request.data["command"]):
+                reply = await wait_for(waiter, timeout=self.client._timeout(request.data["command"], self.timeout))
+            request.result.set_result(request.transform(reply))
+        except Exception as e:
+            request.result.set_exception(e)
+
+
+def _data(reply: dict[str, Any]) -> Any:
+    return reply["data"]
@@ -0,0 +1,141 @@
+from asyncio import Task, create_task, shield
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic
+from typing import Any, Awaitable, Callable, Coroutine, Hashable, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_TTL: dict[str, float] = {
+    "get_account": 3600,
+    "get_charge_cards": 600,
+    "get_charge_points": 60,
+    "get_contracts": 3600,
+    "get_grids": 3600,
+}
+
+
+class TTLCache:
+    """
+    In-memory cache for the results of slowly changing reads of a BlueCurrentClient.
+
+    Results are cached for a time-to-live that is configured per method; methods without a TTL are not cached.
+    The cache holds at most max_size results, evicting the least recently used ones first.
+    Concurrent misses for the same key are coalesced into a single request.
+
+    Results are cached per account, so a cache can be shared by the clients of several accounts.
+    Cached results are shared between callers, so they should not be modified.
+    """
+
+    def __init__(self, ttl: dict[str, float] | None = None, max_size: int = 256):
+        """
+        Args:
+            ttl: Time-to-live in seconds per method name, which is merged into DEFAULT_TTL.
+                Use a TTL of 0 to disable caching for a method. Defaults to None.
+            max_size: Maximum number of cached results. Defaults to 256.
+        """
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.max_size = max_size
+        self.hits, self.misses = 0, 0
+        self._entries: OrderedDict[tuple[Hashable, ...], tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self._pending: dict[tuple[Hashable, ...], Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+        self, method: str, args: tuple[Hashable, ...], load: Callable[[], Awaitable[T]], account: str | None = None
+    ) -> T:
+        """
+        Get the cached result of a method call, or load it.
+
+        Args:
+            method: The name of the method.
+            args: The arguments of the method call.
+            load: A function that loads the result if it is not cached.
+            account: The username of the account the method is called for. Defaults to None.
+
+        Returns:
+            The result.
+        """
+        ttl = self.ttl.get(method, 0)
+        if ttl <= 0:
+            return await load()
+        key = (method, account, *args)
+        if key in self._entries:
+            expires, result = self._entries[key]
+            if expires > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+        self.misses += 1
+        if key not in self._pending:
+            self._pending[key] = create_task(self._load(key, ttl, load, self._generation))
+        return await shield(self._pending[key])
+
+    def invalidate(self, *methods: str, account: str | None = None) -> None:
+        """
+        Remove the cached results of the methods, or of all methods if none are given.
+
+        Args:
+            methods: The names of the methods.
+            account: Only remove the results of this account. Defaults to None, which means all accounts.
+        """
+        self._generation += 1
+        for key in list(self._entries):
+            if (not methods or key[0] in methods) and (account is None or key[1] == account):
+                del self._entries[key]
+
+    async def _load(
+        self, key: tuple[Hashable, ...], ttl: float, load: Callable[[], Awaitable[T]], generation: int
+    ) -> T:
+        try:
+            result = await load()
+        finally:
+            del self._pending[key]
+        # Do not cache results that were loaded while the cache was invalidated, they may be stale.
+        if generation == self._generation:
+            self._entries[key] = (monotonic() + ttl, result)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return result
+
+
+def cached(method: Callable[..., Awaitable[T]]) -> Callable[..., Coroutine[Any, Any, T]]:
+    """
+    Decorate a method of BlueCurrentClient to cache its results in the cache of the client, if it has one.
+    The results are cached per username and per models flag, so clients of different accounts, or that return
+    dictionaries and models, can share a cache.
+    """
+
+    @wraps(method)
+    async def wrapper(self, *args: Hashable) -> T:
+        if self.cache is None:
+            return await method(self, *args)
+        return await self.cache.get(
+            method.__name__, (self.models, *args), lambda: method(self, *args), account=self.credentials[0]
+        )
+
+    return wrapper
+
+
+def invalidates(*methods: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Coroutine[Any, Any, T]]]:
+    """
+    Decorate a method of BlueCurrentClient to invalidate the cached results of methods after it is called,
+    for the account of the client.
+    """
+
+    def decorator(method: Callable[..., Awaitable[T]]) -> Callable[..., Coroutine[Any, Any, T]]:
+        @wraps(method)
+        async def wrapper(self, *args: Any, **kwargs: Any) -> T:
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                if self.cache is not None:
+                    self.cache.invalidate(*methods, account=self.credentials[0])
+
+        return wrapper
+
+    return decorator
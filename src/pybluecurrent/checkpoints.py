@@ -0,0 +1,106 @@
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """
+    The end time of the newest transaction that has been synced, and the IDs of the synced transactions
+    that ended at that time.
+
+    Transactions are listed by the time they stopped, so a session that started before an earlier checkpoint
+    but stopped after it is still synced. The IDs prevent transactions that ended in the same second as the
+    checkpoint from being synced twice.
+    """
+
+    end_time: datetime
+    transaction_ids: frozenset[int] = frozenset()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"end_time": self.end_time.isoformat(), "transaction_ids": sorted(self.transaction_ids)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Checkpoint":
+        return cls(datetime.fromisoformat(data["end_time"]), frozenset(data["transaction_ids"]))
+
+
+class CheckpointStore(ABC):
+    """
+    Store for the newest Checkpoint that has been synced, per charge point.
+
+    The key is the charge point ID, or the sorted charge point IDs joined by commas.
+    """
+
+    @abstractmethod
+    def load(self, key: str) -> Checkpoint | None:
+        """Get the checkpoint for the key, or None if there is none."""
+
+    @abstractmethod
+    def save(self, key: str, checkpoint: Checkpoint) -> None:
+        """Store the checkpoint for the key."""
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keep checkpoints in memory, e.g. for the lifetime of a long-running process."""
+
+    def __init__(self):
+        self.checkpoints: dict[str, Checkpoint] = {}
+
+    def load(self, key: str) -> Checkpoint | None:
+        return self.checkpoints.get(key)
+
+    def save(self, key: str, checkpoint: Checkpoint) -> None:
+        self.checkpoints[key] = checkpoint
+
+
+class JSONCheckpointStore(CheckpointStore):
+    """Keep checkpoints in a JSON file. The file is replaced atomically on every save."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def load(self, key: str) -> Checkpoint | None:
+        checkpoint = self._read().get(key)
+        return None if checkpoint is None else Checkpoint.from_dict(checkpoint)
+
+    def save(self, key: str, checkpoint: Checkpoint) -> None:
+        checkpoints = self._read()
+        checkpoints[key] = checkpoint.to_dict()
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        temporary.write_text(dumps(checkpoints, indent=2, sort_keys=True))
+        replace(temporary, self.path)
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            return loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Keep checkpoints in a table of a SQLite database."""
+
+    def __init__(self, path: str | Path, table: str = "checkpoints"):
+        self.path, self.table = str(path), table
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, checkpoint TEXT)")
+
+    def load(self, key: str) -> Checkpoint | None:
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            row = connection.execute(f"SELECT checkpoint FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return None if row is None else Checkpoint.from_dict(loads(row[0]))
+
+    def save(self, key: str, checkpoint: Checkpoint) -> None:
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(
+                f"INSERT INTO {self.table} (key, checkpoint) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET checkpoint = excluded.checkpoint",
+                (key, dumps(checkpoint.to_dict())),
+            )
@@ -0,0 +1,206 @@
+"""
+Command line interface of pybluecurrent, which writes its results to stdout as JSON lines.
+
+For example:
+    export BLUECURRENT_USERNAME=... BLUECURRENT_PASSWORD=...
+    pybluecurrent status BCU123456
+    pybluecurrent transactions export --output transactions.parquet
+    pybluecurrent set-status disabled BCU123456 BCU234567
+    pybluecurrent fleet snapshot
+
+Only the standard library is imported up front, so that starting the command stays fast. The client, and with it
+httpx and websockets, is imported when a command runs. The token of your account is cached in a file, so that
+the expensive login is skipped on the next run.
+"""
+
+import json
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from datetime import date
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, AsyncIterator, Sequence
+
+if TYPE_CHECKING:
+    from pybluecurrent.client import BlueCurrentClient
+
+
+def default_token_file() -> Path:
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "pybluecurrent" / "tokens.json"
+
+
+def parse_arguments(argv: Sequence[str] | None = None) -> Namespace:
+    parser = ArgumentParser(prog="pybluecurrent", description="Query and control BlueCurrent charge points.")
+    parser.add_argument(
+        "--username", default=os.environ.get("BLUECURRENT_USERNAME"), help="Defaults to $BLUECURRENT_USERNAME."
+    )
+    parser.add_argument(
+        "--password",
+        default=os.environ.get("BLUECURRENT_PASSWORD"),
+        help="Defaults to $BLUECURRENT_PASSWORD. Only needed if there is no cached token.",
+    )
+    parser.add_argument(
+        "--token-file", type=Path, default=default_token_file(), help="Where to cache the token of your account."
+    )
+    parser.add_argument("--no-token-file", action="store_const", const=None, dest="token_file", help="Do not cache.")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Log to stderr.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status = commands.add_parser("status", help="Get the status of charge points.")
+    status.add_argument("evse_ids", nargs="*", metavar="EVSE_ID", help="Defaults to all of your charge points.")
+    status.add_argument("--follow", "-f", action="store_true", help="Keep streaming the fields that change.")
+    status.set_defaults(run=_status, flush=True)
+
+    transactions = commands.add_parser("transactions", help="Work with transactions.")
+    transaction_commands = transactions.add_subparsers(dest="transactions_command", required=True)
+    export = transaction_commands.add_parser("export", help="Export transactions to stdout or a CSV or Parquet file.")
+    export.add_argument("evse_ids", nargs="*", metavar="EVSE_ID", help="Defaults to all of your charge points.")
+    export.add_argument("--output", "-o", type=Path, help="A .csv or .parquet file. Defaults to stdout.")
+    export.add_argument("--format", choices=("csv", "parquet"), help="Defaults to the suffix of the output.")
+    export.add_argument("--oldest-first", action="store_true", help="Start with the oldest transaction.")
+    export.add_argument(
+        "--since",
+        type=int,
+        help="Only print transactions after this transaction ID. Requires a single EVSE_ID, and no --output.",
+    )
+    export.set_defaults(run=_export_transactions, flush=False)
+
+    set_status = commands.add_parser("set-status", help="Enable or disable charge points.")
+    set_status.add_argument("status", choices=("enabled", "disabled"))
+    set_status.add_argument("evse_ids", nargs="+", metavar="EVSE_ID")
+    set_status.add_argument("--rate", type=float, default=10, help="Maximum commands per second. Defaults to 10.")
+    set_status.set_defaults(run=_set_status, flush=True)
+
+    fleet = commands.add_parser("fleet", help="Work with many charge points at once.")
+    fleet_commands = fleet.add_subparsers(dest="fleet_command", required=True)
+    snapshot = fleet_commands.add_parser("snapshot", help="Get the status, settings and grid status.")
+    snapshot.add_argument("evse_ids", nargs="*", metavar="EVSE_ID", help="Defaults to all of your charge points.")
+    snapshot.add_argument("--concurrency", type=int, default=10, help="Maximum requests in flight. Defaults to 10.")
+    snapshot.set_defaults(run=_fleet_snapshot, flush=True)
+
+    arguments = parser.parse_args(argv)
+    if not arguments.username:
+        parser.error("A username is required: pass --username or set $BLUECURRENT_USERNAME.")
+    if getattr(arguments, "since", None) is not None:
+        if len(arguments.evse_ids) != 1:
+            parser.error("--since requires a single EVSE_ID.")
+        if arguments.output is not None:
+            parser.error("--since cannot be combined with --output.")
+        if arguments.oldest_first:
+            parser.error("--since cannot be combined with --oldest-first.")
+    return arguments
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    arguments = parse_arguments(argv)
+    if arguments.verbose:
+        from logging import DEBUG, basicConfig
+
+        basicConfig(level=DEBUG, stream=sys.stderr)
+    from asyncio import run
+
+    try:
+        return run(_main(arguments))
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # The reader of stdout went away, e.g. head. Avoid another error when Python flushes stdout at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+
+
+async def run_command(client: "BlueCurrentClient", arguments: Namespace, output: IO[str] | None = None) -> int:
+    """
+    Run a command with a connected client, and write its records as JSON lines.
+
+    Args:
+        client: A connected BlueCurrentClient.
+        arguments: The arguments, as parsed by parse_arguments.
+        output: Where to write the records. Defaults to None, which means stdout.
+
+    Returns:
+        The exit code: 1 if any record has an error, otherwise 0.
+    """
+    output = sys.stdout if output is None else output
+    failed = False
+    async for record in arguments.run(client, arguments):
+        output.write(json.dumps(record, default=_default) + "\n")
+        if arguments.flush:
+            output.flush()
+        failed = failed or bool(record.get("error") or record.get("errors"))
+    output.flush()
+    return 1 if failed else 0
+
+
+async def _main(arguments: Namespace) -> int:
+    from pybluecurrent.client import BlueCurrentClient
+    from pybluecurrent.tokens import FileTokenStore
+
+    token_store = None
+    if arguments.token_file is not None:
+        arguments.token_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        token_store = FileTokenStore(arguments.token_file)
+    async with BlueCurrentClient(arguments.username, arguments.password or "", token_store=token_store) as client:
+        return await run_command(client, arguments)
+
+
+async def _evse_ids(client: "BlueCurrentClient", arguments: Namespace) -> list[str]:
+    return arguments.evse_ids or [
+        str(charge_point["evse_id"]) if isinstance(charge_point, dict) else charge_point.evse_id
+        for charge_point in await client.get_charge_points()
+    ]
+
+
+async def _status(client: "BlueCurrentClient", arguments: Namespace) -> AsyncIterator[dict[str, Any]]:
+    if arguments.follow:
+        async for update in client.stream_status(arguments.evse_ids or None):
+            yield update
+        return
+    from asyncio import gather
+
+    evse_ids = await _evse_ids(client, arguments)
+    for evse_id, status in zip(evse_ids, await gather(*map(client.get_charge_point_status, evse_ids))):
+        yield dict(status, evse_id=evse_id)  # type: ignore
+
+
+async def _export_transactions(client: "BlueCurrentClient", arguments: Namespace) -> AsyncIterator[dict[str, Any]]:
+    evse_ids = await _evse_ids(client, arguments)
+    if arguments.output is not None:
+        from pybluecurrent.export import export_transactions
+
+        n = await export_transactions(
+            client, evse_ids, arguments.output, file_format=arguments.format, newest_first=not arguments.oldest_first
+        )
+        yield dict(path=str(arguments.output), transactions=n)
+        return
+    async for transaction in client.iterate_transactions(
+        evse_ids[0] if arguments.since is not None else evse_ids,
+        newest_first=not arguments.oldest_first,
+        since=arguments.since,
+    ):
+        yield transaction  # type: ignore
+
+
+async def _set_status(client: "BlueCurrentClient", arguments: Namespace) -> AsyncIterator[dict[str, Any]]:
+    command = "SET_OPERATIVE" if arguments.status == "enabled" else "SET_INOPERATIVE"
+    reports = await client.send_fleet_command(command, arguments.evse_ids, rate=arguments.rate)
+    for report in reports.values():
+        yield report
+
+
+async def _fleet_snapshot(client: "BlueCurrentClient", arguments: Namespace) -> AsyncIterator[dict[str, Any]]:
+    snapshot = await client.get_fleet_snapshot(arguments.evse_ids or None, concurrency=arguments.concurrency)
+    for record in snapshot.values():
+        yield record
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, BaseException):
+        return f"{value.__class__.__name__}: {value}"
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
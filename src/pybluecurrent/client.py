@@ -1,53 +1,175 @@
-from asyncio import Task, create_task, wait_for
+from asyncio import (
+    Event,
+    Future,
+    Semaphore,
+    Task,
+    TimeoutError,
+    create_task,
+    gather,
+    get_running_loop,
+    shield,
+    sleep,
+    wait_for,
+)
+from collections import deque
+from contextlib import aclosing, contextmanager
+from contextvars import ContextVar
 from datetime import date, datetime
-from json import dumps, loads
+from itertools import count
+from json import dumps
 from logging import getLogger
-from typing import Any, AsyncIterable
+from random import uniform
+from time import monotonic
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Iterator,
+)
 from uuid import uuid4
 
-from asyncio_multisubscriber_queue import MultisubscriberQueue
 from httpx import AsyncClient
-from sjcl import SJCL
 from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
 
 from pybluecurrent._version import __version__
-from pybluecurrent.exceptions import AuthenticationFailed, BlueCurrentException
+from pybluecurrent.batch import Batch
+from pybluecurrent.cache import TTLCache, cached, invalidates
+from pybluecurrent.checkpoints import Checkpoint, CheckpointStore
+from pybluecurrent.exceptions import (
+    AuthenticationFailed,
+    BlueCurrentException,
+    ConnectionLost,
+)
+from pybluecurrent.fanout import FanOut, Policy
+from pybluecurrent.metrics import Metrics
+from pybluecurrent.models import ChargeCard, ChargePoint, ChargePointStatus, Transaction
+from pybluecurrent.ratelimit import RateLimiter
+from pybluecurrent.recording import FrameRecorder
+from pybluecurrent.scheduler import PRIORITIES, Priority, SendScheduler
+from pybluecurrent.serialization import Serializer, get_serializer
+from pybluecurrent.timeouts import AdaptiveTimeouts
+from pybluecurrent.tokens import TokenStore
 from pybluecurrent.utilities import parse_datetime_keys, parse_list_datetime_keys
 
+STATUS_DATETIME_FORMATS = {
+    "start_datetime": ("%Y%m%d %H:%M:%S", False),
+    "stop_datetime": ("%Y%m%d %H:%M:%S", False),
+}
+FLEET_COMMANDS = ("SET_OPERATIVE", "SET_INOPERATIVE", "SOFT_RESET", "UNLOCK_CONNECTOR")
+_priority: ContextVar[Priority | None] = ContextVar("priority", default=None)
+TRANSACTION_DATETIME_FORMATS = {
+    "started_at": ("%d-%m-%Y %H:%M:%S", False),
+    "end_time": ("%d-%m-%Y %H:%M:%S", False),
+}
+
 
 class BlueCurrentClient:
     api_url: str = "https://bo.bluecurrent.nl/app/bc_api/api/v2.0"
     psk: str = "d9ab2352a935be4ade182ce4921044f8"
     socket_url: str = "wss://motown.bluecurrent.nl/appserver/2.0"
+    reconnect_delay: float = 0.5
+    max_reconnect_delay: float = 60
 
-    def __init__(self, username: str, password: str):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        reconnect: bool = True,
+        token_store: TokenStore | None = None,
+        httpx_client: AsyncClient | None = None,
+        cache: TTLCache | None = None,
+        models: bool = False,
+        serializer: Serializer | None = None,
+        metrics: Metrics | None = None,
+        timeouts: AdaptiveTimeouts | None = None,
+        send_rate: float | None = None,
+        recorder: FrameRecorder | None = None,
+    ):
+        """
+        Args:
+            username: Your BlueCurrent username.
+            password: Your BlueCurrent password.
+            reconnect: If True, reconnect the websocket in the background when the connection is lost.
+                Defaults to True.
+            token_store: A store to load the token from before logging in, and to save it to after logging in.
+                Defaults to None, which means the client logs in every time it connects.
+            httpx_client: An HTTP client to use, e.g. to share its connection pool between clients.
+                The client is not closed when this client disconnects. Defaults to None, which means
+                a new HTTP client is created when connecting.
+            cache: A cache for the results of slowly changing reads, like get_account and get_charge_points.
+                Defaults to None, which means nothing is cached.
+            models: If True, charge cards, charge points, statuses and transactions are returned as typed models
+                (see pybluecurrent.models) instead of dictionaries. Defaults to False.
+            serializer: The JSON serializer for messages. Defaults to None, which means the fastest one that
+                is installed: orjson, msgspec or json (see pybluecurrent.serialization.get_serializer).
+            metrics: Where to record the latency of requests and the traffic, e.g. to share it between clients.
+                Defaults to None, which means a new Metrics object.
+            timeouts: Derive the timeouts of websocket commands from their recent latencies, and optionally
+                send slow reads again (see pybluecurrent.timeouts.AdaptiveTimeouts). Defaults to None,
+                which means fixed timeouts.
+            send_rate: Maximum number of websocket messages to send per second. Messages that have to wait
+                are sent in order of priority (see priority). Defaults to None, which means no limit.
+            recorder: Record the received websocket frames, e.g. to replay them later
+                (see pybluecurrent.recording). Defaults to None, which means nothing is recorded.
+        """
+        self.cache = cache
         self.consumer: Task | None = None
         self.credentials: tuple[str, str] = (username, password)
         self.logger = getLogger("BlueCurrentClient")
-        self.httpx_client: AsyncClient | None = None
-        self.queue = MultisubscriberQueue()
+        self.metrics = Metrics() if metrics is None else metrics
+        self.models = models
+        self.httpx_client: AsyncClient | None = httpx_client
+        self.queue: FanOut[dict[str, Any]] = FanOut()
+        self.reconnect = reconnect
+        self.recorder = recorder
+        self.scheduler = SendScheduler(self._write, rate=send_rate)
+        self.serializer = get_serializer() if serializer is None else serializer
         self.socket: ClientConnection | None = None
+        self.timeouts = timeouts
         self.token: str | None = None
+        self.token_store = token_store
+        self._connected = Event()
+        self._owns_httpx_client = httpx_client is None
+        self._resumer: Task | None = None
+        self._subscriptions: dict[str, int] = {}
+        if timeouts is not None and all(callback is not timeouts for callback in self.metrics.callbacks):
+            self.metrics.callbacks.append(timeouts)
+        self._waiters: dict[str, dict[str | None, deque[Future[dict[str, Any]]]]] = {}
 
     async def __aenter__(self) -> "BlueCurrentClient":
-        self.logger.debug("Creating BlueCurrent websocket connection")
-        self.connection = connect(self.socket_url, user_agent_header=self._user_agent)
-        self.socket = await self.connection.__aenter__()
+        await self._connect()
         self.consumer = create_task(self._handler())
-        self.httpx_client = AsyncClient()
-        await self.httpx_client.__aenter__()
-        if self.token is None:
-            await self._login()
-        await self._hello()
+        if self._owns_httpx_client:
+            self.httpx_client = AsyncClient()
+            await self.httpx_client.__aenter__()
+        if self.token is None and self.token_store is not None:
+            self.token = self.token_store.load(self.credentials[0])
+        try:
+            await self._authenticate()
+        except BaseException as e:
+            await self.__aexit__(type(e), e, e.__traceback__)
+            raise
+        self._connected.set()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         self.logger.debug("Closing BlueCurrent connection")
-        self.consumer.cancel()
-        await self.connection.__aexit__(exc_type, exc_val, exc_tb)
-        await self.httpx_client.__aexit__(exc_type, exc_val, exc_tb)
-        self.consumer, self.socket, self.httpx_client = None, None, None
+        self._connected.clear()
+        for task in (self.consumer, self._resumer):
+            if task is not None:
+                task.cancel()
+        self.scheduler.close()
+        await self.socket.close()
+        if self._owns_httpx_client:
+            await self.httpx_client.__aexit__(exc_type, exc_val, exc_tb)
+            self.httpx_client = None
+        self.consumer, self.socket, self._resumer = None, None, None
 
+    @cached
     async def get_account(self) -> dict[str, bool | date | str]:
         """
         Get account information.
@@ -66,12 +188,12 @@ class BlueCurrentClient:
                 "hubspot_user_identity": "a_very_long_string"
             }
         """
-        await self._send(dict(command="GET_ACCOUNT"), token=True)
-        result = await self._receive("ACCOUNT")
+        result = await self._request(dict(command="GET_ACCOUNT"), "ACCOUNT")
         del result["object"]
         return parse_datetime_keys(result, formats={"first_login_app": ("%d-%b-%y", True)})
 
-    async def get_charge_cards(self) -> list[dict[str, date | int | str | None]]:
+    @cached
+    async def get_charge_cards(self) -> list[dict[str, date | int | str | None]] | list[ChargeCard]:
         """
         Get your charge cards:
 
@@ -88,9 +210,8 @@ class BlueCurrentClient:
                 "date_became_invalid": None
             }
         """
-        await self._send(dict(command="GET_CHARGE_CARDS"), token=True)
-        result = (await self._receive("CHARGE_CARDS"))["cards"]
-        return parse_list_datetime_keys(
+        result = (await self._request(dict(command="GET_CHARGE_CARDS"), "CHARGE_CARDS"))["cards"]
+        result = parse_list_datetime_keys(
             result,
             formats={
                 "date_created": ("%Y-%m-%d", True),
@@ -98,8 +219,10 @@ class BlueCurrentClient:
                 "date_became_invalid": ("%Y-%m-%d", True),
             },
         )
+        return [ChargeCard.from_dict(card) for card in result] if self.models else result
 
-    async def get_charge_points(self) -> list[dict[str, bool | dict | str]]:
+    @cached
+    async def get_charge_points(self) -> list[dict[str, bool | dict | str]] | list[ChargePoint]:
         """
         Get a list of your charge points.
 
@@ -132,8 +255,8 @@ class BlueCurrentClient:
                 "delayed_charging": {"value": False, "permission": "none"}
             }
         """
-        await self._send(dict(command="GET_CHARGE_POINTS"), token=True)
-        return (await self._receive("CHARGE_POINTS"))["data"]
+        result = (await self._request(dict(command="GET_CHARGE_POINTS"), "CHARGE_POINTS"))["data"]
+        return [ChargePoint.from_dict(charge_point) for charge_point in result] if self.models else result
 
     async def get_charge_point_settings(self, evse_id: str) -> dict[str, bool | dict[str, Any] | str]:
         """
@@ -166,8 +289,7 @@ class BlueCurrentClient:
                 "led_interaction": {"value": False, "permission": "none"}
             }
         """
-        await self._send(dict(command="GET_CH_SETTINGS", evse_id=evse_id), token=True)
-        return (await self._receive("CH_SETTINGS"))["data"]
+        return (await self._request(dict(command="GET_CH_SETTINGS", evse_id=evse_id), "CH_SETTINGS", evse_id))["data"]
 
     async def get_grid_status(self, evse_id: str) -> dict[str, int | str]:
         """
@@ -187,13 +309,11 @@ class BlueCurrentClient:
                 "grid_max_reserved": 25
             }
         """
-        await self._send(dict(command="GET_GRID_STATUS", evse_id=evse_id), token=True)
-        return (await self._receive("GRID_STATUS"))["data"]
+        return (await self._request(dict(command="GET_GRID_STATUS", evse_id=evse_id), "GRID_STATUS", evse_id))["data"]
 
     async def get_sessions(self, evse_id: str):
         """Does not work"""
-        await self._send(dict(command="GET_SESSIONS"), token=True)
-        return await self._receive("SESSIONS")
+        return await self._request(dict(command="GET_SESSIONS"), "SESSIONS")
 
     async def get_sustainability_status(self) -> dict[str, float | int]:
         """
@@ -203,11 +323,11 @@ class BlueCurrentClient:
             A dictionary with two keys:
             {"trees": 1, "co2": 12.345}
         """
-        await self._send(dict(command="GET_SUSTAINABILITY_STATUS"), token=True)
-        result = await self._receive("SUSTAINABILITY_STATUS")
+        result = await self._request(dict(command="GET_SUSTAINABILITY_STATUS"), "SUSTAINABILITY_STATUS")
         result.pop("object")
         return result
 
+    @invalidates("get_charge_points")
     async def set_plug_and_charge_charge_card(self, evse_id: str, uid: str | None = None) -> None:
         """
         Set a plug-and-charge charge card for the charge point.
@@ -222,14 +342,15 @@ class BlueCurrentClient:
                 as setting it to None.
         """
         token_uid = "BCU-APP" if uid is None or uid == "BCU_HOME_USE" else uid
-        await self._send(
+        result = await self._request(
             dict(command="SET_PLUG_AND_CHARGE_CHARGE_CARD", evse_id=evse_id, token_uid=token_uid),
-            token=True,
+            "STATUS_SET_PLUG_AND_CHARGE_CHARGE_CARD",
+            evse_id,
         )
-        result = await self._receive("STATUS_SET_PLUG_AND_CHARGE_CHARGE_CARD")
         if not result.get("success"):
             raise BlueCurrentException(result)
 
+    @invalidates("get_charge_points")
     async def set_status(self, evse_id: str, enabled: bool) -> None:
         """
         Enable or disable a charge point.
@@ -238,34 +359,20 @@ class BlueCurrentClient:
             evse_id: The ID of the charge point.
             enabled: Boolean that indicates the desired status.
         """
-        if enabled:
-            await self._send(dict(command="SET_OPERATIVE", evse_id=evse_id, flow_id=str(uuid4())), token=True)
-            await self._receive("RECEIVED_SET_OPERATIVE")
-            await self._receive("STATUS_SET_OPERATIVE", timeout=30)
-        else:
-            await self._send(dict(command="SET_INOPERATIVE", evse_id=evse_id, flow_id=str(uuid4())), token=True)
-            await self._receive("RECEIVED_SET_INOPERATIVE")
-            await self._receive("STATUS_SET_INOPERATIVE", timeout=30)
+        await self._flow("SET_OPERATIVE" if enabled else "SET_INOPERATIVE", evse_id=evse_id)
 
+    @invalidates("get_charge_points")
     async def unlock_connector(self, evse_id: str):
         # TODO: test
-        await self._send(
-            dict(
-                command="UNLOCK_CONNECTOR",
-                evse_id=evse_id,
-            ),
-            token=True,
-        )
-        await self._receive("RECEIVED_UNLOCK_CONNECTOR")
-        return await self._receive("STATUS_UNLOCK_CONNECTOR", timeout=30)
+        return await self._flow("UNLOCK_CONNECTOR", evse_id=evse_id)
 
+    @invalidates("get_charge_points")
     async def soft_reset(self, evse_id: str):
-        # TODO: verify flow id
-        await self._send(dict(command="SOFT_RESET", evse_id=evse_id, flow_id=str(uuid4())), token=True)
-        await self._receive("RECEIVED_SOFT_RESET")
-        return await self._receive("STATUS_SOFT_RESET", timeout=30)
+        return await self._flow("SOFT_RESET", evse_id=evse_id)
 
-    async def get_charge_point_status(self, evse_id: str) -> dict[str, datetime | float | int | str | None]:
+    async def get_charge_point_status(
+        self, evse_id: str
+    ) -> dict[str, datetime | float | int | str | None] | ChargePointStatus:
         """
         Get the status of a charge point.
 
@@ -291,22 +398,65 @@ class BlueCurrentClient:
                 "evse_id": "BCU123456",
             }
         """
-        if self.httpx_client is None:
-            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
-        response = await self.httpx_client.get(
-            f"{self.api_url}/chargepointstatus?evse_id={evse_id}",
-            headers={"Authorization": f"Token {self.token}", "User-Agent": self._user_agent},
-        )
-        response.raise_for_status()
-        result = response.json()["data"]
-        return parse_datetime_keys(
-            result,
-            formats={
-                "start_datetime": ("%Y%m%d %H:%M:%S", False),
-                "stop_datetime": ("%Y%m%d %H:%M:%S", False),
-            },
-        )
+        result = await self._get_charge_point_status(evse_id)
+        return ChargePointStatus.from_dict(result) if self.models else result
+
+    async def stream_status(
+        self, evse_ids: list[str] | None = None, max_size: int = 1000, policy: Policy = "drop_oldest"
+    ) -> AsyncIterable[dict[str, Any]]:
+        """
+        Stream the status of charge points, as pushed over the websocket.
 
+        First the full status of every charge point is yielded, as returned by get_charge_point_status.
+        After that, only the fields that changed are yielded whenever the status of a charge point is updated.
+        The charge points are subscribed to again when the client reconnects.
+
+        For example:
+            async for update in client.stream_status(["BCU123456"]):
+                print(update)  # {"evse_id": "BCU123456", "activity": "charging", "actual_p1": 16}
+
+        Args:
+            evse_ids: The charge point IDs. Defaults to None, which means all of your charge points.
+            max_size: The number of messages to buffer while the updates are not consumed. Defaults to 1000.
+            policy: What to do when the buffer is full: "drop_oldest", "drop_newest" or "block" (see
+                pybluecurrent.fanout.Subscriber). Defaults to "drop_oldest".
+
+        Returns:
+            An iterable of dictionaries, each with the evse_id and the fields of the status that changed.
+        """
+        if evse_ids is None:
+            evse_ids = await self._get_evse_ids()
+        with self.queue.queue(max_size=max_size, policy=policy) as queue:
+            for evse_id in evse_ids:
+                self._subscriptions[evse_id] = self._subscriptions.get(evse_id, 0) + 1
+            try:
+                for evse_id in evse_ids:
+                    await self._send(dict(command="GET_CH_STATUS", evse_id=evse_id), token=True)
+                statuses = dict(zip(evse_ids, await gather(*map(self._get_charge_point_status, evse_ids))))
+                for evse_id, status in statuses.items():
+                    yield dict(status, evse_id=evse_id)
+                while True:
+                    message = await queue.get()
+                    data = message.get("data")
+                    if message.get("object") != "CH_STATUS" or not isinstance(data, dict):
+                        continue
+                    if data.get("evse_id") not in statuses:
+                        continue
+                    evse_id = data["evse_id"]
+                    update = parse_datetime_keys(dict(data), formats=STATUS_DATETIME_FORMATS)
+                    changes = {
+                        k: v for k, v in update.items() if k not in statuses[evse_id] or statuses[evse_id][k] != v
+                    }
+                    statuses[evse_id].update(changes)
+                    if changes:
+                        yield dict(changes, evse_id=evse_id)
+            finally:
+                for evse_id in evse_ids:
+                    self._subscriptions[evse_id] -= 1
+                    if not self._subscriptions[evse_id]:
+                        del self._subscriptions[evse_id]
+
+    @cached
     async def get_contracts(self) -> list[dict[str, str]]:
         """
         Get your contracts.
@@ -323,15 +473,9 @@ class BlueCurrentClient:
                 }
             ]
         """
-        if self.httpx_client is None:
-            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
-        response = await self.httpx_client.get(
-            f"{self.api_url}/getcontracts",
-            headers={"Authorization": f"Token {self.token}", "User-Agent": self._user_agent},
-        )
-        response.raise_for_status()
-        return response.json()["contracts"]
+        return (await self._http("GET", "getcontracts"))["contracts"]
 
+    @cached
     async def get_grids(self) -> list[dict[str, bool | dict[str, str] | str]]:
         """
         Get your grid connections.
@@ -347,23 +491,17 @@ class BlueCurrentClient:
                 }
             ]
         """
-        if self.httpx_client is None:
-            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
-        response = await self.httpx_client.get(
-            f"{self.api_url}/getgrids",
-            headers={"Authorization": f"Token {self.token}", "User-Agent": self._user_agent},
-        )
-        response.raise_for_status()
-        return response.json()["grids"]
+        return (await self._http("GET", "getgrids"))["grids"]
 
     async def get_transactions(
-        self, evse_id: str, newest_first: bool = True, page: int = 1
-    ) -> dict[str, int | list[dict[str, Any]]]:
+        self, evse_id: str | list[str], newest_first: bool = True, page: int = 1
+    ) -> dict[str, int | list[dict[str, Any]] | list[Transaction]]:
         """
         Get a list of transactions.
 
         Args:
-            evse_id: A charge point ID.
+            evse_id: A charge point ID, or a list of charge point IDs to get the transactions of all of them,
+                sorted by the time they were stopped.
             newest_first: If True, start with the most recent transaction. Defaults to True.
             page: Page to get. Defaults to 1.
 
@@ -395,31 +533,36 @@ class BlueCurrentClient:
             }
 
         """
-        if self.httpx_client is None:
-            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
-        response = await self.httpx_client.post(
-            f"{self.api_url}/gettransactions?"
-            f"page={page}&"
-            f"sort_field_order={'DESC' if newest_first else 'ASC'}&"
-            f"sort_field=stoppedtimestamp",
-            headers={"Authorization": f"Token {self.token}", "User-Agent": self._user_agent},
-            data=dumps({"chargepoints": [{"chargepoint_id": evse_id}]}),
-        )
-        response.raise_for_status()
-        result = response.json()["data"]
-        result["transactions"] = parse_list_datetime_keys(
-            result["transactions"],
-            formats={"started_at": ("%d-%m-%Y %H:%M:%S", False), "end_time": ("%d-%m-%Y %H:%M:%S", False)},
-        )
+        result = await self._get_transactions(evse_id=evse_id, newest_first=newest_first, page=page)
+        if self.models:
+            result["transactions"] = [Transaction.from_dict(tx) for tx in result["transactions"]]
         return result
 
-    async def iterate_transactions(self, evse_id: str, newest_first: bool = True) -> AsyncIterable[dict[str, Any]]:
+    async def iterate_transactions(
+        self,
+        evse_id: str | list[str],
+        newest_first: bool = True,
+        prefetch: int = 4,
+        since: int | datetime | None = None,
+    ) -> AsyncGenerator[dict[str, Any] | Transaction, None]:
         """
         Iterate through your transactions.
 
+        Once the first page reports the total number of pages, the following pages are fetched concurrently,
+        up to prefetch pages ahead of the page being iterated. The transactions are yielded in order.
+
+        When since is given, only the transactions after it are yielded. Paging stops at the first transaction
+        that is not newer than since, and the pages are fetched one by one so that no pages beyond it are requested.
+
         Args:
-            evse_id: A charge point ID.
+            evse_id: A charge point ID, or a list of charge point IDs to iterate through the transactions of
+                all of them in a single stream, sorted by the time they were stopped.
             newest_first: If True, start with the most recent transaction. Defaults to True.
+            prefetch: Maximum number of pages to fetch ahead. Defaults to 4. Use 0 to fetch pages one by one.
+            since: A transaction ID or the end time of a transaction. Defaults to None, which means all transactions.
+                Requires newest_first to be True. A transaction ID requires a single charge point: transactions are
+                sorted by the time they were stopped, so across charge points a long session can have a lower ID
+                than a session that stopped before it.
 
         Returns:
             An iterable of dictionaries describing the transactions.
@@ -440,33 +583,341 @@ class BlueCurrentClient:
                 "currency": "EUR"
             }
         """
-        next_page = 1
-        while next_page is not None:
-            transactions = await self.get_transactions(evse_id=evse_id, newest_first=newest_first, page=next_page)
-            for tx in transactions["transactions"]:  # type: ignore
-                yield tx
-            next_page = transactions["next_page"]  # type: ignore
+        async with aclosing(
+            self._iterate_transactions(evse_id=evse_id, newest_first=newest_first, prefetch=prefetch, since=since)
+        ) as transactions:
+            async for tx in transactions:
+                yield Transaction.from_dict(tx) if self.models else tx
+
+    async def sync_transactions(
+        self, evse_id: str | list[str], store: CheckpointStore
+    ) -> AsyncGenerator[dict[str, Any] | Transaction, None]:
+        """
+        Iterate through the transactions that were stopped since the checkpoint in the store.
+
+        The end time of the newest transaction, with the IDs of the transactions that ended at that time, is saved
+        to the store once the iteration has completed, so that the next sync only yields transactions that have
+        been added since. If the iteration is stopped early, the checkpoint is not updated.
+
+        Args:
+            evse_id: A charge point ID, or a list of charge point IDs.
+            store: The store that keeps the checkpoint, e.g. a JSONCheckpointStore.
+
+        Returns:
+            An iterable of dictionaries describing the transactions, newest first, like iterate_transactions.
+        """
+        key = evse_id if isinstance(evse_id, str) else ",".join(sorted(evse_id))
+        checkpoint = store.load(key)
+        newest = checkpoint
+        async with aclosing(self._iterate_transactions(evse_id=evse_id, prefetch=0)) as transactions:
+            async for tx in transactions:
+                end_time = tx["end_time"]
+                if end_time is not None:
+                    if checkpoint is not None:
+                        if end_time < checkpoint.end_time:
+                            break
+                        if end_time == checkpoint.end_time and tx["transaction_id"] in checkpoint.transaction_ids:
+                            continue
+                    if newest is None or end_time > newest.end_time:
+                        newest = Checkpoint(end_time, frozenset({tx["transaction_id"]}))
+                    elif end_time == newest.end_time:
+                        newest = Checkpoint(end_time, newest.transaction_ids | {tx["transaction_id"]})
+                yield Transaction.from_dict(tx) if self.models else tx
+        if newest is not None and newest != checkpoint:
+            store.save(key, newest)
+
+    async def get_fleet_snapshot(
+        self, evse_ids: list[str] | None = None, concurrency: int = 10
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Get the status, settings and grid status of many charge points concurrently.
+
+        Args:
+            evse_ids: The charge point IDs. Defaults to None, which means all of your charge points.
+            concurrency: Maximum number of requests in flight at the same time. Defaults to 10.
+
+        Returns:
+            A dictionary mapping each charge point ID to a record like this:
+            {
+                "evse_id": "BCU123456",
+                "status": {...},  # As returned by get_charge_point_status.
+                "settings": {...},  # As returned by get_charge_point_settings.
+                "grid_status": {...},  # As returned by get_grid_status.
+                "errors": {}
+            }
+            If any of the requests fails, its value is None and the exception is stored in "errors" under
+            the same key, e.g. {"grid_status": BlueCurrentException(...)}.
+        """
+        if evse_ids is None:
+            evse_ids = await self._get_evse_ids()
+        semaphore = Semaphore(concurrency)
+
+        async def limited(method: Callable[[str], Awaitable[dict[str, Any]]], evse_id: str) -> dict[str, Any]:
+            async with semaphore:
+                return await method(evse_id)
+
+        methods = {
+            "status": self.get_charge_point_status,
+            "settings": self.get_charge_point_settings,
+            "grid_status": self.get_grid_status,
+        }
+        with self.priority("bulk"):
+            results = await gather(
+                *(limited(method, evse_id) for evse_id in evse_ids for method in methods.values()),  # type: ignore
+                return_exceptions=True,
+            )
+        snapshot: dict[str, dict[str, Any]] = {}
+        for index, evse_id in enumerate(evse_ids):
+            record: dict[str, Any] = dict(evse_id=evse_id, errors={})
+            for key, result in zip(methods, results[index * len(methods) : (index + 1) * len(methods)]):
+                if isinstance(result, Exception):
+                    record[key], record["errors"][key] = None, result
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    record[key] = result
+            snapshot[evse_id] = record
+        return snapshot
+
+    @invalidates("get_charge_points")
+    async def send_fleet_command(
+        self, command: str, evse_ids: list[str], rate: float | None = 10, concurrency: int = 50
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Send a command to many charge points concurrently, and wait until each of them has processed it.
+
+        Args:
+            command: One of "SET_OPERATIVE", "SET_INOPERATIVE", "SOFT_RESET" or "UNLOCK_CONNECTOR".
+            evse_ids: The charge point IDs.
+            rate: Maximum number of commands to send per second. Defaults to 10. Use None for no limit.
+            concurrency: Maximum number of commands in flight at the same time. Defaults to 50.
+
+        Returns:
+            A dictionary mapping each charge point ID to a report like this:
+            {
+                "evse_id": "BCU123456",
+                "flow_id": "5f0c3c6e-...",  # The flow_id that the replies were matched on.
+                "result": {...},  # The STATUS_ reply, or None if the command failed.
+                "error": None,  # The exception if the command failed, e.g. a TimeoutError.
+                "duration": 1.23  # Seconds from sending the command until it was processed or failed.
+            }
+        """
+        if command not in FLEET_COMMANDS:
+            raise ValueError(f"Unknown fleet command: {command!r}. Use one of {', '.join(FLEET_COMMANDS)}.")
+        limiter = None if rate is None else RateLimiter(rate)
+        semaphore = Semaphore(concurrency)
+
+        async def run(evse_id: str) -> dict[str, Any]:
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.acquire()
+                report: dict[str, Any] = dict(evse_id=evse_id, flow_id=str(uuid4()), result=None, error=None)
+                start = monotonic()
+                try:
+                    report["result"] = await self._flow(command, evse_id=evse_id, flow_id=report["flow_id"])
+                except Exception as e:
+                    report["error"] = e
+                report["duration"] = monotonic() - start
+                return report
+
+        return dict(zip(evse_ids, await gather(*map(run, evse_ids))))
+
+    @contextmanager
+    def priority(self, priority: Priority) -> Iterator[None]:
+        """
+        Send the websocket commands of this context, and of the tasks created in it, with the given priority.
+
+        When messages have to wait to be sent, control messages go first, then interactive ones, then bulk ones.
+        By default, GET_ commands are interactive and other commands are control messages.
+        Fleet snapshots and batches are bulk.
+
+        For example:
+            with client.priority("bulk"):
+                settings = await gather(*map(client.get_charge_point_settings, evse_ids))
+
+        Args:
+            priority: "control", "interactive" or "bulk".
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority!r}. Use one of {', '.join(PRIORITIES)}.")
+        reset = _priority.set(priority)
+        try:
+            yield
+        finally:
+            _priority.reset(reset)
+
+    def batch(self, timeout: float = 10) -> Batch:
+        """
+        Queue websocket commands and send them back-to-back, awaiting all replies together.
+
+        For example:
+            async with client.batch() as batch:
+                settings = [batch.get_charge_point_settings(evse_id) for evse_id in evse_ids]
+            print([future.result() for future in settings])
+
+        Args:
+            timeout: Seconds to wait for the reply to each command after sending the batch. Defaults to 10.
+
+        Returns:
+            A Batch, whose methods return futures that have their results once the batch has exited.
+        """
+        return Batch(self, timeout=timeout)
+
+    async def _get_transactions(
+        self, evse_id: str | list[str], newest_first: bool = True, page: int = 1, parse_datetimes: bool = True
+    ) -> dict[str, Any]:
+        chargepoints = [
+            {"chargepoint_id": chargepoint_id}
+            for chargepoint_id in ([evse_id] if isinstance(evse_id, str) else evse_id)
+        ]
+        response = await self._http(
+            "POST",
+            "gettransactions",
+            params=dict(
+                page=page,
+                sort_field_order="DESC" if newest_first else "ASC",
+                sort_field="stoppedtimestamp",
+            ),
+            content=self.serializer.dumps({"chargepoints": chargepoints}),
+        )
+        result = response["data"]
+        if parse_datetimes:
+            result["transactions"] = parse_list_datetime_keys(
+                result["transactions"], formats=TRANSACTION_DATETIME_FORMATS
+            )
+        return result
+
+    async def _iterate_transactions(
+        self,
+        evse_id: str | list[str],
+        newest_first: bool = True,
+        prefetch: int = 4,
+        since: int | datetime | None = None,
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        if since is not None:
+            if not newest_first:
+                raise ValueError("Iterating transactions since a checkpoint requires newest_first=True.")
+            if not isinstance(since, datetime) and not isinstance(evse_id, str):
+                raise ValueError("Iterating transactions since a transaction ID requires a single charge point.")
+            async with aclosing(self._iterate_transactions(evse_id=evse_id, prefetch=0)) as transactions:
+                async for tx in transactions:
+                    if isinstance(since, datetime):
+                        if tx["end_time"] is not None and tx["end_time"] <= since:
+                            return
+                    elif tx["transaction_id"] <= since:
+                        return
+                    yield tx
+            return
+        async with aclosing(
+            self._iterate_pages(evse_id=evse_id, newest_first=newest_first, prefetch=prefetch)
+        ) as pages:
+            async for page in pages:
+                for tx in page:
+                    yield tx
+
+    async def _iterate_pages(
+        self, evse_id: str | list[str], newest_first: bool = True, prefetch: int = 4, parse_datetimes: bool = True
+    ) -> AsyncGenerator[list[dict[str, Any]], None]:
+        def get(page: int) -> Coroutine[Any, Any, dict[str, Any]]:
+            return self._get_transactions(
+                evse_id=evse_id, newest_first=newest_first, page=page, parse_datetimes=parse_datetimes
+            )
+
+        transactions = await get(1)
+        total_pages = transactions.get("total_pages")
+        if prefetch <= 0 or not isinstance(total_pages, int):
+            while True:
+                yield transactions["transactions"]
+                if transactions["next_page"] is None:
+                    return
+                transactions = await get(transactions["next_page"])
+        pending: deque[Task] = deque()
+        next_page = 2
+        try:
+            while True:
+                while len(pending) < prefetch and next_page <= total_pages:
+                    pending.append(create_task(get(next_page)))
+                    next_page += 1
+                yield transactions["transactions"]
+                if not pending:
+                    return
+                transactions = await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await gather(*pending, return_exceptions=True)
+
+    async def _get_charge_point_status(self, evse_id: str) -> dict[str, Any]:
+        result = await self._http("GET", "chargepointstatus", params=dict(evse_id=evse_id))
+        return parse_datetime_keys(result["data"], formats=STATUS_DATETIME_FORMATS)
+
+    async def _http(
+        self, method: str, endpoint: str, params: dict[str, Any] | None = None, content: str | None = None
+    ) -> Any:
+        """Send a request to an endpoint of the API and decode the JSON response."""
+        if self.httpx_client is None:
+            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
+        with self.metrics.measure(f"HTTP {endpoint}"):
+            response = await self.httpx_client.request(
+                method,
+                f"{self.api_url}/{endpoint}",
+                params=params,
+                content=content,
+                headers={"Authorization": f"Token {self.token}", "User-Agent": self._user_agent},
+            )
+            response.raise_for_status()
+        if content is not None:
+            self.metrics.record_sent(content)
+        self.metrics.record_received(response.content)
+        return self.serializer.loads(response.content)
+
+    async def _get_evse_ids(self) -> list[str]:
+        return [
+            str(charge_point["evse_id"]) if isinstance(charge_point, dict) else charge_point.evse_id
+            for charge_point in await self.get_charge_points()
+        ]
 
     async def _login(self) -> None:
-        await self._send(
+        message = await self._request(
             dict(
                 command="VALIDATE_PASSWORD",
                 username=self.credentials[0],
                 password=self._encrypt_password(),
-            )
+            ),
+            "STATUS_PASSWORD",
+            token=False,
         )
-        message = await self._receive("STATUS_PASSWORD")
         if not message.get("accepted"):
             self.logger.error("Authentication failed")
             raise AuthenticationFailed(message)
         self.token = message["token"]
         self.logger.info("Successfully authenticated")
+        if self.token_store is not None:
+            self.token_store.save(self.credentials[0], self.token)
 
     async def _hello(self) -> None:
-        await self._send(dict(command="HELLO"), token=True)
-        await self._receive("HELLO")
+        await self._request(dict(command="HELLO"), "HELLO")
+
+    async def _authenticate(self) -> None:
+        """Say hello with the current token. Log in if there is no token, or if the server rejects it."""
+        if self.token is not None:
+            try:
+                await self._hello()
+                return
+            except ConnectionLost:
+                raise
+            except BlueCurrentException:
+                self.logger.info("Token was rejected, logging in again")
+                self.token = None
+                if self.token_store is not None:
+                    self.token_store.save(self.credentials[0], None)
+        await self._login()
+        await self._hello()
 
     def _encrypt_password(self) -> str:
+        # Only imported when logging in, because it is slow to import.
+        from sjcl import SJCL
+
         return dumps(
             {
                 key: (value.decode("utf-8") if isinstance(value, bytes) else value)
@@ -475,29 +926,231 @@ class BlueCurrentClient:
             ensure_ascii=False,
         )
 
+    async def _connect(self) -> None:
+        self.logger.debug("Creating BlueCurrent websocket connection")
+        self.socket = await connect(self.socket_url, user_agent_header=self._user_agent)
+
     async def _handler(self) -> None:
-        if self.socket is None:
-            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
-        async for message in self.socket:
-            self.logger.debug(f"Received message: {message}")
-            await self.queue.put(loads(message))
+        while True:
+            if self.socket is None:
+                raise RuntimeError(f"{self.__class__.__name__} is not connected.")
+            try:
+                async for message in self.socket:
+                    await self._process(message)
+            except ConnectionClosed:
+                pass
+            self._connected.clear()
+            self._fail_waiters(ConnectionLost("The websocket connection was lost."))
+            if not self.reconnect:
+                self.logger.error("BlueCurrent websocket connection lost")
+                return
+            self.logger.warning("BlueCurrent websocket connection lost, reconnecting")
+            await self._reconnect()
+
+    async def _process(self, message: str | bytes) -> None:
+        """Record, decode and dispatch a received message, and put it on the queue."""
+        self.logger.debug("Received message: %s", message)
+        self.metrics.record_received(message)
+        if self.recorder is not None:
+            self.recorder.record(message)
+        parsed = self.serializer.loads(message)
+        self._dispatch(parsed)
+        await self.queue.put(parsed)
+
+    async def _reconnect(self) -> None:
+        """Reconnect with jittered exponential backoff, then resume the session in the background."""
+        if self._resumer is not None:
+            self._resumer.cancel()
+        for attempt in count():
+            try:
+                await self._connect()
+                break
+            except (InvalidHandshake, OSError, TimeoutError) as e:
+                delay = min(self.max_reconnect_delay, self.reconnect_delay * 2**attempt)
+                self.logger.warning(f"Reconnecting failed ({e!r}), retrying in {delay:.1f}s")
+                await sleep(uniform(delay / 2, delay))
+        self._resumer = create_task(self._resume())
+
+    async def _resume(self) -> None:
+        """Resume the session on a new connection, and subscribe to the status of streamed charge points again."""
+        try:
+            await self._authenticate()
+            for evse_id in list(self._subscriptions):
+                await self._send(dict(command="GET_CH_STATUS", evse_id=evse_id), token=True)
+        except (ConnectionLost, TimeoutError):
+            # Closing the socket makes the handler reconnect.
+            if self.socket is not None:
+                await self.socket.close()
+            return
+        except AuthenticationFailed:
+            return
+        self.logger.info("Successfully reconnected")
+        self._connected.set()
+
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        """
+        Route a message to the futures waiting for it.
+
+        Waiters are looked up by the object of the message and by the keys correlating it to a request:
+        its flow_id or, if it has none, the evse_id it refers to. A waiter registered without keys matches any
+        message with the right object. A message with keys that match no waiter, e.g. a late reply to a request
+        that timed out, is not routed to waiters for other keys. Only a message without any keys goes to the oldest
+        waiter for the object.
+        An ERROR message fails the waiters for its keys. An ERROR with keys that match no waiter is dropped,
+        and one without any keys fails all pending waiters.
+        """
+        obj, keys = message.get("object"), self._message_keys(message)
+        if obj == "ERROR":
+            self._fail_waiters(BlueCurrentException(message), keys=keys)
+            return
+        by_key = self._waiters.get(obj)  # type: ignore
+        if not by_key:
+            return
+        queues = [*(by_key.get(key) for key in keys), by_key.get(None)] if keys else [*by_key.values()]
+        for queue in queues:
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    future.set_result(message)
+                    return
+
+    def _fail_waiters(self, exception: Exception, keys: tuple[str, ...] = ()) -> None:
+        """Fail the waiters for any of the keys or, if no keys are given, all pending waiters."""
+        if keys:
+            queues = [queue for by_key in self._waiters.values() for key, queue in by_key.items() if key in keys]
+            if not any(queues):
+                self.logger.warning("Dropped an error that matches no request: %s", exception)
+                return
+        else:
+            queues = [queue for by_key in self._waiters.values() for queue in by_key.values()]
+        for queue in queues:
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    future.set_exception(exception)
+
+    @staticmethod
+    def _message_keys(message: dict[str, Any]) -> tuple[str, ...]:
+        """
+        Get the keys correlating a message to a request: its flow_id or, if it has none, the evse_id it refers to.
+
+        A reply with a flow_id only belongs to that flow, not to another flow on the same charge point.
+        """
+        data = message.get("data")
+        sources = (message, data) if isinstance(data, dict) else (message,)
+        flow_ids = [source["flow_id"] for source in sources if source.get("flow_id")]
+        if flow_ids:
+            return tuple(flow_ids)
+        keys = [source["evse_id"] for source in sources if source.get("evse_id")]
+        if isinstance(data, dict) and str(data.get("id", "")).startswith("GRID-"):
+            keys.append(data["id"][5:])
+        return tuple(keys)
 
     @property
     def _user_agent(self) -> str:
         return f"pybluecurrent {__version__.split('+')[0]}"
 
-    async def _receive(self, obj: str, timeout: int = 10) -> dict[str, Any]:
-        with self.queue.queue() as q:
+    def _expect(self, obj: str, *keys: str) -> Future[dict[str, Any]]:
+        """
+        Register a future for the next message with this object that matches any of the keys.
+
+        Register before sending the command, so that the reply cannot arrive before anyone waits for it.
+        The future is removed from the dispatch table once it is done or cancelled.
+        """
+        future: Future[dict[str, Any]] = get_running_loop().create_future()
+        queues = [self._waiters.setdefault(obj, {}).setdefault(key, deque()) for key in keys or (None,)]
+        for queue in queues:
+            queue.append(future)
+
+        def discard(_: Future) -> None:
+            for key, queue in zip(keys or (None,), queues):
+                if future in queue:
+                    queue.remove(future)
+                if not queue and self._waiters.get(obj, {}).get(key) is queue:
+                    del self._waiters[obj][key]
+                    if not self._waiters[obj]:
+                        del self._waiters[obj]
+
+        future.add_done_callback(discard)
+        return future
+
+    async def _receive(self, obj: str, *keys: str, timeout: float = 10) -> dict[str, Any]:
+        return await wait_for(self._expect(obj, *keys), timeout=timeout)
+
+    async def _request(
+        self, data: dict[str, Any], obj: str, *keys: str, timeout: float = 10, token: bool = True
+    ) -> dict[str, Any]:
+        """
+        Send a command and wait for the reply with the given object that matches any of the keys.
+
+        If the connection is lost, GET_ commands are sent again once the client has reconnected.
+        Other commands fail with ConnectionLost, because they may have been executed already.
+        """
+        retry = self.reconnect and data["command"].startswith("GET_")
+        timeout = self._timeout(data["command"], timeout)
+        with self.metrics.measure(data["command"]):
             while True:
-                message = await wait_for(q.get(), timeout=timeout)
-                if message.get("object") == "ERROR":
-                    raise BlueCurrentException(message)
-                if message.get("object") == obj:
-                    return message
+                future = self._expect(obj, *keys)
+                try:
+                    await self._send(data, token=token)
+                    return await self._reply(future, data, timeout=timeout, token=token)
+                except ConnectionLost:
+                    if not retry:
+                        raise
+                    retry = False
+                    self.logger.debug("Retrying %s after reconnecting", data["command"])
+                    await wait_for(self._connected.wait(), timeout=timeout)
+                finally:
+                    future.cancel()
+
+    async def _flow(self, command: str, evse_id: str, flow_id: str | None = None) -> dict[str, Any]:
+        """Send a command with a flow_id and wait until it is both received and processed."""
+        flow_id = str(uuid4()) if flow_id is None else flow_id
+        received = self._expect(f"RECEIVED_{command}", flow_id, evse_id)
+        status = self._expect(f"STATUS_{command}", flow_id, evse_id)
+        try:
+            with self.metrics.measure(command):
+                await self._send(dict(command=command, evse_id=evse_id, flow_id=flow_id), token=True)
+                await wait_for(received, timeout=10)
+                return await wait_for(status, timeout=self._timeout(command, 30))
+        finally:
+            received.cancel()
+            status.cancel()
+
+    async def _reply(self, future: Future, data: dict[str, Any], timeout: float, token: bool) -> dict[str, Any]:
+        """
+        Wait for the reply to a command, sending it again if it is slow and hedging is enabled.
+
+        The reply to the other send is dropped by _dispatch, unless a request with the same keys is waiting for it.
+        """
+        delay = None if self.timeouts is None else self.timeouts.hedge_delay(data["command"])
+        if delay is not None and delay < timeout:
+            try:
+                return await wait_for(shield(future), timeout=delay)
+            except TimeoutError:
+                self.logger.debug("Sending %s again after %.3fs", data["command"], delay)
+                self.metrics[data["command"]].hedges += 1
+                await self._send(data, token=token)
+                timeout -= delay
+        return await wait_for(future, timeout=timeout)
+
+    def _timeout(self, command: str, default: float) -> float:
+        return default if self.timeouts is None else self.timeouts.timeout(command, default)
 
     async def _send(self, data: dict[str, Any], token: bool = False):
         if token:
             data.update(dict(Authorization=f"Token {self.token}"))
         if self.socket is None:
             raise RuntimeError(f"{self.__class__.__name__} is not connected.")
-        await self.socket.send(dumps(data, ensure_ascii=False))
+        message = self.serializer.dumps(data)
+        priority = _priority.get() or ("interactive" if data["command"].startswith("GET_") else "control")
+        await self.scheduler.submit(message, priority=priority, key=data.get("evse_id"))
+
+    async def _write(self, message: str | bytes) -> None:
+        if self.socket is None:
+            raise RuntimeError(f"{self.__class__.__name__} is not connected.")
+        try:
+            await self.socket.send(message)
+        except ConnectionClosed as e:
+            raise ConnectionLost("The websocket connection was lost.") from e
+        self.metrics.record_sent(message)
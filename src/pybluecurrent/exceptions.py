@@ -4,3 +4,7 @@ class AuthenticationFailed(ValueError):
 
 class BlueCurrentException(Exception):
     pass
+
+
+class ConnectionLost(BlueCurrentException):
+    pass
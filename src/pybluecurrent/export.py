@@ -0,0 +1,250 @@
+import csv
+from array import array
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from math import isnan, nan
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Iterator
+
+from pybluecurrent.utilities import compile_datetime_format
+
+if TYPE_CHECKING:
+    from pybluecurrent.client import BlueCurrentClient
+
+# The type of every column: "q" for integers, "d" for floats, "M" for timestamps and "O" for strings.
+# Integers, floats and timestamps are stored in arrays, strings in lists.
+COLUMNS: dict[str, str] = {
+    "transaction_id": "q",
+    "chargepoint_id": "O",
+    "chargepoint_type": "O",
+    "evse_name": "O",
+    "started_at": "M",
+    "end_time": "M",
+    "kwh": "d",
+    "card_id": "O",
+    "card_name": "O",
+    "total_costs": "d",
+    "total_costs_ex_vat": "d",
+    "vat": "d",
+    "currency": "O",
+}
+# Timestamps are stored as seconds since 1970-01-01, with the same missing value as numpy.datetime64.
+NAT = -(2**63)
+
+_EPOCH = datetime(1970, 1, 1)
+_parse_datetime = compile_datetime_format("%d-%m-%Y %H:%M:%S")
+
+
+class TransactionColumns:
+    """
+    Transactions stored in typed columns.
+
+    Integers, floats and timestamps are kept in arrays, and strings in lists.
+    Timestamps are the (naive) local time of the API, stored as seconds since 1970-01-01, or NAT if they are missing.
+    Missing floats are stored as NaN, and missing strings as None.
+    """
+
+    def __init__(self) -> None:
+        self.arrays: dict[str, "array[Any]"] = {
+            column: array("q" if typecode == "M" else typecode)
+            for column, typecode in COLUMNS.items()
+            if typecode != "O"
+        }
+        self.strings: dict[str, list[str | None]] = {
+            column: [] for column, typecode in COLUMNS.items() if typecode == "O"
+        }
+
+    def __len__(self) -> int:
+        return len(self.arrays["transaction_id"])
+
+    @property
+    def columns(self) -> dict[str, "array[Any] | list[str | None]"]:
+        """All columns, in the order of COLUMNS."""
+        return {
+            column: self.strings[column] if typecode == "O" else self.arrays[column]
+            for column, typecode in COLUMNS.items()
+        }
+
+    def append(self, transactions: list[dict[str, Any]]) -> None:
+        """
+        Append a page of transactions, as returned by the API.
+
+        Args:
+            transactions: A list of transactions, with their started_at and end_time still formatted as strings.
+        """
+        for column, typecode in COLUMNS.items():
+            values = (tx.get(column) for tx in transactions)
+            if typecode == "M":
+                self.arrays[column].extend(_timestamp(value) for value in values)
+            elif typecode == "d":
+                self.arrays[column].extend(nan if value is None else float(value) for value in values)
+            elif typecode == "O":
+                self.strings[column].extend(values)
+            else:
+                self.arrays[column].extend(values)
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        """Iterate over the transactions as tuples, with datetimes, and None for missing values."""
+        columns: list[Iterator[Any]] = []
+        for column, typecode in COLUMNS.items():
+            if typecode == "M":
+                columns.append(
+                    None if value == NAT else _EPOCH + timedelta(seconds=value) for value in self.arrays[column]
+                )
+            elif typecode == "d":
+                columns.append(None if isnan(value) else value for value in self.arrays[column])
+            elif typecode == "O":
+                columns.append(iter(self.strings[column]))
+            else:
+                columns.append(iter(self.arrays[column]))
+        return zip(*columns)
+
+    def to_numpy(self) -> dict[str, Any]:
+        """
+        Convert the columns to numpy arrays. This requires numpy.
+
+        Integers, floats and timestamps share memory with the columns.
+        Timestamps are datetime64[s] arrays and strings are object arrays.
+        """
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError("Converting to numpy requires numpy: pip install numpy") from e
+        dtypes: dict[str, Any] = {"q": numpy.int64, "d": numpy.float64, "M": numpy.dtype("datetime64[s]")}
+        return {
+            column: (
+                numpy.array(self.strings[column], dtype=object)
+                if typecode == "O"
+                else numpy.frombuffer(self.arrays[column], dtype=dtypes[typecode])
+            )
+            for column, typecode in COLUMNS.items()
+        }
+
+    def to_arrow(self) -> Any:
+        """
+        Convert the columns to a pyarrow.Table. This requires pyarrow: pip install pybluecurrent[arrow].
+
+        Integers, floats and timestamps are converted without copying, and missing values become nulls.
+        """
+        pa, pc = _import_pyarrow()
+        arrays = {}
+        for column, typecode in COLUMNS.items():
+            if typecode == "O":
+                arrays[column] = pa.array(self.strings[column], type=pa.string())
+                continue
+            values = self.arrays[column]
+            data = pa.Array.from_buffers(
+                pa.float64() if typecode == "d" else pa.int64(), len(values), [None, pa.py_buffer(values)]
+            )
+            if typecode == "d":
+                arrays[column] = pc.if_else(pc.is_nan(data), None, data)
+            elif typecode == "M":
+                arrays[column] = pc.if_else(pc.equal(data, NAT), None, data).cast(pa.timestamp("s"))
+            else:
+                arrays[column] = data
+        return pa.table(arrays)
+
+
+async def iterate_transaction_columns(
+    client: "BlueCurrentClient",
+    evse_id: str | list[str],
+    newest_first: bool = True,
+    chunk_size: int = 10_000,
+    prefetch: int = 4,
+) -> AsyncGenerator[TransactionColumns, None]:
+    """
+    Iterate through transactions in chunks of typed columns.
+
+    The pages of transactions are appended to the columns as they are received, so no more than
+    a chunk is held in memory at once, unless the chunks are kept.
+
+    Args:
+        client: A connected BlueCurrentClient.
+        evse_id: A charge point ID, or a list of charge point IDs.
+        newest_first: If True, start with the most recent transaction. Defaults to True.
+        chunk_size: The number of transactions after which a chunk is yielded. Chunks consist of whole pages,
+            so they can be slightly larger. Defaults to 10000.
+        prefetch: Number of pages to request ahead. Defaults to 4.
+
+    Returns:
+        An iterable of TransactionColumns.
+    """
+    columns = TransactionColumns()
+    async with aclosing(
+        client._iterate_pages(evse_id=evse_id, newest_first=newest_first, prefetch=prefetch, parse_datetimes=False)
+    ) as pages:
+        async for page in pages:
+            columns.append(page)
+            if len(columns) >= chunk_size:
+                yield columns
+                columns = TransactionColumns()
+    if len(columns):
+        yield columns
+
+
+async def export_transactions(
+    client: "BlueCurrentClient",
+    evse_id: str | list[str],
+    path: str | Path,
+    file_format: str | None = None,
+    newest_first: bool = True,
+    chunk_size: int = 10_000,
+) -> int:
+    """
+    Export transactions to a CSV or Parquet file, one chunk at a time.
+
+    For example:
+        async with client:
+            await export_transactions(client, ["BCU123456", "BCU234567"], "transactions.parquet")
+
+    Args:
+        client: A connected BlueCurrentClient.
+        evse_id: A charge point ID, or a list of charge point IDs.
+        path: The path of the file to write.
+        file_format: Either "csv" or "parquet". Defaults to None, which means it is derived from the suffix of path.
+            Writing Parquet requires pyarrow: pip install pybluecurrent[arrow].
+        newest_first: If True, start with the most recent transaction. Defaults to True.
+        chunk_size: The number of transactions to hold in memory, and the size of the Parquet row groups.
+            Defaults to 10000.
+
+    Returns:
+        The number of transactions written.
+    """
+    path = Path(path)
+    file_format = (file_format or path.suffix.lstrip(".")).lower()
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(f"Unknown file format: {file_format!r}. Use 'csv' or 'parquet'.")
+    chunks = iterate_transaction_columns(client, evse_id, newest_first=newest_first, chunk_size=chunk_size)
+    n = 0
+    async with aclosing(chunks):
+        if file_format == "csv":
+            with path.open("w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                async for chunk in chunks:
+                    writer.writerows(chunk.rows())
+                    n += len(chunk)
+        else:
+            _import_pyarrow()
+            from pyarrow import parquet
+
+            with parquet.ParquetWriter(path, schema=TransactionColumns().to_arrow().schema) as writer:
+                async for chunk in chunks:
+                    writer.write_table(chunk.to_arrow())
+                    n += len(chunk)
+    return n
+
+
+def _import_pyarrow() -> tuple[Any, Any]:
+    try:
+        import pyarrow
+        import pyarrow.compute
+    except ImportError as e:
+        raise ImportError("This requires pyarrow: pip install pybluecurrent[arrow]") from e
+    return pyarrow, pyarrow.compute
+
+
+def _timestamp(value: str | None) -> int:
+    if not value:
+        return NAT
+    return (_parse_datetime(value) - _EPOCH) // timedelta(seconds=1)
@@ -0,0 +1,162 @@
+from asyncio import Event
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Generic, Iterator, Literal, TypeVar
+
+T = TypeVar("T")
+Policy = Literal["drop_oldest", "drop_newest", "block"]
+POLICIES: tuple[Policy, ...] = ("drop_oldest", "drop_newest", "block")
+
+
+class Subscriber(Generic[T]):
+    """
+    Bounded queue of a single subscriber of a FanOut.
+
+    When the queue is full, the policy decides what happens to a new item:
+    - "drop_oldest": The oldest item in the queue is dropped to make room.
+    - "drop_newest": The new item is dropped.
+    - "block": The producer waits until there is room, or until the subscriber leaves. For the queue of
+      a BlueCurrentClient, this stops reading from the websocket, so replies to requests are delayed too.
+    """
+
+    def __init__(self, max_size: int = 1000, policy: Policy = "drop_oldest"):
+        if max_size < 1:
+            raise ValueError("The max_size must be at least 1.")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy!r}. Use one of {', '.join(POLICIES)}.")
+        self.max_size, self.policy = max_size, policy
+        self.dropped, self.high_water, self.received = 0, 0, 0
+        self.closed = False
+        self._buffer: deque[T] = deque()
+        self._not_empty, self._not_full = Event(), Event()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def qsize(self) -> int:
+        return len(self._buffer)
+
+    def empty(self) -> bool:
+        return not self._buffer
+
+    async def get(self) -> T:
+        """Remove and return the oldest item, waiting for one if the queue is empty."""
+        while not self._buffer:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> T:
+        item = self._buffer.popleft()
+        self._not_full.set()
+        return item
+
+    async def put(self, item: T) -> None:
+        """Add an item, waiting for room if the queue is full and the policy is "block"."""
+        if self.policy == "block":
+            while len(self._buffer) >= self.max_size and not self.closed:
+                self._not_full.clear()
+                await self._not_full.wait()
+        self.put_nowait(item)
+
+    def put_nowait(self, item: T) -> None:
+        """Add an item, dropping an item if the queue is full (for the "block" policy, the oldest one)."""
+        if self.closed:
+            return
+        self.received += 1
+        if len(self._buffer) >= self.max_size:
+            self.dropped += 1
+            if self.policy == "drop_newest":
+                return
+            self._buffer.popleft()
+        self._buffer.append(item)
+        self.high_water = max(self.high_water, len(self._buffer))
+        self._not_empty.set()
+
+    def close(self) -> None:
+        """Stop accepting items, and release a producer that is waiting for room."""
+        self.closed = True
+        self._not_full.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "max_size": self.max_size,
+            "size": len(self._buffer),
+            "high_water": self.high_water,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
+
+
+class FanOut(Generic[T]):
+    """
+    Deliver every item that is put to all subscribers, each with its own bounded queue.
+
+    For example:
+        with client.queue.queue(max_size=100, policy="drop_newest") as queue:
+            message = await queue.get()
+
+    Every subscriber counts the items it dropped and the largest size its queue has reached,
+    so memory stays bounded under bursts of messages, and slow subscribers can be detected.
+    """
+
+    def __init__(self, max_size: int = 1000, policy: Policy = "drop_oldest"):
+        """
+        Args:
+            max_size: The default size of the queues of subscribers. Defaults to 1000.
+            policy: The default policy of subscribers when their queue is full: "drop_oldest", "drop_newest"
+                or "block". Defaults to "drop_oldest".
+        """
+        self.max_size, self.policy = max_size, policy
+        self.subscribers: set[Subscriber[T]] = set()
+        self.dropped = 0  # By subscribers that have unsubscribed.
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    @contextmanager
+    def queue(self, max_size: int | None = None, policy: Policy | None = None) -> Iterator[Subscriber[T]]:
+        """
+        Subscribe with a queue for the duration of the context.
+
+        Args:
+            max_size: The size of the queue. Defaults to None, which means the default of the FanOut.
+            policy: The policy when the queue is full. Defaults to None, which means the default of the FanOut.
+
+        Returns:
+            The queue of the subscriber.
+        """
+        subscriber: Subscriber[T] = Subscriber(
+            self.max_size if max_size is None else max_size, self.policy if policy is None else policy
+        )
+        self.subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self.subscribers.discard(subscriber)
+            subscriber.close()
+            self.dropped += subscriber.dropped
+
+    async def subscribe(self, max_size: int | None = None, policy: Policy | None = None) -> AsyncIterator[T]:
+        """Subscribe and yield every item as it is available."""
+        with self.queue(max_size=max_size, policy=policy) as queue:
+            while True:
+                yield await queue.get()
+
+    async def put(self, item: T) -> None:
+        """Put an item on the queues of all subscribers, waiting for subscribers with the "block" policy."""
+        for subscriber in list(self.subscribers):
+            if subscriber.policy == "block":
+                await subscriber.put(item)
+            else:
+                subscriber.put_nowait(item)
+
+    def stats(self) -> dict[str, Any]:
+        """Get the number of subscribers, the items dropped in total, and the statistics of every subscriber."""
+        subscribers = [subscriber.stats() for subscriber in self.subscribers]
+        return {
+            "subscribers": subscribers,
+            "dropped": self.dropped + sum(subscriber["dropped"] for subscriber in subscribers),
+            "high_water": max((subscriber["high_water"] for subscriber in subscribers), default=0),
+        }
@@ -0,0 +1,142 @@
+from asyncio import Semaphore, gather
+from importlib.util import find_spec
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Iterable, Iterator, TypeVar
+
+from httpx import AsyncClient, Limits
+
+from pybluecurrent.client import BlueCurrentClient
+from pybluecurrent.tokens import MemoryTokenStore, TokenStore
+
+T = TypeVar("T")
+
+
+def create_httpx_client(
+    max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 30, **kwargs: Any
+) -> AsyncClient:
+    """
+    Create an HTTP client with a connection pool that is suitable to share between many BlueCurrentClients.
+
+    HTTP/2 is used if the h2 package is installed (pip install pybluecurrent[http2]), so that concurrent requests
+    are multiplexed over a single connection.
+
+    Args:
+        max_connections: Maximum number of connections in the pool. Defaults to 100.
+        max_keepalive_connections: Maximum number of idle connections to keep alive. Defaults to 20.
+        keepalive_expiry: Number of seconds to keep idle connections alive. Defaults to 30.
+        **kwargs: Other arguments for httpx.AsyncClient.
+
+    Returns:
+        An httpx.AsyncClient.
+    """
+    kwargs.setdefault("http2", find_spec("h2") is not None)
+    return AsyncClient(
+        limits=Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        **kwargs,
+    )
+
+
+class BlueCurrentManager:
+    """
+    Manage the clients of many BlueCurrent accounts.
+
+    All clients share a single HTTP connection pool and token store, so only accounts without a valid token log in.
+    Every account still has its own websocket, because the session is bound to it.
+
+    For example:
+        async with BlueCurrentManager({"username": "password", "other_username": "other_password"}) as manager:
+            charge_points = await manager.gather(lambda client: client.get_charge_points())
+
+    Accounts that fail to connect are left out of the manager, and their exceptions are stored in errors.
+    """
+
+    def __init__(
+        self,
+        accounts: dict[str, str] | Iterable[tuple[str, str]],
+        token_store: TokenStore | None = None,
+        httpx_client: AsyncClient | None = None,
+        concurrency: int = 10,
+        **kwargs: Any,
+    ):
+        """
+        Args:
+            accounts: A dictionary of usernames and passwords, or an iterable of (username, password) tuples.
+            token_store: A store for the tokens of all accounts. Defaults to None, which means a MemoryTokenStore.
+            httpx_client: The HTTP client to share. Defaults to None, which means one is created with
+                create_httpx_client when entering the manager, and closed when exiting it.
+            concurrency: Maximum number of accounts to connect at the same time. Defaults to 10.
+            **kwargs: Other arguments for BlueCurrentClient.
+        """
+        self.accounts = dict(accounts)
+        self.clients: dict[str, BlueCurrentClient] = {}
+        self.concurrency = concurrency
+        self.errors: dict[str, Exception] = {}
+        self.httpx_client = httpx_client
+        self.logger = getLogger("BlueCurrentManager")
+        self.token_store = MemoryTokenStore() if token_store is None else token_store
+        self._kwargs = kwargs
+        self._owns_httpx_client = httpx_client is None
+
+    async def __aenter__(self) -> "BlueCurrentManager":
+        if self._owns_httpx_client:
+            self.httpx_client = create_httpx_client()
+            await self.httpx_client.__aenter__()
+        semaphore = Semaphore(self.concurrency)
+
+        async def connect(username: str, password: str) -> BlueCurrentClient:
+            async with semaphore:
+                client = BlueCurrentClient(
+                    username, password, token_store=self.token_store, httpx_client=self.httpx_client, **self._kwargs
+                )
+                return await client.__aenter__()
+
+        results = await gather(
+            *(connect(username, password) for username, password in self.accounts.items()), return_exceptions=True
+        )
+        for username, result in zip(self.accounts, results):
+            if isinstance(result, BlueCurrentClient):
+                self.clients[username] = result
+            elif isinstance(result, Exception):
+                self.logger.error(f"Failed to connect {username}: {result!r}")
+                self.errors[username] = result
+            else:
+                await self.__aexit__(type(result), result, result.__traceback__)
+                raise result
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await gather(*(client.__aexit__(exc_type, exc_val, exc_tb) for client in self.clients.values()))
+        self.clients = {}
+        if self._owns_httpx_client and self.httpx_client is not None:
+            await self.httpx_client.__aexit__(exc_type, exc_val, exc_tb)
+            self.httpx_client = None
+
+    def __getitem__(self, username: str) -> BlueCurrentClient:
+        return self.clients[username]
+
+    def __iter__(self) -> Iterator[BlueCurrentClient]:
+        return iter(self.clients.values())
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    async def gather(self, function: Callable[[BlueCurrentClient], Awaitable[T]]) -> dict[str, T | Exception]:
+        """
+        Call a function for all clients concurrently.
+
+        Args:
+            function: A function that takes a BlueCurrentClient and returns an awaitable,
+                e.g. lambda client: client.get_charge_points().
+
+        Returns:
+            A dictionary mapping each username to the result of the function, or the exception it raised.
+        """
+        results = await gather(*(function(client) for client in self.clients.values()), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return dict(zip(self.clients, results))  # type: ignore
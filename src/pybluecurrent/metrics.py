@@ -0,0 +1,168 @@
+from asyncio import CancelledError, TimeoutError
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from logging import getLogger
+from math import inf
+from time import perf_counter
+from typing import Any, Callable, Iterator
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """
+    Histogram of durations in seconds, with fixed buckets like a Prometheus histogram.
+
+    counts[i] is the number of observations greater than buckets[i - 1] and at most buckets[i],
+    and the last count is the number of observations greater than the last bucket.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count, self.sum = 0, 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile, as the upper bound of the bucket it falls in.
+
+        Args:
+            q: The quantile, between 0 and 1.
+
+        Returns:
+            The upper bound of the bucket, inf if it is the last bucket, or nan if there are no observations.
+        """
+        if not self.count:
+            return float("nan")
+        rank, total = q * self.count, 0
+        for bound, count in zip((*self.buckets, inf), self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return inf
+
+
+@dataclass
+class CommandMetrics:
+    """Metrics of a single command or HTTP endpoint."""
+
+    latency: Histogram
+    requests: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    in_flight: int = 0
+    hedges: int = 0
+
+
+@dataclass
+class Metrics:
+    """
+    Latency and throughput metrics of a BlueCurrentClient.
+
+    Every websocket command (like "GET_CHARGE_POINTS") and HTTP endpoint (like "HTTP chargepointstatus") has its
+    own CommandMetrics, with a latency histogram of the requests that succeeded. Bytes are counted from the
+    websocket messages and HTTP bodies.
+
+    Callbacks are called after every request with the name of the command, its duration in seconds and its
+    outcome: "ok", "error", "timeout" or "cancelled". Use them to feed your own monitoring, for example:
+        client.metrics.callbacks.append(lambda command, duration, outcome: histogram.labels(command).observe(duration))
+
+    A Metrics object can be shared between clients to aggregate their metrics.
+    """
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    commands: dict[str, CommandMetrics] = field(default_factory=dict)
+    callbacks: list[Callable[[str, float, str], Any]] = field(default_factory=list)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    messages_sent: int = 0
+    messages_received: int = 0
+
+    def __post_init__(self):
+        self.logger = getLogger("BlueCurrentClient")
+
+    def __getitem__(self, command: str) -> CommandMetrics:
+        if command not in self.commands:
+            self.commands[command] = CommandMetrics(latency=Histogram(self.buckets))
+        return self.commands[command]
+
+    @property
+    def in_flight(self) -> int:
+        return sum(metrics.in_flight for metrics in self.commands.values())
+
+    @contextmanager
+    def measure(self, command: str) -> Iterator[None]:
+        """Measure a request of a command, from before it is sent until its reply is received."""
+        metrics = self[command]
+        metrics.requests += 1
+        metrics.in_flight += 1
+        outcome, start = "error", perf_counter()
+        try:
+            yield
+            outcome = "ok"
+        except TimeoutError:
+            outcome = "timeout"
+            metrics.timeouts += 1
+            raise
+        except CancelledError:
+            outcome = "cancelled"
+            raise
+        except BaseException:
+            metrics.errors += 1
+            raise
+        finally:
+            duration = perf_counter() - start
+            metrics.in_flight -= 1
+            if outcome == "ok":
+                metrics.latency.observe(duration)
+            for callback in self.callbacks:
+                try:
+                    callback(command, duration, outcome)
+                except Exception as e:
+                    self.logger.warning(f"Metrics callback {callback!r} failed: {e!r}")
+
+    def record_sent(self, message: str | bytes) -> None:
+        self.messages_sent += 1
+        self.bytes_sent += _size(message)
+
+    def record_received(self, message: str | bytes) -> None:
+        self.messages_received += 1
+        self.bytes_received += _size(message)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get a snapshot of the metrics as a dictionary of plain values, e.g. to log or serialize them."""
+        return {
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+            "in_flight": self.in_flight,
+            "commands": {
+                command: {
+                    "requests": metrics.requests,
+                    "errors": metrics.errors,
+                    "timeouts": metrics.timeouts,
+                    "in_flight": metrics.in_flight,
+                    "hedges": metrics.hedges,
+                    "latency": {
+                        "buckets": list(metrics.latency.buckets),
+                        "counts": list(metrics.latency.counts),
+                        "count": metrics.latency.count,
+                        "sum": metrics.latency.sum,
+                    },
+                }
+                for command, metrics in self.commands.items()
+            },
+        }
+
+
+def _size(message: str | bytes) -> int:
+    if isinstance(message, bytes) or message.isascii():
+        return len(message)
+    return len(message.encode())
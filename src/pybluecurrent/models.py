@@ -0,0 +1,153 @@
+from dataclasses import Field, dataclass, fields
+from datetime import date, datetime
+from typing import Any, ClassVar, TypeVar
+
+M = TypeVar("M", bound="Model")
+
+
+class Model:
+    """
+    Base class of the typed results returned by a BlueCurrentClient with models=True.
+
+    Models are frozen dataclasses with slots, which take far less memory than the dictionaries they are parsed from.
+    Keys of the response that are not a field of the model are ignored.
+    """
+
+    __slots__ = ()
+    __dataclass_fields__: ClassVar[dict[str, Field[Any]]]  # Set by @dataclass on every model.
+    _nested: ClassVar[dict[str, type["Model"]]] = {}
+
+    @classmethod
+    def from_dict(cls: type[M], source: dict[str, Any]) -> M:
+        """Parse a model from a dictionary in the response of the API."""
+        names = _field_names.get(cls) or _field_names.setdefault(cls, frozenset(f.name for f in fields(cls)))
+        values = {key: value for key, value in source.items() if key in names}
+        for key, model in cls._nested.items():
+            if isinstance(values.get(key), dict):
+                values[key] = model.from_dict(values[key]) if values[key] else None
+        return cls(**values)
+
+
+_field_names: dict[type, frozenset[str]] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class Setting(Model):
+    value: Any = None
+    permission: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Card(Model):
+    uid: str | None = None
+    id: str | None = None
+    name: str | None = None
+    customer_name: str | None = None
+    valid: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ChargeCard(Model):
+    uid: str | None = None
+    id: str | None = None
+    name: str | None = None
+    customer_name: str | None = None
+    valid: int | None = None
+    date_created: date | None = None
+    date_modified: date | None = None
+    date_became_invalid: date | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Tariff(Model):
+    tariff_id: str | None = None
+    price_ex_vat: float | None = None
+    start_price_ex_vat: float | None = None
+    price_in_vat: float | None = None
+    start_price_in_vat: float | None = None
+    currency: str | None = None
+    vat_percentage: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Location(Model):
+    x_coord: float | None = None
+    y_coord: float | None = None
+    street: str | None = None
+    housenumber: str | None = None
+    zipcode: str | None = None
+    city: str | None = None
+    country: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ChargePoint(Model):
+    evse_id: str
+    name: str | None = None
+    model_type: str | None = None
+    chargepoint_type: str | None = None
+    is_cable: bool | None = None
+    public_charging: Setting | None = None
+    default_card: Card | None = None
+    preferred_card: Card | None = None
+    plug_and_charge_card: Card | None = None
+    tariff: Tariff | None = None
+    plug_and_charge_notification: bool | None = None
+    plug_and_charge: Setting | None = None
+    led_interaction: Setting | None = None
+    publish_location: Setting | None = None
+    smart_charging: bool | None = None
+    smart_charging_dynamic: bool | None = None
+    activity: str | None = None
+    location: Location | None = None
+    delayed_charging: Setting | None = None
+    _nested: ClassVar[dict[str, type[Model]]] = {
+        "public_charging": Setting,
+        "default_card": Card,
+        "preferred_card": Card,
+        "plug_and_charge_card": Card,
+        "tariff": Tariff,
+        "plug_and_charge": Setting,
+        "led_interaction": Setting,
+        "publish_location": Setting,
+        "location": Location,
+        "delayed_charging": Setting,
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class ChargePointStatus(Model):
+    evse_id: str
+    activity: str | None = None
+    actual_p1: float | None = None
+    actual_p2: float | None = None
+    actual_p3: float | None = None
+    actual_v1: float | None = None
+    actual_v2: float | None = None
+    actual_v3: float | None = None
+    actual_kwh: float | None = None
+    max_usage: int | None = None
+    smartcharging_max_usage: int | None = None
+    max_offline: int | None = None
+    offline_since: str | None = None
+    start_datetime: datetime | None = None
+    stop_datetime: datetime | None = None
+    total_cost: float | None = None
+    vehicle_status: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Transaction(Model):
+    transaction_id: int
+    chargepoint_id: str | None = None
+    chargepoint_type: str | None = None
+    evse_name: str | None = None
+    started_at: datetime | None = None
+    end_time: datetime | None = None
+    kwh: float | None = None
+    card_id: str | None = None
+    card_name: str | None = None
+    total_costs: float | None = None
+    total_costs_ex_vat: float | None = None
+    vat: float | None = None
+    currency: str | None = None
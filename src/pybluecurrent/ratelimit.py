@@ -0,0 +1,55 @@
+from asyncio import Lock, sleep
+from time import monotonic
+
+
+class RateLimiter:
+    """
+    Token bucket that limits how often something happens, e.g. sending commands.
+
+    Tokens are added at a constant rate, up to burst tokens. Every acquire takes a token, waiting for one if the
+    bucket is empty. Waiters are served in the order they called acquire.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Number of tokens added per second.
+            burst: Maximum number of tokens in the bucket, i.e. how many can be acquired at once
+                after a quiet period. Defaults to 1.
+        """
+        if rate <= 0:
+            raise ValueError("The rate must be positive.")
+        self.rate, self.burst = rate, burst
+        self._lock = Lock()
+        self._tokens, self._updated = float(burst), monotonic()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await sleep((1 - self._tokens) / self.rate)
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right away and nobody is waiting for one, without waiting."""
+        if self._lock.locked():
+            return False
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
@@ -0,0 +1,180 @@
+import gzip
+from asyncio import sleep
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from struct import Struct
+from threading import Event, Thread
+from time import monotonic
+from typing import TYPE_CHECKING, Iterator, NamedTuple
+
+if TYPE_CHECKING:
+    from pybluecurrent.client import BlueCurrentClient
+
+# Every record is a header (kind, monotonic timestamp, length of the payload) followed by the payload.
+HEADER = Struct("<BdI")
+SESSION, TEXT, BINARY = 0, 1, 2
+
+
+class Frame(NamedTuple):
+    """A recorded websocket frame, with the monotonic time it was received and the session it belongs to."""
+
+    timestamp: float
+    data: str | bytes
+    session: int
+
+
+class FrameRecorder:
+    """
+    Record the websocket frames received by a BlueCurrentClient in a compressed, append-only file.
+
+    The file is opened and the frames are written by a background thread, so recording does not block the event loop.
+    If the thread cannot keep up and max_pending frames are waiting, new frames are dropped and counted in dropped.
+
+    Every time the recorder is started, it appends a new session to the file: a gzip member that starts with
+    the wall-clock time, followed by the frames with their monotonic timestamps. A file that was cut off,
+    e.g. because the process was killed, can be read up to the last complete frame.
+
+    For example:
+        with FrameRecorder("frames.gz") as recorder:
+            async with BlueCurrentClient(username, password, recorder=recorder) as client:
+                ...
+    """
+
+    def __init__(
+        self, path: str | Path, compresslevel: int = 6, max_pending: int = 100_000, flush_interval: float = 1.0
+    ):
+        """
+        Args:
+            path: The file to append the frames to.
+            compresslevel: The gzip compression level, from 1 (fastest) to 9 (smallest). Defaults to 6.
+            max_pending: Maximum number of frames waiting to be written. Defaults to 100000.
+            flush_interval: Seconds between flushes of the file while frames are received. Defaults to 1.
+        """
+        self.path = Path(path)
+        self.compresslevel, self.flush_interval = compresslevel, flush_interval
+        self.max_pending = max_pending
+        self.frames, self.dropped = 0, 0
+        self._pending: deque[tuple[float, str | bytes]] = deque()
+        self._closing = Event()
+        self._thread: Thread | None = None
+
+    def __enter__(self) -> "FrameRecorder":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self) -> None:
+        """Start a new session, and open the file and write frames in the background."""
+        if self._thread is not None:
+            return
+        started = datetime.now(timezone.utc).isoformat().encode()
+        session = HEADER.pack(SESSION, monotonic(), len(started)) + started
+        self._thread = Thread(target=self._write, args=(session,), name="FrameRecorder", daemon=True)
+        self._thread.start()
+
+    def record(self, frame: str | bytes) -> None:
+        """Record a frame, without waiting for it to be written. The recorder is started if it is not yet."""
+        if self._thread is None:
+            self.start()
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((monotonic(), frame))
+        self.frames += 1
+
+    def close(self) -> None:
+        """Write the frames that are waiting, and close the file."""
+        if self._thread is None:
+            return
+        self._closing.set()
+        self._thread.join()
+        self._thread = None
+        self._closing.clear()
+
+    def _write(self, session: bytes) -> None:
+        """Write the pending frames in chunks, so the thread takes the GIL as little as possible."""
+        pending, flushed, dirty = self._pending, monotonic(), False
+        with gzip.open(self.path, "ab", compresslevel=self.compresslevel) as file:
+            file.write(session)
+            while True:
+                closing = self._closing.wait(timeout=0.05)
+                chunk: list[bytes] = []
+                while pending:
+                    timestamp, frame = pending.popleft()
+                    if isinstance(frame, str):
+                        kind, frame = TEXT, frame.encode()
+                    else:
+                        kind = BINARY
+                    chunk += (HEADER.pack(kind, timestamp, len(frame)), frame)
+                if chunk:
+                    file.write(b"".join(chunk))
+                    dirty = True
+                if closing:
+                    return
+                if dirty and monotonic() - flushed >= self.flush_interval:
+                    file.flush()
+                    flushed, dirty = monotonic(), False
+
+
+def read_frames(path: str | Path) -> Iterator[Frame]:
+    """
+    Read the frames recorded by a FrameRecorder.
+
+    Args:
+        path: The file.
+
+    Returns:
+        An iterator of frames, in the order they were recorded. A frame that was cut off is skipped.
+    """
+    session, buffer, offset = -1, b"", 0
+    with gzip.open(path, "rb") as file:
+        while True:
+            try:
+                chunk = file.read1(1 << 20)
+            except EOFError:
+                return  # The file was cut off.
+            if not chunk:
+                return
+            buffer, offset = buffer[offset:] + chunk, 0
+            while offset + HEADER.size <= len(buffer):
+                kind, timestamp, length = HEADER.unpack_from(buffer, offset)
+                end = offset + HEADER.size + length
+                if end > len(buffer):
+                    break
+                payload, offset = buffer[offset + HEADER.size : end], end
+                if kind == SESSION:
+                    session += 1
+                else:
+                    yield Frame(timestamp, payload.decode() if kind == TEXT else payload, session)
+
+
+async def replay(client: "BlueCurrentClient", path: str | Path, speed: float | None = 1.0) -> int:
+    """
+    Feed recorded frames to a client, as if they were received over its websocket.
+
+    The frames are dispatched to waiting requests and put on client.queue, so stream_status and other
+    subscribers receive them. The client does not need to be connected.
+
+    Args:
+        client: The client.
+        path: A file recorded by a FrameRecorder.
+        speed: How fast to replay the frames: 1 is in real time, 2 is twice as fast. Defaults to 1.
+            None replays them as fast as possible.
+
+    Returns:
+        The number of frames replayed.
+    """
+    n, session, offset = 0, None, 0.0
+    for frame in read_frames(path):
+        if speed is not None:
+            if frame.session != session:
+                session, offset = frame.session, monotonic() - frame.timestamp / speed
+            delay = offset + frame.timestamp / speed - monotonic()
+            if delay > 0:
+                await sleep(delay)
+        await client._process(frame.data)
+        n += 1
+    return n
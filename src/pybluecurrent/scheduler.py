@@ -0,0 +1,122 @@
+from asyncio import Event, Future, Task, create_task, get_running_loop
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Literal
+
+from pybluecurrent.exceptions import ConnectionLost
+from pybluecurrent.ratelimit import RateLimiter
+
+Priority = Literal["control", "interactive", "bulk"]
+PRIORITIES: tuple[Priority, ...] = ("control", "interactive", "bulk")
+
+
+class SendScheduler:
+    """
+    Send messages in order of priority, fairly between charge points, and optionally at a limited rate.
+
+    Messages are sent right away while nothing else is being sent or waiting. Otherwise they wait in a queue
+    per priority: control messages (e.g. SET_INOPERATIVE) go before interactive ones (e.g. GET_CH_SETTINGS),
+    which go before bulk ones (e.g. the reads of a fleet snapshot). Within a priority, the charge points take
+    turns, so one charge point with many messages does not delay the others.
+    """
+
+    def __init__(self, send: Callable[[Any], Awaitable[None]], rate: float | None = None, burst: int = 1):
+        """
+        Args:
+            send: The coroutine function that sends a message.
+            rate: Maximum number of messages to send per second. Defaults to None, which means no limit.
+            burst: Number of messages that can be sent at once after a quiet period, if the rate is limited.
+                Defaults to 1.
+        """
+        self.send = send
+        self.limiter = None if rate is None else RateLimiter(rate, burst=burst)
+        self.sent: dict[Priority, int] = {priority: 0 for priority in PRIORITIES}
+        self._queues: dict[Priority, OrderedDict[str | None, deque[tuple[Any, Future]]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._waiting, self._sending = 0, False
+        self._ready = Event()
+        self._worker: Task | None = None
+
+    def __len__(self) -> int:
+        """The number of messages waiting to be sent."""
+        return self._waiting
+
+    async def submit(self, message: Any, priority: Priority = "interactive", key: str | None = None) -> None:
+        """
+        Send a message, waiting for its turn.
+
+        Args:
+            message: The message.
+            priority: "control", "interactive" or "bulk". Defaults to "interactive".
+            key: What to queue fairly on, e.g. the evse_id. Defaults to None.
+        """
+        if not self._waiting and not self._sending and (self.limiter is None or self.limiter.try_acquire()):
+            await self._send(message, priority)
+            return
+        future = get_running_loop().create_future()
+        self._queues[priority].setdefault(key, deque()).append((message, future))
+        self._waiting += 1
+        self._ready.set()
+        if self._worker is None or self._worker.done():
+            self._worker = create_task(self._work())
+        await future
+
+    def close(self) -> None:
+        """Stop sending, and fail the messages that are waiting with ConnectionLost."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for queues in self._queues.values():
+            for queue in queues.values():
+                for _, future in queue:
+                    if not future.done():
+                        future.set_exception(ConnectionLost("The websocket connection was closed."))
+            queues.clear()
+        self._waiting = 0
+
+    async def _send(self, message: Any, priority: Priority) -> None:
+        self._sending = True
+        try:
+            await self.send(message)
+            self.sent[priority] += 1
+        finally:
+            self._sending = False
+            if self._waiting:
+                self._ready.set()
+
+    async def _work(self) -> None:
+        while True:
+            while not self._waiting or self._sending:
+                self._ready.clear()
+                await self._ready.wait()
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            message, future, priority = self._next()
+            if future.cancelled():
+                continue
+            try:
+                await self._send(message, priority)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            except BaseException:
+                if not future.done():
+                    future.set_exception(ConnectionLost("The websocket connection was closed."))
+                raise
+            else:
+                if not future.done():
+                    future.set_result(None)
+
+    def _next(self) -> tuple[Any, Future, Priority]:
+        """Take the next message: of the highest priority, from the charge point whose turn it is."""
+        for priority, queues in self._queues.items():
+            if queues:
+                key, queue = next(iter(queues.items()))
+                message, future = queue.popleft()
+                if queue:
+                    queues.move_to_end(key)
+                else:
+                    del queues[key]
+                self._waiting -= 1
+                return message, future, priority
+        raise RuntimeError("There are no messages waiting.")
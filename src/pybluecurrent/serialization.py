@@ -0,0 +1,96 @@
+import json
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
+from typing import Any
+
+
+class Serializer(ABC):
+    """
+    Encoder and decoder of the JSON messages sent to and received from BlueCurrent.
+
+    Messages are always encoded to str, because the websocket server expects text frames.
+    """
+
+    name: str
+
+    @abstractmethod
+    def dumps(self, data: Any) -> str:
+        """Encode data to a JSON string."""
+
+    @abstractmethod
+    def loads(self, message: str | bytes) -> Any:
+        """Decode a JSON string or bytes."""
+
+
+class JSONSerializer(Serializer):
+    """Serializer using the json module of the standard library."""
+
+    name = "json"
+
+    def dumps(self, data: Any) -> str:
+        return json.dumps(data, ensure_ascii=False)
+
+    def loads(self, message: str | bytes) -> Any:
+        return json.loads(message)
+
+
+class OrjsonSerializer(Serializer):
+    """Serializer using orjson, which is several times faster than json: pip install orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps, self._loads = orjson.dumps, orjson.loads
+
+    def dumps(self, data: Any) -> str:
+        return self._dumps(data).decode()
+
+    def loads(self, message: str | bytes) -> Any:
+        return self._loads(message)
+
+
+class MsgspecSerializer(Serializer):
+    """Serializer using msgspec, which is several times faster than json: pip install msgspec."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        from msgspec import json as msgspec_json
+
+        self._encode, self._decode = msgspec_json.encode, msgspec_json.decode
+
+    def dumps(self, data: Any) -> str:
+        return self._encode(data).decode()
+
+    def loads(self, message: str | bytes) -> Any:
+        return self._decode(message)
+
+
+SERIALIZERS: dict[str, type[Serializer]] = {
+    "orjson": OrjsonSerializer,
+    "msgspec": MsgspecSerializer,
+    "json": JSONSerializer,
+}
+
+
+def get_serializer(name: str | None = None) -> Serializer:
+    """
+    Get a serializer by name, or the fastest one that is installed.
+
+    Args:
+        name: One of "orjson", "msgspec" or "json". Defaults to None, which means orjson if it is installed,
+            else msgspec if it is installed, else json.
+
+    Returns:
+        A Serializer.
+    """
+    if name is not None:
+        if name not in SERIALIZERS:
+            raise ValueError(f"Unknown serializer: {name!r}. Use one of {', '.join(SERIALIZERS)}.")
+        return SERIALIZERS[name]()
+    for candidate in ("orjson", "msgspec"):
+        if find_spec(candidate) is not None:
+            return SERIALIZERS[candidate]()
+    return JSONSerializer()
@@ -0,0 +1,339 @@
+from asyncio import Task, create_task, gather, sleep
+from datetime import datetime, timedelta
+from json import dumps, loads
+from typing import Any
+
+from httpx import AsyncClient, MockTransport, Request, Response
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from pybluecurrent.client import BlueCurrentClient
+
+
+class MockBlueCurrent:
+    """
+    A local stand-in for the BlueCurrent websocket and HTTP APIs, for tests and benchmarks without an account.
+
+    The websocket server runs on localhost and answers the commands of BlueCurrentClient, including logging in,
+    the GET_ commands, the SET_ commands and the flows of commands like SOFT_RESET. The HTTP endpoints are
+    served in-process through an httpx transport. Both answer after the configured latency.
+
+    For example:
+        async with MockBlueCurrent(n_charge_points=100, latency=0.05) as server:
+            async with server.client() as client:
+                snapshot = await client.get_fleet_snapshot()
+
+    Any username and password are accepted.
+    """
+
+    api_url: str = "http://bluecurrent.mock/api/v2.0"
+
+    def __init__(
+        self,
+        n_charge_points: int = 10,
+        n_transactions: int = 100,
+        per_page: int = 25,
+        latency: float = 0.0,
+        http_latency: float | None = None,
+    ):
+        """
+        Args:
+            n_charge_points: The number of charge points of every account. Defaults to 10.
+            n_transactions: The number of transactions of every charge point. Defaults to 100.
+            per_page: The number of transactions per page. Defaults to 25.
+            latency: Seconds to wait before answering a websocket command. Defaults to 0.
+            http_latency: Seconds to wait before answering an HTTP request. Defaults to None, which means latency.
+        """
+        self.evse_ids = [f"BCU{i:06}" for i in range(n_charge_points)]
+        self._index = {evse_id: i for i, evse_id in enumerate(self.evse_ids)}
+        self.n_transactions, self.per_page = n_transactions, per_page
+        self.latency = latency
+        self.http_latency = latency if http_latency is None else http_latency
+        self.commands: dict[str, int] = {}
+        self.connections: list[ServerConnection] = []
+        self.enabled: dict[str, bool] = {evse_id: True for evse_id in self.evse_ids}
+        self.server: Server | None = None
+        self.tokens: set[str] = set()
+        self._httpx_clients: list[AsyncClient] = []
+        self._pages: dict[tuple[tuple[str, ...], bool], list[dict[str, Any]]] = {}
+        self._subscriptions: dict[ServerConnection, set[str]] = {}
+        self._tasks: set[Task] = set()
+
+    async def __aenter__(self) -> "MockBlueCurrent":
+        self.server = await serve(self._serve, "localhost", 0)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        for task in self._tasks:
+            task.cancel()
+        await gather(*(client.aclose() for client in self._httpx_clients))
+        self._httpx_clients = []
+
+    @property
+    def socket_url(self) -> str:
+        if self.server is None:
+            raise RuntimeError(f"{self.__class__.__name__} is not running.")
+        return f"ws://localhost:{list(self.server.sockets)[0].getsockname()[1]}"
+
+    def transport(self) -> MockTransport:
+        """Get an httpx transport that serves the HTTP endpoints."""
+        return MockTransport(self._handle_http)
+
+    def client(self, username: str = "username", password: str = "password", **kwargs: Any) -> BlueCurrentClient:
+        """
+        Create a BlueCurrentClient that connects to this server.
+
+        Args:
+            username: Any username. Defaults to "username".
+            password: Any password. Defaults to "password".
+            **kwargs: Other arguments for BlueCurrentClient.
+
+        Returns:
+            A BlueCurrentClient that is not connected yet.
+        """
+        if "httpx_client" not in kwargs:
+            kwargs["httpx_client"] = AsyncClient(transport=self.transport())
+            self._httpx_clients.append(kwargs["httpx_client"])
+        client = BlueCurrentClient(username, password, **kwargs)
+        client.api_url, client.socket_url = self.api_url, self.socket_url
+        return client
+
+    async def push_status(self, evse_id: str, **changes: Any) -> int:
+        """
+        Push a status update to all connections that subscribed to the charge point with GET_CH_STATUS.
+
+        Args:
+            evse_id: A charge point ID.
+            **changes: The fields of the status that changed, e.g. activity="charging".
+
+        Returns:
+            The number of connections the update was sent to.
+        """
+        message = dumps({"object": "CH_STATUS", "data": dict(changes, evse_id=evse_id)})
+        connections = [connection for connection, evse_ids in self._subscriptions.items() if evse_id in evse_ids]
+        await gather(*(connection.send(message) for connection in connections), return_exceptions=True)
+        return len(connections)
+
+    def subscribers(self, evse_id: str) -> int:
+        """Get the number of connections that subscribed to the status of a charge point."""
+        return sum(evse_id in evse_ids for evse_ids in self._subscriptions.values())
+
+    def status(self, evse_id: str) -> dict[str, Any]:
+        i = self._index[evse_id]
+        return {
+            "evse_id": evse_id,
+            "activity": "charging" if i % 3 == 0 else "available" if self.enabled[evse_id] else "unavailable",
+            "actual_p1": 16.0 if i % 3 == 0 else 0,
+            "actual_p2": 16.0 if i % 3 == 0 else 0,
+            "actual_p3": 16.0 if i % 3 == 0 else 0,
+            "actual_v1": 230,
+            "actual_v2": 230,
+            "actual_v3": 230,
+            "actual_kwh": i % 50,
+            "max_usage": 20,
+            "smartcharging_max_usage": 6,
+            "max_offline": 10,
+            "offline_since": "",
+            "start_datetime": "20230724 15:25:33",
+            "stop_datetime": "" if i % 3 == 0 else "20230724 18:25:33",
+            "total_cost": 9.93,
+            "vehicle_status": "C" if i % 3 == 0 else "A",
+        }
+
+    def charge_point(self, evse_id: str) -> dict[str, Any]:
+        card = {"uid": "A1B2C3D4E5F6", "id": "NL-ABC-123456-0", "name": "Card", "customer_name": "Name", "valid": 1}
+        return {
+            "evse_id": evse_id,
+            "name": f"Charge point {evse_id}",
+            "model_type": "H:MOVE-C32T2",
+            "chargepoint_type": "HIDDEN",
+            "is_cable": True,
+            "public_charging": {"value": False, "permission": "write"},
+            "default_card": card,
+            "preferred_card": card,
+            "plug_and_charge_card": card,
+            "tariff": {
+                "tariff_id": "NLBCUT58",
+                "price_ex_vat": 0.2,
+                "start_price_ex_vat": 0,
+                "price_in_vat": 0.242,
+                "start_price_in_vat": 0,
+                "currency": "EUR",
+                "vat_percentage": 21,
+            },
+            "plug_and_charge_notification": False,
+            "plug_and_charge": {"value": True, "permission": "write"},
+            "led_interaction": {"value": False, "permission": "read"},
+            "publish_location": {"value": False, "permission": "write"},
+            "smart_charging": True,
+            "smart_charging_dynamic": True,
+            "activity": self.status(evse_id)["activity"],
+            "location": {
+                "x_coord": 52.0907,
+                "y_coord": 5.1214,
+                "street": "Europalaan",
+                "housenumber": "100",
+                "zipcode": "3526KS",
+                "city": "Utrecht",
+                "country": "NL",
+            },
+            "delayed_charging": {"value": False, "permission": "none"},
+        }
+
+    def transactions(self, evse_id: str) -> list[dict[str, Any]]:
+        """Get the transactions of a charge point, oldest first."""
+        i = self._index[evse_id]
+        start = datetime(2020, 1, 1)
+        transactions = []
+        for j in range(self.n_transactions):
+            started_at = start + timedelta(hours=13 * j, minutes=i % 60)
+            transactions.append(
+                {
+                    "transaction_id": i * self.n_transactions + j + 1,
+                    "chargepoint_id": evse_id,
+                    "chargepoint_type": "HIDDEN",
+                    "evse_name": f"Charge point {evse_id}",
+                    "started_at": started_at.strftime("%d-%m-%Y %H:%M:%S"),
+                    "end_time": (started_at + timedelta(hours=2)).strftime("%d-%m-%Y %H:%M:%S"),
+                    "kwh": 10.0 + j % 7,
+                    "card_id": "NL-ABC-123456-0" if j % 2 else "NL-ABC-234567-0",
+                    "card_name": "Card",
+                    "total_costs": 2.5 + j % 7 * 0.25,
+                    "total_costs_ex_vat": 2.07 + j % 7 * 0.21,
+                    "vat": 21,
+                    "currency": "EUR",
+                }
+            )
+        return transactions
+
+    async def _serve(self, websocket: ServerConnection) -> None:
+        self.connections.append(websocket)
+        self._subscriptions[websocket] = set()
+        try:
+            async for message in websocket:
+                # Answer every command concurrently, like the real server.
+                task = create_task(self._answer(websocket, loads(message)))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            del self._subscriptions[websocket]
+
+    async def _answer(self, websocket: ServerConnection, message: dict[str, Any]) -> None:
+        command = message.get("command", "")
+        self.commands[command] = self.commands.get(command, 0) + 1
+        if self.latency:
+            await sleep(self.latency)
+        try:
+            for reply in self._reply(websocket, command, message):
+                await websocket.send(dumps(reply))
+        except ConnectionClosed:
+            pass
+
+    def _reply(self, websocket: ServerConnection, command: str, message: dict[str, Any]) -> list[dict[str, Any]]:
+        evse_id = message.get("evse_id")
+        if command == "VALIDATE_PASSWORD":
+            token = f"token-{message.get('username')}"
+            self.tokens.add(token)
+            return [{"object": "STATUS_PASSWORD", "accepted": True, "token": token}]
+        if message.get("Authorization", "").removeprefix("Token ") not in self.tokens:
+            return [{"object": "ERROR", "error": 0, "message": "Unauthorized"}]
+        if evse_id is not None and evse_id not in self._index:
+            return [{"object": "ERROR", "evse_id": evse_id, "error": 42, "message": "Unknown charge point"}]
+        if command == "HELLO":
+            return [{"object": "HELLO"}]
+        if command == "GET_ACCOUNT":
+            return [
+                {
+                    "object": "ACCOUNT",
+                    "full_name": "Your Full Name",
+                    "email": "your@email.address",
+                    "login": "your@email.address",
+                    "should_reset_password": False,
+                    "developer_mode_enabled": False,
+                    "tel": "",
+                    "marketing_target": "bluecurrent",
+                    "first_login_app": "01-JAN-20",
+                    "hubspot_user_identity": "identity",
+                }
+            ]
+        if command == "GET_CHARGE_CARDS":
+            card = {"uid": "A1B2C3D4E5F6", "id": "NL-ABC-123456-0", "name": "Card", "customer_name": "Name"}
+            return [
+                {
+                    "object": "CHARGE_CARDS",
+                    "cards": [
+                        dict(
+                            card, valid=1, date_created="2023-06-27", date_modified="2023-07-11", date_became_invalid=""
+                        )
+                    ],
+                }
+            ]
+        if command == "GET_CHARGE_POINTS":
+            return [{"object": "CHARGE_POINTS", "data": [self.charge_point(e) for e in self.evse_ids]}]
+        if command == "GET_CH_SETTINGS":
+            settings = self.charge_point(evse_id)  # type: ignore
+            for key in ("activity", "location", "tariff", "is_cable"):
+                del settings[key]
+            return [{"object": "CH_SETTINGS", "data": settings}]
+        if command == "GET_GRID_STATUS":
+            grid = {"id": f"GRID-{evse_id}", "grid_actual_p1": 1, "grid_actual_p2": 2, "grid_actual_p3": 3}
+            return [{"object": "GRID_STATUS", "data": dict(grid, grid_max_install=25)}]
+        if command == "GET_SUSTAINABILITY_STATUS":
+            return [{"object": "SUSTAINABILITY_STATUS", "trees": 1, "co2": 12.345}]
+        if command == "GET_CH_STATUS":
+            self._subscriptions[websocket].add(evse_id)  # type: ignore
+            return [{"object": "CH_STATUS", "data": self.status(evse_id)}]  # type: ignore
+        if command == "SET_PLUG_AND_CHARGE_CHARGE_CARD":
+            return [{"object": "STATUS_SET_PLUG_AND_CHARGE_CHARGE_CARD", "evse_id": evse_id, "success": True}]
+        if command in ("SET_OPERATIVE", "SET_INOPERATIVE", "UNLOCK_CONNECTOR", "SOFT_RESET"):
+            if command in ("SET_OPERATIVE", "SET_INOPERATIVE"):
+                self.enabled[evse_id] = command == "SET_OPERATIVE"  # type: ignore
+            flow_id = message.get("flow_id")
+            return [
+                {"object": f"RECEIVED_{command}", "evse_id": evse_id, "flow_id": flow_id, "success": True},
+                {"object": f"STATUS_{command}", "flow_id": flow_id, "data": {"evse_id": evse_id}, "success": True},
+            ]
+        return [{"object": "ERROR", "error": 1, "message": f"Unknown command {command}"}]
+
+    async def _handle_http(self, request: Request) -> Response:
+        if self.http_latency:
+            await sleep(self.http_latency)
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        self.commands[f"HTTP {endpoint}"] = self.commands.get(f"HTTP {endpoint}", 0) + 1
+        if request.headers.get("Authorization", "").removeprefix("Token ") not in self.tokens:
+            return Response(401, json={"detail": "Invalid token."})
+        if endpoint == "chargepointstatus":
+            evse_id = request.url.params.get("evse_id")
+            if evse_id not in self._index:
+                return Response(404, json={"detail": "Not found."})
+            return Response(200, json={"data": self.status(evse_id)})  # type: ignore
+        if endpoint == "gettransactions":
+            return Response(200, json={"data": self._transactions_page(request)})
+        if endpoint == "getcontracts":
+            contract = {"contract_id": "BCU12345678", "contact_email": "your@email.address"}
+            return Response(200, json={"contracts": [dict(contract, subscription_type="BASIS")]})
+        if endpoint == "getgrids":
+            return Response(200, json={"grids": [{"id": f"GRID-{e}", "smart_charging": True} for e in self.evse_ids]})
+        return Response(404, json={"detail": "Not found."})
+
+    def _transactions_page(self, request: Request) -> dict[str, Any]:
+        evse_ids = tuple(c["chargepoint_id"] for c in loads(request.content)["chargepoints"])
+        descending = request.url.params.get("sort_field_order") == "DESC"
+        if (evse_ids, descending) not in self._pages:
+            transactions = [tx for evse_id in evse_ids if evse_id in self._index for tx in self.transactions(evse_id)]
+            transactions.sort(key=lambda tx: datetime.strptime(tx["end_time"], "%d-%m-%Y %H:%M:%S"), reverse=descending)
+            self._pages[evse_ids, descending] = transactions
+        transactions = self._pages[evse_ids, descending]
+        page = int(request.url.params.get("page", 1))
+        total_pages = max(1, -(-len(transactions) // self.per_page))
+        return {
+            "current_page": page,
+            "next_page": page + 1 if page < total_pages else None,
+            "max_per_page": self.per_page,
+            "total_pages": total_pages,
+            "transactions": transactions[(page - 1) * self.per_page : page * self.per_page],
+        }
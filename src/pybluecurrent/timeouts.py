@@ -0,0 +1,71 @@
+from collections import deque
+from dataclasses import dataclass, field
+from math import inf
+
+
+@dataclass(eq=False)
+class AdaptiveTimeouts:
+    """
+    Derive the timeouts of websocket commands from their recent latencies.
+
+    The timeout of a command is a multiple of a high quantile of the latencies of its last requests, but never
+    more than the fixed timeout of the command. Requests that timed out count as infinitely slow, so when more
+    requests time out than the quantile allows for, the fixed timeout applies again until they succeed.
+
+    If hedge_quantile is set, GET_ commands are sent again when their reply takes longer than that quantile
+    of their latencies. The first reply to either is returned.
+
+    For example:
+        client = BlueCurrentClient(username, password, timeouts=AdaptiveTimeouts(hedge_quantile=0.95))
+
+    The latencies are recorded as a callback of the Metrics of the client.
+    """
+
+    quantile: float = 0.99
+    multiplier: float = 3.0
+    minimum: float = 1.0
+    window: int = 200
+    min_samples: int = 20
+    hedge_quantile: float | None = None
+    latencies: dict[str, deque[float]] = field(default_factory=dict, repr=False)
+
+    def __call__(self, command: str, duration: float, outcome: str) -> None:
+        if outcome == "ok":
+            latency = duration
+        elif outcome == "timeout":
+            latency = inf
+        else:
+            return
+        if command not in self.latencies:
+            self.latencies[command] = deque(maxlen=self.window)
+        self.latencies[command].append(latency)
+
+    def percentile(self, command: str, q: float) -> float | None:
+        """
+        Get a quantile of the recent latencies of a command.
+
+        Args:
+            command: The command, e.g. "GET_CH_SETTINGS".
+            q: The quantile, between 0 and 1.
+
+        Returns:
+            The latency in seconds, or None if fewer than min_samples requests have been recorded.
+        """
+        latencies = self.latencies.get(command)
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self, command: str, default: float) -> float:
+        """Get the timeout of a command, which is at most its default timeout."""
+        latency = self.percentile(command, self.quantile)
+        if latency is None:
+            return default
+        return min(default, max(self.minimum, self.multiplier * latency))
+
+    def hedge_delay(self, command: str) -> float | None:
+        """Get the delay after which a command is sent again, or None if it should not be sent again."""
+        if self.hedge_quantile is None or not command.startswith("GET_"):
+            return None
+        return self.percentile(command, self.hedge_quantile)
@@ -0,0 +1,79 @@
+from abc import ABC, abstractmethod
+from json import dumps, loads
+from os import chmod, replace
+from pathlib import Path
+from typing import Callable
+
+
+class TokenStore(ABC):
+    """
+    Store for the authentication tokens of BlueCurrent accounts, by username.
+
+    A BlueCurrentClient with a token store loads the token of its account when it connects, and only logs in
+    if there is none or if the server rejects it. The token is saved after every login.
+    """
+
+    @abstractmethod
+    def load(self, username: str) -> str | None:
+        """Get the token for the username, or None if there is none."""
+
+    @abstractmethod
+    def save(self, username: str, token: str | None) -> None:
+        """Store the token for the username. A token of None removes it."""
+
+
+class MemoryTokenStore(TokenStore):
+    """Keep tokens in memory, e.g. to share them between clients in the same process."""
+
+    def __init__(self):
+        self.tokens: dict[str, str] = {}
+
+    def load(self, username: str) -> str | None:
+        return self.tokens.get(username)
+
+    def save(self, username: str, token: str | None) -> None:
+        if token is None:
+            self.tokens.pop(username, None)
+        else:
+            self.tokens[username] = token
+
+
+class FileTokenStore(TokenStore):
+    """Keep tokens in a JSON file that is only readable by its owner. The file is replaced atomically."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def load(self, username: str) -> str | None:
+        return self._read().get(username)
+
+    def save(self, username: str, token: str | None) -> None:
+        tokens = self._read()
+        if token is None:
+            tokens.pop(username, None)
+        else:
+            tokens[username] = token
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        temporary.touch(mode=0o600)
+        chmod(temporary, 0o600)
+        temporary.write_text(dumps(tokens, indent=2, sort_keys=True))
+        replace(temporary, self.path)
+
+    def _read(self) -> dict[str, str]:
+        try:
+            return loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+
+
+class CallableTokenStore(TokenStore):
+    """Load and save tokens with your own functions, e.g. to keep them in a secret manager."""
+
+    def __init__(self, load: Callable[[str], str | None], save: Callable[[str, str | None], None]):
+        self._load, self._save = load, save
+
+    def load(self, username: str) -> str | None:
+        return self._load(username)
+
+    def save(self, username: str, token: str | None) -> None:
+        self._save(username, token)
@@ -0,0 +1,188 @@
+import sqlite3
+from asyncio import gather
+from contextlib import aclosing
+from datetime import datetime
+from pathlib import Path
+from time import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pybluecurrent.client import BlueCurrentClient
+
+
+COLUMNS: dict[str, str] = {
+    "transaction_id": "INTEGER PRIMARY KEY",
+    "chargepoint_id": "TEXT",
+    "chargepoint_type": "TEXT",
+    "evse_name": "TEXT",
+    "started_at": "TEXT",
+    "end_time": "TEXT",
+    "kwh": "REAL",
+    "card_id": "TEXT",
+    "card_name": "TEXT",
+    "total_costs": "REAL",
+    "total_costs_ex_vat": "REAL",
+    "vat": "REAL",
+    "currency": "TEXT",
+}
+
+
+class TransactionCache:
+    """
+    Cache transactions in a SQLite database, and answer queries from it.
+
+    Before answering a query, the transactions of the charge points involved are synced if they have not been synced
+    for max_age seconds. Syncing only fetches the pages with transactions that stopped at or after the newest cached
+    one. Transactions are listed by the time they stopped, so the end time is kept, not the newest transaction ID.
+
+    For example:
+        async with client:
+            cache = TransactionCache(client, "transactions.db")
+            kwh = await cache.kwh_per_card("BCU123456")
+    """
+
+    def __init__(self, client: "BlueCurrentClient", path: str | Path = ":memory:", max_age: float = 3600):
+        self.client, self.max_age = client, max_age
+        self.connection = sqlite3.connect(str(path))
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS transactions ({', '.join(f'{k} {v}' for k, v in COLUMNS.items())})"
+            )
+            for column in ("chargepoint_id", "card_id", "started_at"):
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS ix_{column} ON transactions ({column})")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS syncs (chargepoint_id TEXT PRIMARY KEY, synced_at REAL, newest TEXT)"
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+    async def refresh(self, evse_id: str | list[str], force: bool = False) -> int:
+        """
+        Sync the transactions of charge points that have not been synced for max_age seconds.
+
+        Args:
+            evse_id: A charge point ID, or a list of charge point IDs.
+            force: If True, sync regardless of when the charge points were last synced. Defaults to False.
+
+        Returns:
+            The number of transactions that were added.
+        """
+        evse_ids = [evse_id] if isinstance(evse_id, str) else evse_id
+        syncs = {
+            row[0]: row[1:]
+            for row in self.connection.execute(
+                "SELECT chargepoint_id, synced_at, newest FROM syncs "
+                f"WHERE chargepoint_id IN ({_placeholders(evse_ids)})",
+                evse_ids,
+            )
+        }
+        stale = [e for e in evse_ids if force or e not in syncs or syncs[e][0] < time() - self.max_age]
+        return sum(await gather(*(self._sync(e, syncs.get(e, (None, None))[1]) for e in stale)))
+
+    async def get_transactions(
+        self,
+        evse_id: str | list[str],
+        card_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Get cached transactions, newest first.
+
+        Args:
+            evse_id: A charge point ID, or a list of charge point IDs.
+            card_id: Only get the transactions of this charge card. Defaults to None.
+            start: Only get transactions started at or after this time. Defaults to None.
+            end: Only get transactions started before this time. Defaults to None.
+
+        Returns:
+            A list of dictionaries like the ones yielded by BlueCurrentClient.iterate_transactions.
+        """
+        where, parameters = await self._where(evse_id, card_id, start, end)
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM transactions WHERE {where} ORDER BY end_time DESC", parameters
+        )
+        return [
+            {
+                **dict(zip(COLUMNS, row)),
+                "started_at": _parse(row[4]),
+                "end_time": _parse(row[5]),
+            }
+            for row in cursor
+        ]
+
+    async def kwh_per_card(
+        self, evse_id: str | list[str], start: datetime | None = None, end: datetime | None = None
+    ) -> dict[str, float]:
+        """Get the total kWh charged per charge card ID."""
+        where, parameters = await self._where(evse_id, None, start, end)
+        cursor = self.connection.execute(
+            f"SELECT card_id, SUM(kwh) FROM transactions WHERE {where} GROUP BY card_id ORDER BY card_id", parameters
+        )
+        return dict(cursor.fetchall())
+
+    async def costs_per_month(
+        self, evse_id: str | list[str], card_id: str | None = None
+    ) -> dict[str, dict[str, float]]:
+        """Get the total costs per month the transactions started in, e.g. {"2023-07": {"EUR": 12.34}}."""
+        where, parameters = await self._where(evse_id, card_id, None, None)
+        cursor = self.connection.execute(
+            f"SELECT substr(started_at, 1, 7) AS month, currency, SUM(total_costs) FROM transactions "
+            f"WHERE {where} GROUP BY month, currency ORDER BY month",
+            parameters,
+        )
+        result: dict[str, dict[str, float]] = {}
+        for month, currency, costs in cursor:
+            result.setdefault(month, {})[currency] = costs
+        return result
+
+    async def _sync(self, evse_id: str, newest: str | None) -> int:
+        rows = []
+        async with aclosing(self.client.iterate_transactions(evse_id, prefetch=0)) as transactions:
+            async for tx in transactions:
+                row = tuple(
+                    _format(tx.get(column) if isinstance(tx, dict) else getattr(tx, column)) for column in COLUMNS
+                )
+                # Transactions that stopped in the same second as the newest cached one are read again and replaced.
+                if newest is not None and row[5] is not None and row[5] < newest:
+                    break
+                rows.append(row)
+        newest = max([newest or "", *(row[5] for row in rows if row[5] is not None)]) or None
+        cached = self.connection.execute(
+            f"SELECT COUNT(*) FROM transactions WHERE transaction_id IN ({_placeholders(rows)})",
+            [row[0] for row in rows],
+        ).fetchone()[0]
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO transactions ({', '.join(COLUMNS)}) VALUES ({_placeholders(COLUMNS)})", rows
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO syncs (chargepoint_id, synced_at, newest) VALUES (?, ?, ?)",
+                (evse_id, time(), newest),
+            )
+        return len(rows) - cached
+
+    async def _where(
+        self, evse_id: str | list[str], card_id: str | None, start: datetime | None, end: datetime | None
+    ) -> tuple[str, list[Any]]:
+        await self.refresh(evse_id)
+        evse_ids = [evse_id] if isinstance(evse_id, str) else evse_id
+        clauses, parameters = [f"chargepoint_id IN ({_placeholders(evse_ids)})"], list(evse_ids)
+        for clause, value in (("card_id = ?", card_id), ("started_at >= ?", start), ("started_at < ?", end)):
+            if value is not None:
+                clauses.append(clause)
+                parameters.append(_format(value))
+        return " AND ".join(clauses), parameters
+
+
+def _format(value: Any) -> Any:
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value
+
+
+def _parse(value: str | None) -> datetime | None:
+    return None if value is None else datetime.fromisoformat(value)
+
+
+def _placeholders(values: Any) -> str:
+    return ", ".join("?" for _ in values)
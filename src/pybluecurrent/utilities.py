@@ -1,5 +1,92 @@
+import re
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable
+
+# Directives that always have a fixed width: their pattern, and the index of the datetime argument they set.
+_FIXED_WIDTH_DIRECTIVES: dict[str, tuple[str, int]] = {
+    "Y": (r"(\d{4})", 0),
+    "y": (r"(\d\d)", 0),
+    "m": (r"(\d\d)", 1),
+    "b": (r"([a-z]{3})", 1),
+    "d": (r"(\d\d)", 2),
+    "H": (r"(\d\d)", 3),
+    "M": (r"(\d\d)", 4),
+    "S": (r"(\d\d)", 5),
+}
+_DEFAULTS = ("1900", "1", "1", "0", "0", "0")
+_MONTH_ABBREVIATIONS: dict[str, int] = {
+    month: i
+    for i, month in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)
+}
+
+
+@lru_cache(maxsize=None)
+def compile_datetime_format(datetime_format: str) -> Callable[[str], datetime]:
+    """
+    Compile a datetime format into a function that parses strings like datetime.strptime.
+
+    Formats consisting of only %Y, %y, %m, %b, %d, %H, %M, %S and literal characters are compiled once into
+    a regular expression of fixed-width fields, which is several times faster than strptime.
+    Strings that do not match it, e.g. "1-7-2023" for "%d-%m-%Y", and formats with any other directive
+    are parsed with strptime, so the result (or the ValueError) is the same as that of strptime.
+
+    Args:
+        datetime_format: A format as used by datetime.strptime.
+
+    Returns:
+        A function that parses a string to a datetime.
+    """
+
+    def fallback(value: str) -> datetime:
+        return datetime.strptime(value, datetime_format)
+
+    pattern, directives = "", [""] * len(_DEFAULTS)
+    order = list(range(-len(_DEFAULTS), 0))  # Index into the groups followed by the defaults.
+    for i, part in enumerate(re.split(r"(%.)", datetime_format)):
+        if i % 2 == 0:
+            if "%" in part:
+                return fallback
+            pattern += "".join(r"\s+" if c.isspace() else re.escape(c) for c in part)
+        elif part == "%%":
+            pattern += "%"
+        elif part[1] in _FIXED_WIDTH_DIRECTIVES and not directives[_FIXED_WIDTH_DIRECTIVES[part[1]][1]]:
+            group, argument = _FIXED_WIDTH_DIRECTIVES[part[1]]
+            pattern += group
+            order[argument], directives[argument] = i // 2, part[1]
+        else:
+            return fallback
+    regex = re.compile(re.sub(r"(\\s\+)+", r"\\s+", pattern), re.ASCII | re.IGNORECASE)
+    converters = [
+        (index, _month if directive == "b" else _two_digit_year if directive == "y" else int)
+        for index, directive in zip(order, directives)
+    ]
+    simple = all(converter is int for _, converter in converters)
+
+    def parse(value: str) -> datetime:
+        match = regex.fullmatch(value)
+        if match is None:
+            return fallback(value)
+        values = match.groups() + _DEFAULTS
+        try:
+            if simple:
+                year, month, day, hour, minute, second = [int(values[index]) for index in order]
+            else:
+                year, month, day, hour, minute, second = [converter(values[index]) for index, converter in converters]
+            return datetime(year, month, day, hour, minute, second)
+        except (KeyError, ValueError):
+            return fallback(value)
+
+    return parse
+
+
+def _month(value: str) -> int:
+    return _MONTH_ABBREVIATIONS[value.lower()]
+
+
+def _two_digit_year(value: str) -> int:
+    year = int(value)
+    return year + (2000 if year < 69 else 1900)
 
 
 def parse_datetime_keys(source: dict[str, Any], formats: dict[str, tuple[str, bool]]) -> dict[str, Any]:
@@ -24,7 +111,7 @@ def parse_datetime_keys(source: dict[str, Any], formats: dict[str, tuple[str, bo
             if source[key] == "":
                 source[key] = None
             else:
-                result = datetime.strptime(source[key], datetime_format)
+                result = compile_datetime_format(datetime_format)(source[key])
                 source[key] = result.date() if is_date else result
     return source
 
@@ -32,5 +119,20 @@ def parse_datetime_keys(source: dict[str, Any], formats: dict[str, tuple[str, bo
 def parse_list_datetime_keys(
     source: list[dict[str, Any]], formats: dict[str, tuple[str, bool]]
 ) -> list[dict[str, Any]]:
-    """Apply parse_datetime_keys on all elements in a list."""
-    return [parse_datetime_keys(s, formats) for s in source]
+    """
+    Apply parse_datetime_keys on all elements in a list.
+
+    The list is parsed one key at a time, and every distinct value of a key is parsed only once.
+    """
+    for key, (datetime_format, is_date) in formats.items():
+        parse = compile_datetime_format(datetime_format)
+        parsed: dict[str, Any] = {"": None}
+        for element in source:
+            value = element.get(key)
+            if value is None:
+                continue
+            if value not in parsed:
+                result = parse(value)
+                parsed[value] = result.date() if is_date else result
+            element[key] = parsed[value]
+    return source
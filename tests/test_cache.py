@@ -0,0 +1,83 @@
+from asyncio import gather, sleep
+
+from pytest import raises
+
+from pybluecurrent.cache import TTLCache
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await sleep(0.01)
+        return self.calls
+
+
+class TestTTLCache:
+    async def test_cache(self):
+        cache, load = TTLCache(), Loader()
+        assert await cache.get("get_account", (), load) == 1
+        assert await cache.get("get_account", (), load) == 1
+        assert await cache.get("get_grids", (), load) == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    async def test_uncached_method(self):
+        cache, load = TTLCache(ttl={"get_account": 0}), Loader()
+        assert await cache.get("get_account", (), load) == 1
+        assert await cache.get("get_account", (), load) == 2
+        assert await cache.get("get_status", (), load) == 3
+        assert len(cache) == 0
+
+    async def test_expiry(self):
+        cache, load = TTLCache(ttl={"get_account": 0.02}), Loader()
+        assert await cache.get("get_account", (), load) == 1
+        await sleep(0.03)
+        assert await cache.get("get_account", (), load) == 2
+
+    async def test_coalesce(self):
+        cache, load = TTLCache(), Loader()
+        assert await gather(*(cache.get("get_account", (), load) for _ in range(5))) == [1] * 5
+        assert load.calls == 1
+
+    async def test_max_size(self):
+        cache, load = TTLCache(ttl={"method": 60}, max_size=2), Loader()
+        for i in range(3):
+            await cache.get("method", (i,), load)
+        assert len(cache) == 2
+        assert await cache.get("method", (0,), load) == 4
+
+    async def test_invalidate(self):
+        cache, load = TTLCache(), Loader()
+        await cache.get("get_account", (), load)
+        await cache.get("get_grids", (), load)
+        cache.invalidate("get_account")
+        assert await cache.get("get_account", (), load) == 3
+        assert await cache.get("get_grids", (), load) == 2
+
+    async def test_accounts(self):
+        cache, load = TTLCache(), Loader()
+        assert await cache.get("get_account", (), load, account="a") == 1
+        assert await cache.get("get_account", (), load, account="b") == 2
+        assert await cache.get("get_account", (), load, account="a") == 1
+        cache.invalidate("get_account", account="a")
+        assert await cache.get("get_account", (), load, account="a") == 3
+        assert await cache.get("get_account", (), load, account="b") == 2
+
+    async def test_invalidate_while_loading(self):
+        cache, load = TTLCache(), Loader()
+        result = gather(cache.get("get_account", (), load))
+        await sleep(0)
+        cache.invalidate()
+        assert await result == [1]
+        assert len(cache) == 0
+
+    async def test_error(self):
+        async def fail() -> int:
+            raise ValueError()
+
+        cache = TTLCache()
+        with raises(ValueError):
+            await cache.get("get_account", (), fail)
+        assert await cache.get("get_account", (), Loader()) == 1
@@ -0,0 +1,40 @@
+from datetime import datetime
+from pathlib import Path
+
+from pytest import fixture
+
+from pybluecurrent.checkpoints import (
+    Checkpoint,
+    CheckpointStore,
+    JSONCheckpointStore,
+    MemoryCheckpointStore,
+    SQLiteCheckpointStore,
+)
+
+
+@fixture(params=["memory", "json", "sqlite"])
+def store(request, tmp_path: Path) -> CheckpointStore:
+    if request.param == "json":
+        return JSONCheckpointStore(tmp_path / "checkpoints.json")
+    if request.param == "sqlite":
+        return SQLiteCheckpointStore(tmp_path / "checkpoints.db")
+    return MemoryCheckpointStore()
+
+
+class TestCheckpointStore:
+    def test_missing(self, store: CheckpointStore):
+        assert store.load("BCU1") is None
+
+    def test_save(self, store: CheckpointStore):
+        store.save("BCU1", Checkpoint(datetime(2023, 7, 1, 14), frozenset({10})))
+        store.save("BCU2", Checkpoint(datetime(2023, 7, 2, 14), frozenset({20})))
+        store.save("BCU1", Checkpoint(datetime(2023, 7, 3, 14), frozenset({11, 12})))
+        assert store.load("BCU1") == Checkpoint(datetime(2023, 7, 3, 14), frozenset({11, 12}))
+        assert store.load("BCU2") == Checkpoint(datetime(2023, 7, 2, 14), frozenset({20}))
+
+    def test_persistent(self, tmp_path: Path):
+        checkpoint = Checkpoint(datetime(2023, 7, 1, 14), frozenset({10}))
+        JSONCheckpointStore(tmp_path / "checkpoints.json").save("BCU1", checkpoint)
+        SQLiteCheckpointStore(tmp_path / "checkpoints.db").save("BCU1", checkpoint)
+        assert JSONCheckpointStore(tmp_path / "checkpoints.json").load("BCU1") == checkpoint
+        assert SQLiteCheckpointStore(tmp_path / "checkpoints.db").load("BCU1") == checkpoint
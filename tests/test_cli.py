@@ -0,0 +1,120 @@
+import subprocess
+import sys
+from io import StringIO
+from json import loads
+from pathlib import Path
+
+from pytest import fixture, mark, raises
+
+from pybluecurrent.cli import parse_arguments, run_command
+from pybluecurrent.testing import MockBlueCurrent
+
+# Cumulative time to import pybluecurrent.cli, as reported by python -X importtime, in microseconds.
+IMPORT_TIME_BUDGET = 50_000
+
+
+@fixture
+async def server():
+    async with MockBlueCurrent(n_charge_points=3, n_transactions=10, per_page=4) as server:
+        yield server
+
+
+async def run(server: MockBlueCurrent, *argv: str) -> tuple[int, list[dict]]:
+    output = StringIO()
+    async with server.client() as client:
+        code = await run_command(client, parse_arguments(["--username", "username", *argv]), output)
+    return code, [loads(line) for line in output.getvalue().splitlines()]
+
+
+class TestImport:
+    def test_lazy_imports(self):
+        modules = ("asyncio", "httpx", "websockets", "sjcl", "pybluecurrent.client")
+        result = subprocess.run(
+            [sys.executable, "-c", f"import sys, pybluecurrent.cli; print([m for m in {modules} if m in sys.modules])"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        assert result.stdout.strip() == "[]"
+
+    def test_import_time(self):
+        times = []
+        for _ in range(3):
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", "import pybluecurrent.cli"],
+                capture_output=True,
+                check=True,
+                text=True,
+            )
+            line = next(line for line in result.stderr.splitlines() if line.endswith("| pybluecurrent.cli"))
+            times.append(int(line.split("|")[1]))
+        assert min(times) < IMPORT_TIME_BUDGET
+
+    def test_client_is_imported_when_used(self):
+        import pybluecurrent
+
+        assert pybluecurrent.BlueCurrentClient.__name__ == "BlueCurrentClient"
+        with raises(AttributeError):
+            pybluecurrent.Unknown  # type: ignore
+
+
+class TestArguments:
+    def test_username_required(self, monkeypatch):
+        monkeypatch.delenv("BLUECURRENT_USERNAME", raising=False)
+        with raises(SystemExit):
+            parse_arguments(["status"])
+
+    def test_token_file(self, monkeypatch, tmp_path: Path):
+        monkeypatch.setenv("BLUECURRENT_USERNAME", "username")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert parse_arguments(["status"]).token_file == tmp_path / "pybluecurrent" / "tokens.json"
+        assert parse_arguments(["--no-token-file", "status"]).token_file is None
+
+    @mark.parametrize(
+        "argv",
+        [
+            ["BCU1", "BCU2", "--since", "8"],
+            ["BCU1", "--since", "8", "--output", "transactions.csv"],
+            ["BCU1", "--since", "8", "--oldest-first"],
+        ],
+    )
+    def test_invalid_since(self, argv: list[str]):
+        with raises(SystemExit):
+            parse_arguments(["--username", "username", "transactions", "export", *argv])
+
+
+class TestCommands:
+    async def test_status(self, server: MockBlueCurrent):
+        code, records = await run(server, "status")
+        assert code == 0
+        assert [record["evse_id"] for record in records] == server.evse_ids
+        assert all("activity" in record for record in records)
+
+    async def test_export_to_stdout(self, server: MockBlueCurrent):
+        code, records = await run(server, "transactions", "export", "BCU000001", "--oldest-first")
+        assert len(records) == 10
+        assert records[0]["end_time"] < records[-1]["end_time"]  # Serialized as ISO 8601.
+
+    async def test_export_since(self, server: MockBlueCurrent):
+        code, records = await run(server, "transactions", "export", "BCU000001", "--since", "18")
+        assert [record["transaction_id"] for record in records] == [20, 19]
+
+    async def test_export_to_file(self, server: MockBlueCurrent, tmp_path: Path):
+        path = tmp_path / "transactions.csv"
+        code, records = await run(server, "transactions", "export", "--output", str(path))
+        assert records == [dict(path=str(path), transactions=30)]
+        assert len(path.read_text().splitlines()) == 31
+
+    async def test_set_status(self, server: MockBlueCurrent):
+        code, records = await run(server, "set-status", "disabled", "BCU000001", "BCU999999", "--rate", "1000")
+        assert code == 1
+        assert [record["evse_id"] for record in records] == ["BCU000001", "BCU999999"]
+        assert records[0]["error"] is None
+        assert records[1]["error"].startswith("BlueCurrentException")
+        assert server.status("BCU000001")["activity"] == "unavailable"
+
+    async def test_fleet_snapshot(self, server: MockBlueCurrent):
+        code, records = await run(server, "fleet", "snapshot", "--concurrency", "2")
+        assert code == 0
+        assert [record["evse_id"] for record in records] == server.evse_ids
+        assert all(record["settings"] and record["grid_status"] for record in records)
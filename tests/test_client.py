@@ -1,10 +1,33 @@
-from datetime import date
+from asyncio import (
+    Event,
+    TimeoutError,
+    create_task,
+    gather,
+    get_running_loop,
+    sleep,
+    wait_for,
+)
+from datetime import date, datetime
+from json import dumps, loads
 from os import environ
+from typing import AsyncGenerator, Callable
 
-from pytest import mark, raises, skip
+from httpx import AsyncClient, MockTransport, Request, Response
+from pytest import fixture, mark, raises, skip
+from websockets.asyncio.server import ServerConnection, serve
 
 from pybluecurrent import BlueCurrentClient
-from pybluecurrent.exceptions import AuthenticationFailed, BlueCurrentException
+from pybluecurrent.cache import TTLCache
+from pybluecurrent.checkpoints import Checkpoint, MemoryCheckpointStore
+from pybluecurrent.exceptions import (
+    AuthenticationFailed,
+    BlueCurrentException,
+    ConnectionLost,
+)
+from pybluecurrent.models import ChargePoint, ChargePointStatus, Transaction
+from pybluecurrent.testing import MockBlueCurrent
+from pybluecurrent.timeouts import AdaptiveTimeouts
+from pybluecurrent.tokens import MemoryTokenStore
 
 
 class TestHeaders:
@@ -15,6 +38,633 @@ class TestHeaders:
         assert "+" not in user_agent
 
 
+class TestDispatch:
+    async def test_route_by_evse_id(self, client: BlueCurrentClient):
+        first = create_task(client._receive("CH_SETTINGS", "BCU1"))
+        second = create_task(client._receive("CH_SETTINGS", "BCU2"))
+        await sleep(0)
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "BCU2"}})
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "BCU1"}})
+        results = await gather(first, second)
+        assert [result["data"]["evse_id"] for result in results] == ["BCU1", "BCU2"]
+        assert client._waiters == {}
+
+    async def test_unmatched_reply_is_dropped(self, client: BlueCurrentClient):
+        waiter = create_task(client._receive("CH_SETTINGS", "B"))
+        flow = create_task(client._receive("STATUS_SET_OPERATIVE", "flow-2"))
+        await sleep(0)
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "A"}})
+        client._dispatch({"object": "STATUS_SET_OPERATIVE", "flow_id": "flow-1"})
+        await sleep(0)
+        assert not waiter.done() and not flow.done()
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "B"}})
+        assert (await waiter)["data"]["evse_id"] == "B"
+        flow.cancel()
+
+    async def test_reply_of_other_flow_is_dropped(self, client: BlueCurrentClient):
+        flow = create_task(client._receive("STATUS_SET_OPERATIVE", "flow-2", "BCU1"))
+        await sleep(0)
+        client._dispatch(
+            {"object": "STATUS_SET_OPERATIVE", "flow_id": "flow-1", "data": {"evse_id": "BCU1"}, "success": False}
+        )
+        await sleep(0)
+        assert not flow.done()
+        client._dispatch({"object": "STATUS_SET_OPERATIVE", "flow_id": "flow-2", "data": {"evse_id": "BCU1"}})
+        assert (await flow)["flow_id"] == "flow-2"
+
+    async def test_route_reply_without_keys(self, client: BlueCurrentClient):
+        task = create_task(client._receive("RECEIVED_SOFT_RESET", "flow-1"))
+        await sleep(0)
+        client._dispatch({"object": "RECEIVED_SOFT_RESET"})
+        assert (await task)["object"] == "RECEIVED_SOFT_RESET"
+
+    async def test_route_grid_status(self, client: BlueCurrentClient):
+        task = create_task(client._receive("GRID_STATUS", "BCU1"))
+        await sleep(0)
+        client._dispatch({"object": "GRID_STATUS", "data": {"id": "GRID-BCU1"}})
+        assert (await task)["data"]["id"] == "GRID-BCU1"
+
+    async def test_route_without_evse_id(self, client: BlueCurrentClient):
+        task = create_task(client._receive("ACCOUNT"))
+        await sleep(0)
+        client._dispatch({"object": "CHARGE_CARDS", "cards": []})
+        client._dispatch({"object": "ACCOUNT", "full_name": "Name"})
+        assert (await task)["full_name"] == "Name"
+
+    async def test_error(self, client: BlueCurrentClient):
+        tasks = [create_task(client._receive(obj)) for obj in ("ACCOUNT", "CHARGE_POINTS")]
+        await sleep(0)
+        client._dispatch({"object": "ERROR", "message": "forbidden"})
+        for task in tasks:
+            with raises(BlueCurrentException):
+                await task
+        assert client._waiters == {}
+
+    async def test_unmatched_error_is_dropped(self, client: BlueCurrentClient):
+        tasks = [create_task(client._receive("CH_SETTINGS", evse_id)) for evse_id in ("BCU1", "BCU2")]
+        await sleep(0)
+        client._dispatch({"object": "ERROR", "evse_id": "BCU9"})
+        await sleep(0)
+        assert not any(task.done() for task in tasks)
+        for task in tasks:
+            task.cancel()
+
+    async def test_timeout(self, client: BlueCurrentClient):
+        with raises(TimeoutError):
+            await client._receive("ACCOUNT", timeout=0.01)
+        assert client._waiters == {}
+
+
+class RecordingSocket:
+    def __init__(
+        self, client: BlueCurrentClient | None = None, reply: Callable[[dict], dict | list[dict]] | None = None
+    ):
+        self.client, self.reply = client, reply
+        self.sent: list[dict] = []
+
+    async def send(self, message: str) -> None:
+        self.sent.append(loads(message))
+        if self.client is not None and self.reply is not None:
+            replies = self.reply(self.sent[-1])
+            for reply in replies if isinstance(replies, list) else [replies]:
+                get_running_loop().call_soon(self.client._dispatch, reply)
+
+
+class TestCorrelation:
+    async def test_concurrent_settings(self, client: BlueCurrentClient):
+        client.socket = RecordingSocket()  # type: ignore
+        task = gather(client.get_charge_point_settings("BCU1"), client.get_charge_point_settings("BCU2"))
+        await sleep(0)
+        assert [message["evse_id"] for message in client.socket.sent] == ["BCU1", "BCU2"]  # type: ignore
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "BCU2", "name": "two"}})
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "BCU1", "name": "one"}})
+        assert [settings["name"] for settings in await task] == ["one", "two"]
+
+    async def test_flow(self, client: BlueCurrentClient):
+        client.socket = RecordingSocket()  # type: ignore
+        first = create_task(client.soft_reset("BCU1"))
+        second = create_task(client.soft_reset("BCU2"))
+        await sleep(0)
+        flow_ids = {message["evse_id"]: message["flow_id"] for message in client.socket.sent}  # type: ignore
+        for evse_id in ("BCU2", "BCU1"):
+            client._dispatch({"object": "RECEIVED_SOFT_RESET", "flow_id": flow_ids[evse_id]})
+        for evse_id in ("BCU2", "BCU1"):
+            client._dispatch({"object": "STATUS_SOFT_RESET", "data": {"evse_id": evse_id}})
+        assert (await first)["data"]["evse_id"] == "BCU1"
+        assert (await second)["data"]["evse_id"] == "BCU2"
+        assert client._waiters == {}
+
+
+class TestFleetSnapshot:
+    async def test_snapshot(self, client: BlueCurrentClient):
+        def reply(message: dict) -> dict:
+            evse_id = message.get("evse_id")
+            if message["command"] == "GET_CHARGE_POINTS":
+                return {"object": "CHARGE_POINTS", "data": [{"evse_id": "BCU1"}, {"evse_id": "BCU2"}]}
+            if message["command"] == "GET_CH_SETTINGS":
+                return {"object": "CH_SETTINGS", "data": {"evse_id": evse_id}}
+            if evse_id == "BCU2":
+                return {"object": "ERROR", "evse_id": evse_id, "message": "forbidden"}
+            return {"object": "GRID_STATUS", "data": {"id": f"GRID-{evse_id}"}}
+
+        def status(request: Request) -> Response:
+            return Response(200, json={"data": {"evse_id": request.url.params["evse_id"], "start_datetime": ""}})
+
+        client.socket = RecordingSocket(client, reply)  # type: ignore
+        client.httpx_client = AsyncClient(transport=MockTransport(status))
+        snapshot = await client.get_fleet_snapshot(concurrency=2)
+        assert set(snapshot) == {"BCU1", "BCU2"}
+        assert snapshot["BCU1"]["errors"] == {}
+        assert snapshot["BCU1"]["grid_status"] == {"id": "GRID-BCU1"}
+        assert snapshot["BCU2"]["status"] == {"evse_id": "BCU2", "start_datetime": None}
+        assert snapshot["BCU2"]["settings"] == {"evse_id": "BCU2"}
+        assert snapshot["BCU2"]["grid_status"] is None
+        assert isinstance(snapshot["BCU2"]["errors"]["grid_status"], BlueCurrentException)
+
+
+def transactions_transport(
+    n_pages: int, per_page: int = 2, requests: list[Request] | None = None, descending: bool = False
+) -> MockTransport:
+    requests = [] if requests is None else requests
+
+    def handler(request: Request) -> Response:
+        requests.append(request)
+        page = int(request.url.params["page"])
+        ids = [(page - 1) * per_page + i for i in range(per_page)]
+        if descending:
+            ids = [n_pages * per_page - 1 - i for i in ids]
+        transactions = [
+            {"transaction_id": i, "started_at": "01-07-2023 12:34:56", "end_time": f"01-07-2023 14:00:{i:02}"}
+            for i in ids
+        ]
+        return Response(
+            200,
+            json={
+                "data": {
+                    "current_page": page,
+                    "next_page": page + 1 if page < n_pages else None,
+                    "max_per_page": per_page,
+                    "total_pages": n_pages,
+                    "transactions": transactions,
+                }
+            },
+        )
+
+    return MockTransport(handler)
+
+
+class TestIterateTransactions:
+    @mark.parametrize("prefetch", [0, 1, 4])
+    async def test_order(self, client: BlueCurrentClient, prefetch: int):
+        client.httpx_client = AsyncClient(transport=transactions_transport(n_pages=5))
+        transactions = [tx async for tx in client.iterate_transactions("BCU1", prefetch=prefetch)]
+        assert [tx["transaction_id"] for tx in transactions] == list(range(10))  # type: ignore
+
+    async def test_break(self, client: BlueCurrentClient):
+        client.httpx_client = AsyncClient(transport=transactions_transport(n_pages=5))
+        iterator = client.iterate_transactions("BCU1", prefetch=2)
+        async for tx in iterator:
+            break
+        await iterator.aclose()
+        assert tx["transaction_id"] == 0  # type: ignore
+
+    async def test_multiple_charge_points(self, client: BlueCurrentClient):
+        requests: list[Request] = []
+        client.httpx_client = AsyncClient(transport=transactions_transport(n_pages=2, requests=requests))
+        transactions = [tx async for tx in client.iterate_transactions(["BCU1", "BCU2"])]
+        assert len(transactions) == 4
+        assert len(requests) == 2
+        assert all(
+            loads(request.content) == {"chargepoints": [{"chargepoint_id": "BCU1"}, {"chargepoint_id": "BCU2"}]}
+            for request in requests
+        )
+
+
+class TestSyncTransactions:
+    async def test_since(self, client: BlueCurrentClient):
+        requests: list[Request] = []
+        client.httpx_client = AsyncClient(
+            transport=transactions_transport(n_pages=5, requests=requests, descending=True)
+        )
+        transactions = [tx async for tx in client.iterate_transactions("BCU1", since=6)]
+        assert [tx["transaction_id"] for tx in transactions] == [9, 8, 7]  # type: ignore
+        assert len(requests) == 2
+
+    async def test_since_datetime(self, client: BlueCurrentClient):
+        client.httpx_client = AsyncClient(transport=transactions_transport(n_pages=5, descending=True))
+        since = datetime(2023, 7, 1, 14, 0, 8)
+        transactions = [tx async for tx in client.iterate_transactions("BCU1", since=since)]
+        assert [tx["transaction_id"] for tx in transactions] == [9]  # type: ignore
+
+    async def test_since_oldest_first(self, client: BlueCurrentClient):
+        with raises(ValueError):
+            async for _ in client.iterate_transactions("BCU1", newest_first=False, since=6):
+                pass
+
+    async def test_since_id_of_many(self, client: BlueCurrentClient):
+        with raises(ValueError):
+            async for _ in client.iterate_transactions(["BCU1", "BCU2"], since=6):
+                pass
+
+    async def test_sync(self, client: BlueCurrentClient):
+        store = MemoryCheckpointStore()
+        client.httpx_client = AsyncClient(transport=transactions_transport(n_pages=5, descending=True))
+        assert len([tx async for tx in client.sync_transactions("BCU1", store)]) == 10
+        assert store.load("BCU1") == Checkpoint(datetime(2023, 7, 1, 14, 0, 9), frozenset({9}))
+        assert [tx async for tx in client.sync_transactions("BCU1", store)] == []
+
+    async def test_sync_long_session(self, client: BlueCurrentClient):
+        """A session that started before a synced one, on another charge point, but stopped after the sync."""
+        transactions = [
+            {"transaction_id": 3, "started_at": "01-07-2023 12:00:00", "end_time": "01-07-2023 14:00:00"},
+            {"transaction_id": 2, "started_at": "01-07-2023 11:00:00", "end_time": "01-07-2023 13:00:00"},
+        ]
+
+        def handler(request: Request) -> Response:
+            data = dict(current_page=1, next_page=None, max_per_page=10, total_pages=1, transactions=transactions)
+            return Response(200, json={"data": data})
+
+        store = MemoryCheckpointStore()
+        client.httpx_client = AsyncClient(transport=MockTransport(handler))
+        assert [tx["transaction_id"] async for tx in client.sync_transactions(["BCU1", "BCU2"], store)] == [3, 2]  # type: ignore
+        transactions[:0] = [
+            {"transaction_id": 4, "started_at": "01-07-2023 13:00:00", "end_time": "01-07-2023 14:00:00"},
+            {"transaction_id": 1, "started_at": "01-07-2023 10:00:00", "end_time": "01-07-2023 14:00:00"},
+        ]
+        assert [tx["transaction_id"] async for tx in client.sync_transactions(["BCU1", "BCU2"], store)] == [4, 1]  # type: ignore
+        assert store.load("BCU1,BCU2") == Checkpoint(datetime(2023, 7, 1, 14), frozenset({1, 3, 4}))
+        assert [tx async for tx in client.sync_transactions(["BCU1", "BCU2"], store)] == []
+
+
+class TestReconnect:
+    @staticmethod
+    async def serve_dropping(connections: list[ServerConnection], websocket: ServerConnection) -> None:
+        """Reply to HELLO and GET_ACCOUNT, but drop the first connection on the first other command."""
+        connections.append(websocket)
+        async for message in websocket:
+            command = loads(message)["command"]
+            if command == "HELLO":
+                await websocket.send(dumps({"object": "HELLO"}))
+            elif command == "GET_ACCOUNT" and len(connections) > 1:
+                await websocket.send(dumps({"object": "ACCOUNT", "full_name": "Name"}))
+            else:
+                await websocket.close()
+
+    @fixture
+    async def server(self) -> AsyncGenerator[tuple[str, list[ServerConnection]], None]:
+        connections: list[ServerConnection] = []
+        async with serve(lambda websocket: self.serve_dropping(connections, websocket), "localhost", 0) as server:
+            yield f"ws://localhost:{list(server.sockets)[0].getsockname()[1]}", connections
+
+    @staticmethod
+    def connect(url: str, reconnect: bool = True) -> BlueCurrentClient:
+        client = BlueCurrentClient("username", "password", reconnect=reconnect)
+        client.socket_url, client.reconnect_delay, client.token = url, 0.01, "token"
+        return client
+
+    async def test_retry_read(self, server: tuple[str, list[ServerConnection]]):
+        url, connections = server
+        async with self.connect(url) as client:
+            assert (await client.get_account())["full_name"] == "Name"
+        assert len(connections) == 2
+
+    async def test_fail_write(self, server: tuple[str, list[ServerConnection]]):
+        url, connections = server
+        async with self.connect(url) as client:
+            with raises(ConnectionLost):
+                await client.soft_reset("BCU1")
+            assert (await client.get_account())["full_name"] == "Name"
+        assert len(connections) == 2
+
+    async def test_no_reconnect(self, server: tuple[str, list[ServerConnection]]):
+        url, connections = server
+        async with self.connect(url, reconnect=False) as client:
+            with raises(ConnectionLost):
+                await client.get_account()
+        assert len(connections) == 1
+
+
+class TestTokenStore:
+    @fixture
+    async def server(self) -> AsyncGenerator[tuple[str, list[str]], None]:
+        """Accept any password, but only the token handed out by the last login."""
+        commands: list[str] = []
+
+        async def handler(websocket: ServerConnection) -> None:
+            async for message in websocket:
+                data = loads(message)
+                commands.append(data["command"])
+                if data["command"] == "VALIDATE_PASSWORD":
+                    await websocket.send(dumps({"object": "STATUS_PASSWORD", "accepted": True, "token": "fresh"}))
+                elif data["Authorization"] == "Token fresh":
+                    await websocket.send(dumps({"object": data["command"]}))
+                else:
+                    await websocket.send(dumps({"object": "ERROR", "message": "forbidden"}))
+
+        async with serve(handler, "localhost", 0) as server:
+            yield f"ws://localhost:{list(server.sockets)[0].getsockname()[1]}", commands
+
+    @staticmethod
+    def connect(url: str, store: MemoryTokenStore) -> BlueCurrentClient:
+        client = BlueCurrentClient("username", "password", token_store=store)
+        client.socket_url = url
+        return client
+
+    async def test_login_saves_token(self, server: tuple[str, list[str]]):
+        url, commands = server
+        store = MemoryTokenStore()
+        async with self.connect(url, store):
+            pass
+        assert commands == ["VALIDATE_PASSWORD", "HELLO"]
+        assert store.load("username") == "fresh"
+
+    async def test_stored_token(self, server: tuple[str, list[str]]):
+        url, commands = server
+        store = MemoryTokenStore()
+        store.save("username", "fresh")
+        async with self.connect(url, store):
+            pass
+        assert commands == ["HELLO"]
+
+    async def test_rejected_token(self, server: tuple[str, list[str]]):
+        url, commands = server
+        store = MemoryTokenStore()
+        store.save("username", "expired")
+        async with self.connect(url, store) as client:
+            assert client.token == "fresh"
+        assert commands == ["HELLO", "VALIDATE_PASSWORD", "HELLO"]
+        assert store.load("username") == "fresh"
+
+
+class TestStreamStatus:
+    async def test_stream(self, client: BlueCurrentClient):
+        def status(request: Request) -> Response:
+            evse_id = request.url.params["evse_id"]
+            return Response(200, json={"data": {"evse_id": evse_id, "activity": "available", "actual_p1": 0}})
+
+        client.socket = RecordingSocket()  # type: ignore
+        client.httpx_client = AsyncClient(transport=MockTransport(status))
+        stream = client.stream_status(["BCU1", "BCU2"]).__aiter__()
+        assert await stream.__anext__() == {"evse_id": "BCU1", "activity": "available", "actual_p1": 0}
+        assert await stream.__anext__() == {"evse_id": "BCU2", "activity": "available", "actual_p1": 0}
+        assert [message["command"] for message in client.socket.sent] == ["GET_CH_STATUS"] * 2  # type: ignore
+        assert client._subscriptions == {"BCU1": 1, "BCU2": 1}
+        for message in [
+            {"object": "CH_STATUS", "data": {"evse_id": "BCU3", "activity": "charging"}},
+            {"object": "CH_STATUS", "data": {"evse_id": "BCU1", "activity": "available", "actual_p1": 0}},
+            {"object": "GRID_STATUS", "data": {"id": "GRID-BCU1"}},
+            {"object": "CH_STATUS", "data": {"evse_id": "BCU2", "activity": "charging", "actual_p1": 16}},
+        ]:
+            await client.queue.put(message)
+        assert await stream.__anext__() == {"evse_id": "BCU2", "activity": "charging", "actual_p1": 16}
+        await stream.aclose()  # type: ignore
+        assert client._subscriptions == {}
+
+    async def test_close_blocked_stream(self):
+        async with MockBlueCurrent(n_charge_points=1) as server:
+            async with server.client() as client:
+                evse_id = server.evse_ids[0]
+                stream = client.stream_status([evse_id], max_size=1, policy="block")
+                await stream.__anext__()  # type: ignore
+                while not server.subscribers(evse_id):
+                    await sleep(0.01)
+                for i in range(3):
+                    await server.push_status(evse_id, actual_kwh=i + 1)
+                await sleep(0.05)
+                await stream.aclose()  # type: ignore
+                account = await wait_for(client.get_account(), timeout=1)
+        assert account["full_name"] == "Your Full Name"
+
+
+class TestCache:
+    async def test_cache(self, client: BlueCurrentClient):
+        def reply(message: dict) -> dict | list[dict]:
+            if message["command"] == "GET_CHARGE_POINTS":
+                return {"object": "CHARGE_POINTS", "data": [{"evse_id": "BCU1"}]}
+            return [
+                {"object": f"{prefix}_{message['command']}", "evse_id": "BCU1"} for prefix in ("RECEIVED", "STATUS")
+            ]
+
+        client.socket, client.cache = RecordingSocket(client, reply), TTLCache()  # type: ignore
+        charge_points = await gather(client.get_charge_points(), client.get_charge_points())
+        assert charge_points[0] is charge_points[1]
+        assert await client.get_charge_points() is charge_points[0]
+        await client.set_status("BCU1", enabled=False)
+        assert await client.get_charge_points() == charge_points[0]
+        assert [message["command"] for message in client.socket.sent] == [  # type: ignore
+            "GET_CHARGE_POINTS",
+            "SET_INOPERATIVE",
+            "GET_CHARGE_POINTS",
+        ]
+
+    async def test_shared_cache(self):
+        cache = TTLCache()
+        async with MockBlueCurrent(n_charge_points=2) as server:
+            async with server.client(cache=cache) as client, server.client("other", cache=cache) as other:
+                first = await client.get_charge_points()
+                assert await other.get_charge_points() is not first
+                assert await client.get_charge_points() is first
+                assert len(cache) == 2
+            async with server.client(cache=cache, models=True) as client:
+                assert isinstance((await client.get_charge_points())[0], ChargePoint)
+
+
+class TestModels:
+    async def test_models(self, client: BlueCurrentClient):
+        def reply(message: dict) -> dict:
+            if message["command"] == "GET_CHARGE_POINTS":
+                return {"object": "CHARGE_POINTS", "data": [{"evse_id": "BCU1", "tariff": {"currency": "EUR"}}]}
+            if message["command"] == "GET_CH_SETTINGS":
+                return {"object": "CH_SETTINGS", "data": {"evse_id": "BCU1"}}
+            return {"object": "GRID_STATUS", "data": {"id": "GRID-BCU1"}}
+
+        def status(request: Request) -> Response:
+            return Response(200, json={"data": {"evse_id": "BCU1", "start_datetime": "20230724 15:25:33"}})
+
+        client.models = True
+        client.socket = RecordingSocket(client, reply)  # type: ignore
+        client.httpx_client = AsyncClient(transport=MockTransport(status))
+        charge_points = await client.get_charge_points()
+        assert isinstance(charge_points[0], ChargePoint)
+        assert charge_points[0].tariff.currency == "EUR"  # type: ignore
+        status_ = await client.get_charge_point_status("BCU1")
+        assert status_ == ChargePointStatus(evse_id="BCU1", start_datetime=datetime(2023, 7, 24, 15, 25, 33))
+        snapshot = await client.get_fleet_snapshot()
+        assert snapshot["BCU1"]["status"] == status_
+        assert snapshot["BCU1"]["errors"] == {}
+
+    async def test_transactions(self, client: BlueCurrentClient):
+        client.models = True
+        client.httpx_client = AsyncClient(transport=transactions_transport(n_pages=2))
+        transactions = [tx async for tx in client.iterate_transactions("BCU1")]
+        assert all(isinstance(tx, Transaction) for tx in transactions)
+        assert [tx.transaction_id for tx in transactions] == [0, 1, 2, 3]  # type: ignore
+        page = await client.get_transactions("BCU1")
+        assert page["transactions"][0] == transactions[0]  # type: ignore
+
+
+class TestMetrics:
+    async def test_metrics(self, client: BlueCurrentClient):
+        def reply(message: dict) -> dict | list[dict]:
+            if message["command"] == "GET_CHARGE_POINTS":
+                return {"object": "CHARGE_POINTS", "data": []}
+            return []
+
+        client.socket = RecordingSocket(client, reply)  # type: ignore
+        client.httpx_client = AsyncClient(transport=MockTransport(lambda _: Response(200, json={"grids": []})))
+        await client.get_charge_points()
+        await client.get_grids()
+        with raises(TimeoutError):
+            await client._request(dict(command="GET_ACCOUNT"), "ACCOUNT", timeout=0.01)
+        commands = client.metrics.commands
+        assert commands["GET_CHARGE_POINTS"].latency.count == 1
+        assert commands["HTTP getgrids"].latency.count == 1
+        assert commands["GET_ACCOUNT"].timeouts == 1
+        assert client.metrics.messages_sent == 2
+        assert client.metrics.bytes_received == len('{"grids":[]}')
+        assert client.metrics.in_flight == 0
+
+
+class TestAdaptiveTimeouts:
+    async def test_adaptive_timeout(self):
+        timeouts = AdaptiveTimeouts(min_samples=1, minimum=0.01)
+        client = BlueCurrentClient("username", "password", timeouts=timeouts)
+        client.socket = RecordingSocket()  # type: ignore
+        timeouts("GET_ACCOUNT", 0.01, "ok")
+        with raises(TimeoutError):
+            await wait_for(client._request(dict(command="GET_ACCOUNT"), "ACCOUNT"), timeout=1)
+        assert client.metrics["GET_ACCOUNT"].timeouts == 1
+        assert timeouts.timeout("GET_ACCOUNT", 10) == 10  # The timeout counts as infinitely slow.
+
+    async def test_hedge(self):
+        timeouts = AdaptiveTimeouts(min_samples=1, hedge_quantile=0.9)
+        client = BlueCurrentClient("username", "password", timeouts=timeouts)
+        client.socket = RecordingSocket(  # The first request is lost.
+            client, lambda message: [{"object": "CH_SETTINGS", "data": {"evse_id": "BCU1"}}] * (len(sent) > 1)
+        )
+        sent = client.socket.sent  # type: ignore
+        timeouts("GET_CH_SETTINGS", 0.01, "ok")
+        assert await wait_for(client.get_charge_point_settings("BCU1"), timeout=1) == {"evse_id": "BCU1"}
+        assert [message["command"] for message in sent] == ["GET_CH_SETTINGS"] * 2
+        assert client.metrics["GET_CH_SETTINGS"].hedges == 1
+        assert len(timeouts.latencies["GET_CH_SETTINGS"]) == 2
+
+    async def test_concurrent_hedges(self):
+        timeouts = AdaptiveTimeouts(min_samples=1, hedge_quantile=0.5)
+        timeouts("GET_CH_SETTINGS", 0.01, "ok")
+        async with MockBlueCurrent(n_charge_points=2, latency=0.05) as server:
+            async with server.client(timeouts=timeouts) as client:
+                first = create_task(client.get_charge_point_settings("BCU000000"))
+                await sleep(0.02)
+                second = create_task(client.get_charge_point_settings("BCU000001"))
+                results = await gather(first, second)
+                await sleep(0.1)  # Let the duplicate replies arrive.
+                third = await client.get_charge_point_settings("BCU000001")
+        assert [settings["evse_id"] for settings in [*results, third]] == ["BCU000000", "BCU000001", "BCU000001"]
+        assert client.metrics["GET_CH_SETTINGS"].hedges >= 2
+
+    async def test_no_hedge_for_flows(self):
+        timeouts = AdaptiveTimeouts(min_samples=1, hedge_quantile=0.9)
+        client = BlueCurrentClient("username", "password", timeouts=timeouts)
+        client.socket = RecordingSocket()  # type: ignore
+        timeouts("SOFT_RESET", 0.01, "ok")
+        task = create_task(client.soft_reset("BCU1"))
+        await sleep(0.05)
+        assert len(client.socket.sent) == 1  # type: ignore
+        task.cancel()
+
+
+class TestPriority:
+    async def test_priority(self, client: BlueCurrentClient):
+        socket = RecordingSocket()
+        release = Event()
+
+        async def send(message: str) -> None:
+            await release.wait()
+            await socket.send(message)
+
+        client.socket = socket  # type: ignore
+        client.scheduler.send = send
+        tasks = [create_task(client._send(dict(command="GET_ACCOUNT")))]
+        await sleep(0)
+        with client.priority("bulk"):
+            tasks += [create_task(client._send(dict(command="GET_CH_SETTINGS", evse_id=f"BCU{i}"))) for i in range(2)]
+        tasks.append(create_task(client._send(dict(command="GET_GRID_STATUS", evse_id="BCU1"))))
+        tasks.append(create_task(client._send(dict(command="SET_INOPERATIVE", evse_id="BCU1"))))
+        await sleep(0)
+        release.set()
+        await gather(*tasks)
+        assert [message["command"] for message in socket.sent] == [
+            "GET_ACCOUNT",
+            "SET_INOPERATIVE",
+            "GET_GRID_STATUS",
+            "GET_CH_SETTINGS",
+            "GET_CH_SETTINGS",
+        ]
+
+    def test_unknown_priority(self, client: BlueCurrentClient):
+        with raises(ValueError):
+            with client.priority("urgent"):  # type: ignore
+                pass
+
+
+class TestFleetCommand:
+    async def test_fleet_command(self, client: BlueCurrentClient):
+        def reply(message: dict) -> dict | list[dict]:
+            evse_id, flow_id = message["evse_id"], message["flow_id"]
+            if evse_id == "BCU3":
+                return {"object": "ERROR", "evse_id": evse_id, "message": "offline"}
+            return [
+                {"object": "RECEIVED_SOFT_RESET", "flow_id": flow_id},
+                {"object": "STATUS_SOFT_RESET", "flow_id": flow_id, "data": {"evse_id": evse_id}},
+            ]
+
+        client.socket = RecordingSocket(client, reply)  # type: ignore
+        reports = await client.send_fleet_command("SOFT_RESET", ["BCU1", "BCU2", "BCU3"], rate=1000, concurrency=2)
+        assert list(reports) == ["BCU1", "BCU2", "BCU3"]
+        flow_ids = {message["evse_id"]: message["flow_id"] for message in client.socket.sent}  # type: ignore
+        for evse_id in ("BCU1", "BCU2"):
+            assert reports[evse_id]["flow_id"] == flow_ids[evse_id]
+            assert reports[evse_id]["result"]["data"]["evse_id"] == evse_id
+            assert reports[evse_id]["error"] is None
+        assert reports["BCU3"]["result"] is None
+        assert isinstance(reports["BCU3"]["error"], BlueCurrentException)
+
+    async def test_unknown_command(self, client: BlueCurrentClient):
+        with raises(ValueError):
+            await client.send_fleet_command("GET_ACCOUNT", ["BCU1"])
+
+
+class TestBatch:
+    async def test_batch(self, client: BlueCurrentClient):
+        client.socket = RecordingSocket()  # type: ignore
+        batch = await client.batch(timeout=1).__aenter__()
+        settings = [batch.get_charge_point_settings(evse_id) for evse_id in ("BCU1", "BCU2")]
+        grid_status = batch.get_grid_status("BCU1")
+        assert client.socket.sent == []  # type: ignore
+        exiting = create_task(batch.__aexit__(None, None, None))
+        await sleep(0)
+        assert [m["command"] for m in client.socket.sent] == ["GET_CH_SETTINGS"] * 2 + ["GET_GRID_STATUS"]  # type: ignore
+        client._dispatch({"object": "GRID_STATUS", "data": {"id": "GRID-BCU1"}})
+        client._dispatch({"object": "CH_SETTINGS", "data": {"evse_id": "BCU2"}})
+        client._dispatch({"object": "ERROR", "evse_id": "BCU1", "message": "forbidden"})
+        await exiting
+        assert settings[1].result() == {"evse_id": "BCU2"}
+        assert grid_status.result() == {"id": "GRID-BCU1"}
+        with raises(BlueCurrentException):
+            settings[0].result()
+        assert client._waiters == {}
+
+    async def test_exception(self, client: BlueCurrentClient):
+        client.socket = RecordingSocket()  # type: ignore
+        with raises(ValueError):
+            async with client.batch() as batch:
+                future = batch.request("GET_ACCOUNT", "ACCOUNT")
+                raise ValueError()
+        assert future.cancelled()
+        assert client.socket.sent == []  # type: ignore
+
+
 class TestAuthentication:
     async def test_authenticate(self, client_with_auth: BlueCurrentClient):
         async with client_with_auth:
@@ -36,14 +686,14 @@ class TestSocketApi:
         charge_cards = await connected_client.get_charge_cards()
         if len(charge_cards) == 0:
             skip(reason="No charge cards.")
-        assert all("uid" in charge_card for charge_card in charge_cards)
+        assert all("uid" in charge_card for charge_card in charge_cards)  # type: ignore
         assert all(
             obj is None or isinstance(obj, date)
             for charge_card in charge_cards
             for obj in [
-                charge_card["date_created"],
-                charge_card["date_modified"],
-                charge_card["date_became_invalid"],
+                charge_card["date_created"],  # type: ignore
+                charge_card["date_modified"],  # type: ignore
+                charge_card["date_became_invalid"],  # type: ignore
             ]
         )
 
@@ -52,7 +702,7 @@ class TestSocketApi:
         if len(charge_points) == 0:
             skip(reason="No charge cards.")
         for charge_point in charge_points:
-            assert "evse_id" in charge_point
+            assert "evse_id" in charge_point  # type: ignore
 
     async def test_get_grid_status(self, connected_client: BlueCurrentClient, evse_id: str):
         status = await connected_client.get_grid_status(evse_id=evse_id)
@@ -118,12 +768,12 @@ class TestSocketApi:
     @mark.skipif(environ.get("BLUECURRENT_READ_ONLY", "TRUE") != "FALSE", reason="Running read-only tests.")
     async def test_set_status(self, connected_client: BlueCurrentClient, evse_id: str):
         before_status = await connected_client.get_charge_point_status(evse_id=evse_id)
-        if before_status["activity"] != "available":
+        if before_status["activity"] != "available":  # type: ignore
             skip(reason="Only perform this test if the charge point is available.")
         await connected_client.set_status(evse_id=evse_id, enabled=False)
-        assert (await connected_client.get_charge_point_status(evse_id=evse_id))["activity"] == "unavailable"
+        assert (await connected_client.get_charge_point_status(evse_id=evse_id))["activity"] == "unavailable"  # type: ignore
         await connected_client.set_status(evse_id=evse_id, enabled=True)
-        assert (await connected_client.get_charge_point_status(evse_id=evse_id))["activity"] == "available"
+        assert (await connected_client.get_charge_point_status(evse_id=evse_id))["activity"] == "available"  # type: ignore
 
     async def test_error(self, connected_client: BlueCurrentClient):
         with raises(BlueCurrentException) as e:
@@ -139,8 +789,8 @@ class TestRestApi:
 
     async def test_get_charge_point_status(self, connected_client: BlueCurrentClient, evse_id: str):
         status = await connected_client.get_charge_point_status(evse_id)
-        assert status["evse_id"] == evse_id
-        assert "activity" in status
+        assert status["evse_id"] == evse_id  # type: ignore
+        assert "activity" in status  # type: ignore
 
     async def test_get_grids(self, connected_client: BlueCurrentClient):
         grids = await connected_client.get_grids()
@@ -161,7 +811,7 @@ class TestRestApi:
         unique_transactions = set()
         async for transaction in connected_client.iterate_transactions(evse_id):
             n_transactions += 1
-            unique_transactions.add(transaction["transaction_id"])
+            unique_transactions.add(transaction["transaction_id"])  # type: ignore
             if n_transactions >= 30:
                 break
         assert len(unique_transactions) == 30
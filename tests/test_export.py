@@ -0,0 +1,95 @@
+from csv import reader
+from datetime import datetime
+from math import isnan
+from pathlib import Path
+
+from httpx import AsyncClient, MockTransport, Request, Response
+from pytest import fixture, importorskip, raises
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.export import (
+    COLUMNS,
+    NAT,
+    export_transactions,
+    iterate_transaction_columns,
+)
+
+
+def handler(request: Request) -> Response:
+    page = int(request.url.params["page"])
+    transactions = [
+        {
+            "transaction_id": i,
+            "chargepoint_id": "BCU1",
+            "started_at": f"0{page}-07-2023 12:00:0{i}",
+            "end_time": "" if i == 5 else f"0{page}-07-2023 14:00:0{i}",
+            "kwh": None if i == 5 else 2.5 * i,
+            "currency": "EUR",
+        }
+        for i in range(2 * page - 2, 2 * page)
+    ]
+    return Response(200, json={"data": {"next_page": page + 1 if page < 3 else None, "transactions": transactions}})
+
+
+@fixture
+def transactions_client(client: BlueCurrentClient) -> BlueCurrentClient:
+    client.httpx_client = AsyncClient(transport=MockTransport(handler))
+    return client
+
+
+class TestIterateTransactionColumns:
+    async def test_chunks(self, transactions_client: BlueCurrentClient):
+        chunks = [chunk async for chunk in iterate_transaction_columns(transactions_client, "BCU1", chunk_size=3)]
+        assert [len(chunk) for chunk in chunks] == [4, 2]
+        arrays = chunks[1].arrays
+        assert list(arrays["transaction_id"]) == [4, 5]
+        assert arrays["started_at"][0] == int((datetime(2023, 7, 3, 12, 0, 4) - datetime(1970, 1, 1)).total_seconds())
+        assert arrays["end_time"][1] == NAT
+        assert isnan(arrays["kwh"][1])
+        assert chunks[1].strings["card_id"] == [None, None]
+        assert list(chunks[1].columns) == list(COLUMNS)
+        assert list(chunks[1].rows())[0][:6] == (
+            4,
+            "BCU1",
+            None,
+            None,
+            datetime(2023, 7, 3, 12, 0, 4),
+            datetime(2023, 7, 3, 14, 0, 4),
+        )
+
+    async def test_numpy(self, transactions_client: BlueCurrentClient):
+        numpy = importorskip("numpy")
+        chunk = [chunk async for chunk in iterate_transaction_columns(transactions_client, "BCU1")][0]
+        arrays = chunk.to_numpy()
+        assert arrays["kwh"].dtype == numpy.float64
+        assert arrays["end_time"][0] == numpy.datetime64("2023-07-01T14:00:00")
+        assert numpy.isnat(arrays["end_time"][5])
+
+    async def test_arrow(self, transactions_client: BlueCurrentClient):
+        importorskip("pyarrow")
+        chunk = [chunk async for chunk in iterate_transaction_columns(transactions_client, "BCU1")][0]
+        table = chunk.to_arrow()
+        assert table.num_rows == 6
+        assert table.column("end_time").null_count == 1
+        assert table.column("kwh").to_pylist()[4:] == [10.0, None]
+
+
+class TestExportTransactions:
+    async def test_csv(self, transactions_client: BlueCurrentClient, tmp_path: Path):
+        assert await export_transactions(transactions_client, "BCU1", tmp_path / "transactions.csv", chunk_size=2) == 6
+        with (tmp_path / "transactions.csv").open() as f:
+            rows = list(reader(f))
+        assert rows[0][:3] == ["transaction_id", "chargepoint_id", "chargepoint_type"]
+        assert rows[1][:6] == ["0", "BCU1", "", "", "2023-07-01 12:00:00", "2023-07-01 14:00:00"]
+        assert len(rows) == 7
+
+    async def test_parquet(self, transactions_client: BlueCurrentClient, tmp_path: Path):
+        parquet = importorskip("pyarrow.parquet")
+        path = tmp_path / "transactions.parquet"
+        assert await export_transactions(transactions_client, "BCU1", path, chunk_size=2) == 6
+        assert parquet.ParquetFile(path).num_row_groups == 3
+        assert parquet.read_table(path).column("transaction_id").to_pylist() == list(range(6))
+
+    async def test_unknown_format(self, transactions_client: BlueCurrentClient, tmp_path: Path):
+        with raises(ValueError):
+            await export_transactions(transactions_client, "BCU1", tmp_path / "transactions.xlsx")
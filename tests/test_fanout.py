@@ -0,0 +1,102 @@
+from asyncio import create_task, sleep, wait_for
+
+from pytest import raises
+
+from pybluecurrent.fanout import FanOut, Subscriber
+
+
+class TestSubscriber:
+    def test_drop_oldest(self):
+        subscriber = Subscriber(max_size=3, policy="drop_oldest")
+        for i in range(5):
+            subscriber.put_nowait(i)
+        assert [subscriber.get_nowait() for _ in range(len(subscriber))] == [2, 3, 4]
+        assert subscriber.stats() == dict(policy="drop_oldest", max_size=3, size=0, high_water=3, received=5, dropped=2)
+
+    def test_drop_newest(self):
+        subscriber = Subscriber(max_size=3, policy="drop_newest")
+        for i in range(5):
+            subscriber.put_nowait(i)
+        assert [subscriber.get_nowait() for _ in range(len(subscriber))] == [0, 1, 2]
+        assert subscriber.dropped == 2
+
+    async def test_block(self):
+        subscriber = Subscriber(max_size=1, policy="block")
+        await subscriber.put(1)
+        putting = create_task(subscriber.put(2))
+        await sleep(0.01)
+        assert not putting.done()
+        assert await subscriber.get() == 1
+        await wait_for(putting, timeout=1)
+        assert await subscriber.get() == 2
+        assert subscriber.dropped == 0
+
+    async def test_get_waits(self):
+        subscriber = Subscriber()
+        getting = create_task(subscriber.get())
+        await sleep(0.01)
+        assert not getting.done()
+        subscriber.put_nowait("message")
+        assert await wait_for(getting, timeout=1) == "message"
+        assert subscriber.empty()
+
+    def test_invalid(self):
+        with raises(ValueError):
+            Subscriber(max_size=0)
+        with raises(ValueError):
+            Subscriber(policy="drop_all")  # type: ignore
+
+
+class TestFanOut:
+    async def test_fan_out(self):
+        fan_out = FanOut()
+        with fan_out.queue() as first, fan_out.queue() as second:
+            assert len(fan_out) == 2
+            await fan_out.put("message")
+            assert await first.get() == await second.get() == "message"
+        assert len(fan_out) == 0
+        await fan_out.put("message")  # Without subscribers.
+
+    async def test_policy_per_subscriber(self):
+        fan_out = FanOut(max_size=2)
+        with fan_out.queue() as oldest, fan_out.queue(policy="drop_newest") as newest, fan_out.queue(10) as large:
+            for i in range(4):
+                await fan_out.put(i)
+            assert [oldest.get_nowait(), oldest.get_nowait()] == [2, 3]
+            assert [newest.get_nowait(), newest.get_nowait()] == [0, 1]
+            assert len(large) == 4
+            stats = fan_out.stats()
+            assert stats["dropped"] == 4
+            assert stats["high_water"] == 4
+        assert fan_out.stats() == dict(subscribers=[], dropped=4, high_water=0)
+
+    async def test_block_waits_for_slow_subscriber(self):
+        fan_out = FanOut(max_size=1, policy="block")
+        with fan_out.queue() as queue:
+            await fan_out.put(1)
+            putting = create_task(fan_out.put(2))
+            await sleep(0.01)
+            assert not putting.done()
+            assert await queue.get() == 1
+            await wait_for(putting, timeout=1)
+
+    async def test_leaving_releases_blocked_producer(self):
+        fan_out = FanOut(max_size=1, policy="block")
+        with fan_out.queue() as queue:
+            await fan_out.put(1)
+            putting = create_task(fan_out.put(2))
+            await sleep(0.01)
+            assert not putting.done()
+        await wait_for(putting, timeout=1)
+        await queue.put(3)  # Returns right away, without storing the item.
+        assert len(queue) == 1
+
+    async def test_subscribe(self):
+        fan_out = FanOut()
+        subscription = fan_out.subscribe()
+        getting = create_task(subscription.__anext__())
+        await sleep(0.01)
+        await fan_out.put("message")
+        assert await wait_for(getting, timeout=1) == "message"
+        await subscription.aclose()
+        assert len(fan_out) == 0
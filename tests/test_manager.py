@@ -0,0 +1,58 @@
+from json import dumps, loads
+from typing import AsyncGenerator
+
+from pytest import MonkeyPatch, fixture
+from websockets.asyncio.server import ServerConnection, serve
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.exceptions import AuthenticationFailed
+from pybluecurrent.manager import BlueCurrentManager, create_httpx_client
+from pybluecurrent.tokens import MemoryTokenStore
+
+
+@fixture
+async def server(monkeypatch: MonkeyPatch) -> AsyncGenerator[None, None]:
+    """Reject all logins, but accept tokens like "token-username"."""
+
+    async def handler(websocket: ServerConnection) -> None:
+        async for message in websocket:
+            data = loads(message)
+            if data["command"] == "VALIDATE_PASSWORD":
+                await websocket.send(dumps({"object": "STATUS_PASSWORD", "accepted": False}))
+            elif data["command"] == "HELLO":
+                await websocket.send(dumps({"object": "HELLO"}))
+            elif data["command"] == "GET_ACCOUNT":
+                await websocket.send(dumps({"object": "ACCOUNT", "login": data["Authorization"][12:]}))
+
+    async with serve(handler, "localhost", 0) as server:
+        monkeypatch.setattr(
+            BlueCurrentClient, "socket_url", f"ws://localhost:{list(server.sockets)[0].getsockname()[1]}"
+        )
+        yield
+
+
+class TestManager:
+    async def test_manager(self, server: None):
+        store = MemoryTokenStore()
+        for username in ("first", "second"):
+            store.save(username, f"token-{username}")
+        accounts = {"first": "password", "second": "password", "third": "wrong"}
+        async with BlueCurrentManager(accounts, token_store=store) as manager:
+            assert len(manager) == 2
+            assert isinstance(manager.errors["third"], AuthenticationFailed)
+            assert all(client.httpx_client is manager.httpx_client for client in manager)
+            results = await manager.gather(lambda client: client.get_account())
+            assert {username: account["login"] for username, account in results.items()} == {  # type: ignore
+                "first": "first",
+                "second": "second",
+            }
+            httpx_client = manager.httpx_client
+        assert httpx_client is not None and httpx_client.is_closed
+
+    async def test_shared_httpx_client(self, server: None):
+        store = MemoryTokenStore()
+        store.save("first", "token-first")
+        async with create_httpx_client() as httpx_client:
+            async with BlueCurrentManager({"first": "password"}, token_store=store, httpx_client=httpx_client):
+                pass
+            assert not httpx_client.is_closed
@@ -0,0 +1,58 @@
+from asyncio import TimeoutError
+from math import inf, isnan
+
+from pytest import raises
+
+from pybluecurrent.metrics import Histogram, Metrics
+
+
+class TestHistogram:
+    def test_observe(self):
+        histogram = Histogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.count == 4
+        assert histogram.sum == 2.65
+
+    def test_quantile(self):
+        histogram = Histogram(buckets=(0.1, 1))
+        assert isnan(histogram.quantile(0.5))
+        for value in (0.05, 0.05, 0.5, 2):
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.75) == 1
+        assert histogram.quantile(1) == inf
+
+
+class TestMetrics:
+    def test_measure(self):
+        metrics, calls = Metrics(), []
+        metrics.callbacks.append(lambda command, duration, outcome: calls.append((command, outcome)))
+        with metrics.measure("GET_ACCOUNT"):
+            assert metrics.in_flight == 1
+        with raises(TimeoutError), metrics.measure("GET_ACCOUNT"):
+            raise TimeoutError()
+        with raises(ValueError), metrics.measure("HTTP getgrids"):
+            raise ValueError()
+        assert calls == [("GET_ACCOUNT", "ok"), ("GET_ACCOUNT", "timeout"), ("HTTP getgrids", "error")]
+        assert metrics.in_flight == 0
+        assert (metrics["GET_ACCOUNT"].requests, metrics["GET_ACCOUNT"].timeouts) == (2, 1)
+        assert metrics["GET_ACCOUNT"].latency.count == 1
+        assert metrics["HTTP getgrids"].errors == 1
+
+    def test_failing_callback(self):
+        metrics = Metrics()
+        metrics.callbacks.append(lambda command, duration, outcome: 1 / 0)
+        with metrics.measure("HELLO"):
+            pass
+        assert metrics["HELLO"].requests == 1
+
+    def test_bytes(self):
+        metrics = Metrics()
+        metrics.record_sent('{"command": "HELLO"}')
+        metrics.record_received('{"name": "é"}'.encode())
+        metrics.record_received('{"name": "é"}')
+        assert (metrics.messages_sent, metrics.bytes_sent) == (1, 20)
+        assert (metrics.messages_received, metrics.bytes_received) == (2, 28)
+        assert metrics.to_dict()["bytes_received"] == 28
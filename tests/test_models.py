@@ -0,0 +1,32 @@
+from dataclasses import FrozenInstanceError
+
+from pytest import raises
+
+from pybluecurrent.models import Card, ChargePoint, Setting, Transaction
+
+
+class TestFromDict:
+    def test_nested(self):
+        charge_point = ChargePoint.from_dict(
+            {
+                "evse_id": "BCU1",
+                "public_charging": {"value": False, "permission": "write"},
+                "default_card": {"uid": "A1", "id": "NL-ABC-1", "valid": 1},
+                "preferred_card": {},
+            }
+        )
+        assert charge_point.evse_id == "BCU1"
+        assert charge_point.public_charging == Setting(value=False, permission="write")
+        assert charge_point.default_card == Card(uid="A1", id="NL-ABC-1", valid=1)
+        assert charge_point.preferred_card is None
+        assert charge_point.tariff is None
+
+    def test_unknown_keys(self):
+        transaction = Transaction.from_dict({"transaction_id": 1, "kwh": 1.5, "unknown": "ignored"})
+        assert transaction == Transaction(transaction_id=1, kwh=1.5)
+
+    def test_slots(self):
+        transaction = Transaction(transaction_id=1)
+        assert not hasattr(transaction, "__dict__")
+        with raises(FrozenInstanceError):
+            transaction.kwh = 1.0  # type: ignore
@@ -0,0 +1,26 @@
+from asyncio import gather
+from time import monotonic
+
+from pytest import raises
+
+from pybluecurrent.ratelimit import RateLimiter
+
+
+class TestRateLimiter:
+    async def test_rate(self):
+        limiter = RateLimiter(rate=100)
+        start = monotonic()
+        await gather(*(limiter.acquire() for _ in range(6)))
+        assert 0.045 <= monotonic() - start < 0.5
+
+    async def test_burst(self):
+        limiter = RateLimiter(rate=1, burst=5)
+        start = monotonic()
+        for _ in range(5):
+            async with limiter:
+                pass
+        assert monotonic() - start < 0.1
+
+    def test_invalid_rate(self):
+        with raises(ValueError):
+            RateLimiter(rate=0)
@@ -0,0 +1,89 @@
+import gzip
+from asyncio import create_task, sleep
+from json import dumps
+from pathlib import Path
+from threading import current_thread
+from time import monotonic
+from time import sleep as blocking_sleep
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.recording import FrameRecorder, read_frames, replay
+
+gzip_open = gzip.open
+
+
+def status(evse_id: str, actual_kwh: float) -> str:
+    return dumps({"object": "CH_STATUS", "data": {"evse_id": evse_id, "actual_kwh": actual_kwh}})
+
+
+class TestFrameRecorder:
+    def test_round_trip(self, tmp_path: Path):
+        path = tmp_path / "frames.gz"
+        with FrameRecorder(path) as recorder:
+            recorder.record("text")
+            recorder.record(b"\x00binary")
+        with FrameRecorder(path) as recorder:  # Appends a new session.
+            recorder.record("again")
+        frames = list(read_frames(path))
+        assert [(frame.data, frame.session) for frame in frames] == [("text", 0), (b"\x00binary", 0), ("again", 1)]
+        assert frames[0].timestamp <= frames[1].timestamp
+        assert recorder.frames == 1 and recorder.dropped == 0
+
+    def test_open_in_background(self, tmp_path: Path, monkeypatch):
+        threads = []
+
+        def open_file(*args, **kwargs):
+            threads.append(current_thread())
+            return gzip_open(*args, **kwargs)
+
+        monkeypatch.setattr(gzip, "open", open_file)
+        recorder = FrameRecorder(tmp_path / "frames.gz")
+        recorder.record("text")  # Starts the recorder.
+        recorder.close()
+        assert threads and current_thread() not in threads
+        assert [frame.data for frame in read_frames(tmp_path / "frames.gz")] == ["text"]
+
+    def test_cut_off(self, tmp_path: Path):
+        path = tmp_path / "frames.gz"
+        with FrameRecorder(path) as recorder:
+            for i in range(1000):
+                recorder.record(status(f"BCU{i}", i))
+        path.write_bytes(path.read_bytes()[:-100])
+        frames = list(read_frames(path))
+        assert 0 < len(frames) < 1000
+        assert [frame.data for frame in frames] == [status(f"BCU{i}", i) for i in range(len(frames))]
+
+    def test_flush(self, tmp_path: Path):
+        path = tmp_path / "frames.gz"
+        recorder = FrameRecorder(path, flush_interval=0.01)
+        recorder.record("text")
+        blocking_sleep(0.1)
+        assert [frame.data for frame in read_frames(path)] == ["text"]
+        recorder.close()
+
+
+class TestReplay:
+    async def test_record_and_replay(self, client: BlueCurrentClient, tmp_path: Path):
+        path = tmp_path / "frames.gz"
+        with FrameRecorder(path) as recorder:
+            client.recorder = recorder
+            for i in range(3):
+                await client._process(status("BCU1", i))
+        replayed = BlueCurrentClient("username", "password")
+        with replayed.queue.queue() as queue:
+            waiter = create_task(replayed._receive("CH_STATUS", "BCU1"))
+            await sleep(0)
+            assert await replay(replayed, path, speed=None) == 3
+            assert [queue.get_nowait()["data"]["actual_kwh"] for _ in range(3)] == [0, 1, 2]
+        assert (await waiter)["data"]["actual_kwh"] == 0
+        assert replayed.metrics.messages_received == 3
+
+    async def test_real_time(self, client: BlueCurrentClient, tmp_path: Path):
+        path = tmp_path / "frames.gz"
+        with FrameRecorder(path) as recorder:
+            recorder.record(status("BCU1", 0))
+            blocking_sleep(0.1)
+            recorder.record(status("BCU1", 1))
+        start = monotonic()
+        await replay(client, path, speed=2)
+        assert 0.04 <= monotonic() - start < 0.5
@@ -0,0 +1,90 @@
+from asyncio import Event, create_task, gather, sleep
+from time import monotonic
+
+from pytest import raises
+
+from pybluecurrent.exceptions import ConnectionLost
+from pybluecurrent.scheduler import SendScheduler
+
+
+class SlowSocket:
+    def __init__(self):
+        self.sent: list[str] = []
+        self.release = Event()
+
+    async def send(self, message: str) -> None:
+        await self.release.wait()
+        self.sent.append(message)
+
+
+async def submit_while_busy(socket: SlowSocket, scheduler: SendScheduler, *submissions: tuple) -> None:
+    first = create_task(scheduler.submit("first"))
+    await sleep(0)
+    tasks = [create_task(scheduler.submit(*submission)) for submission in submissions]
+    await sleep(0)
+    assert len(scheduler) == len(submissions)
+    socket.release.set()
+    await gather(first, *tasks)
+
+
+class TestSendScheduler:
+    async def test_send_right_away(self):
+        socket = SlowSocket()
+        socket.release.set()
+        scheduler = SendScheduler(socket.send)
+        await scheduler.submit("message")
+        assert socket.sent == ["message"]
+        assert scheduler._worker is None
+
+    async def test_priority(self):
+        socket = SlowSocket()
+        scheduler = SendScheduler(socket.send)
+        await submit_while_busy(
+            socket,
+            scheduler,
+            ("bulk", "bulk"),
+            ("interactive", "interactive"),
+            ("control", "control"),
+            ("bulk2", "bulk"),
+        )
+        assert socket.sent == ["first", "control", "interactive", "bulk", "bulk2"]
+        assert scheduler.sent == dict(control=1, interactive=2, bulk=2)
+
+    async def test_fair(self):
+        socket = SlowSocket()
+        scheduler = SendScheduler(socket.send)
+        await submit_while_busy(
+            socket, scheduler, *((f"BCU1-{i}", "bulk", "BCU1") for i in range(3)), ("BCU2-0", "bulk", "BCU2")
+        )
+        assert socket.sent == ["first", "BCU1-0", "BCU2-0", "BCU1-1", "BCU1-2"]
+
+    async def test_rate(self):
+        socket = SlowSocket()
+        socket.release.set()
+        scheduler = SendScheduler(socket.send, rate=100)
+        start = monotonic()
+        await gather(*(scheduler.submit(i) for i in range(6)))
+        assert 0.045 <= monotonic() - start < 0.5
+        assert socket.sent == list(range(6))
+
+    async def test_error(self):
+        async def send(message: str) -> None:
+            await sleep(0)
+            raise ConnectionLost()
+
+        scheduler = SendScheduler(send)
+        results = await gather(scheduler.submit("first"), scheduler.submit("second"), return_exceptions=True)
+        assert all(isinstance(result, ConnectionLost) for result in results)
+
+    async def test_close(self):
+        socket = SlowSocket()
+        scheduler = SendScheduler(socket.send)
+        first = create_task(scheduler.submit("first"))
+        await sleep(0)
+        second = create_task(scheduler.submit("second"))
+        await sleep(0)
+        scheduler.close()
+        with raises(ConnectionLost):
+            await second
+        assert len(scheduler) == 0
+        first.cancel()
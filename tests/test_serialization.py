@@ -0,0 +1,29 @@
+from importlib.util import find_spec
+
+from pytest import importorskip, mark, raises
+
+from pybluecurrent.serialization import JSONSerializer, get_serializer
+
+
+@mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_round_trip(name: str):
+    if name != "json":
+        importorskip(name)
+    serializer = get_serializer(name)
+    data = {"command": "HELLO", "header": "ünïcode", "data": [1, 2.5, None, True]}
+    message = serializer.dumps(data)
+    assert isinstance(message, str)
+    assert "ünïcode" in message
+    assert serializer.loads(message) == data
+    assert serializer.loads(message.encode()) == data
+
+
+def test_default():
+    installed = [name for name in ("orjson", "msgspec") if find_spec(name) is not None]
+    assert get_serializer().name == (installed[0] if installed else "json")
+
+
+def test_unknown():
+    with raises(ValueError):
+        get_serializer("yaml")
+    assert isinstance(get_serializer("json"), JSONSerializer)
@@ -0,0 +1,51 @@
+from asyncio import sleep
+
+from pytest import fixture, raises
+
+from pybluecurrent.exceptions import BlueCurrentException
+from pybluecurrent.testing import MockBlueCurrent
+
+
+@fixture
+async def server():
+    async with MockBlueCurrent(n_charge_points=3, n_transactions=10, per_page=4) as server:
+        yield server
+
+
+class TestMockBlueCurrent:
+    async def test_reads(self, server: MockBlueCurrent):
+        async with server.client() as client:
+            assert (await client.get_account())["full_name"] == "Your Full Name"
+            assert len(await client.get_charge_cards()) == 1
+            snapshot = await client.get_fleet_snapshot()
+            assert list(snapshot) == server.evse_ids
+            assert all(not record["errors"] for record in snapshot.values())
+            assert (await client.get_contracts())[0]["contract_id"] == "BCU12345678"
+            assert len(await client.get_grids()) == 3
+        assert server.commands["VALIDATE_PASSWORD"] == 1
+
+    async def test_transactions(self, server: MockBlueCurrent):
+        async with server.client() as client:
+            transactions = [tx async for tx in client.iterate_transactions(server.evse_ids[:2])]
+        assert len(transactions) == 20
+        assert transactions == sorted(transactions, key=lambda tx: tx["end_time"], reverse=True)  # type: ignore
+        assert server.commands["HTTP gettransactions"] == 5
+
+    async def test_commands(self, server: MockBlueCurrent):
+        async with server.client() as client:
+            await client.set_status("BCU000001", enabled=False)
+            assert (await client.get_charge_point_status("BCU000001"))["activity"] == "unavailable"  # type: ignore
+            await client.soft_reset("BCU000001")
+            await client.set_plug_and_charge_charge_card("BCU000001")
+            with raises(BlueCurrentException):
+                await client.get_charge_point_settings("BCU999999")
+
+    async def test_push_status(self, server: MockBlueCurrent):
+        async with server.client() as client:
+            stream = client.stream_status(["BCU000002"])
+            assert (await stream.__anext__())["activity"] == "available"  # type: ignore
+            while not server.subscribers("BCU000002"):
+                await sleep(0.01)
+            assert await server.push_status("BCU000002", activity="charging") == 1
+            assert await stream.__anext__() == {"evse_id": "BCU000002", "activity": "charging"}  # type: ignore
+            await stream.aclose()  # type: ignore
@@ -0,0 +1,41 @@
+from pybluecurrent.timeouts import AdaptiveTimeouts
+
+
+class TestAdaptiveTimeouts:
+    def test_default_without_samples(self):
+        timeouts = AdaptiveTimeouts(min_samples=5)
+        for _ in range(4):
+            timeouts("GET_ACCOUNT", 0.1, "ok")
+        assert timeouts.percentile("GET_ACCOUNT", 0.99) is None
+        assert timeouts.timeout("GET_ACCOUNT", 10) == 10
+
+    def test_timeout(self):
+        timeouts = AdaptiveTimeouts(quantile=0.9, multiplier=2, minimum=0.5, min_samples=10)
+        for i in range(1, 11):
+            timeouts("GET_CH_SETTINGS", i / 10, "ok")
+        assert timeouts.percentile("GET_CH_SETTINGS", 0.9) == 1.0
+        assert timeouts.timeout("GET_CH_SETTINGS", 10) == 2.0
+        assert timeouts.timeout("GET_CH_SETTINGS", 1.5) == 1.5
+        assert timeouts.timeout("GET_GRID_STATUS", 10) == 10
+
+    def test_minimum(self):
+        timeouts = AdaptiveTimeouts(min_samples=1, minimum=0.5)
+        timeouts("GET_ACCOUNT", 0.01, "ok")
+        assert timeouts.timeout("GET_ACCOUNT", 10) == 0.5
+
+    def test_timeouts_restore_default(self):
+        timeouts = AdaptiveTimeouts(quantile=0.9, min_samples=10, window=10)
+        for _ in range(10):
+            timeouts("GET_ACCOUNT", 0.1, "ok")
+        assert timeouts.timeout("GET_ACCOUNT", 10) == 1.0
+        timeouts("GET_ACCOUNT", 1.0, "timeout")
+        timeouts("GET_ACCOUNT", 0.0, "cancelled")
+        assert timeouts.timeout("GET_ACCOUNT", 10) == 10
+
+    def test_hedge_delay(self):
+        timeouts = AdaptiveTimeouts(min_samples=1, hedge_quantile=0.5)
+        for command in ("GET_CH_SETTINGS", "SOFT_RESET"):
+            timeouts(command, 0.2, "ok")
+        assert timeouts.hedge_delay("GET_CH_SETTINGS") == 0.2
+        assert timeouts.hedge_delay("SOFT_RESET") is None
+        assert AdaptiveTimeouts(min_samples=1).hedge_delay("GET_CH_SETTINGS") is None
@@ -0,0 +1,39 @@
+from pathlib import Path
+from stat import S_IMODE
+
+from pytest import fixture
+
+from pybluecurrent.tokens import (
+    CallableTokenStore,
+    FileTokenStore,
+    MemoryTokenStore,
+    TokenStore,
+)
+
+
+@fixture(params=["memory", "file", "callable"])
+def store(request, tmp_path: Path) -> TokenStore:
+    if request.param == "file":
+        return FileTokenStore(tmp_path / "tokens.json")
+    if request.param == "callable":
+        tokens: dict[str, str | None] = {}
+        return CallableTokenStore(tokens.get, tokens.__setitem__)
+    return MemoryTokenStore()
+
+
+class TestTokenStore:
+    def test_missing(self, store: TokenStore):
+        assert store.load("username") is None
+
+    def test_save(self, store: TokenStore):
+        store.save("username", "token")
+        store.save("other", "other_token")
+        assert store.load("username") == "token"
+        store.save("username", None)
+        assert store.load("username") is None
+        assert store.load("other") == "other_token"
+
+    def test_file_permissions(self, tmp_path: Path):
+        FileTokenStore(tmp_path / "tokens.json").save("username", "token")
+        assert S_IMODE((tmp_path / "tokens.json").stat().st_mode) == 0o600
+        assert FileTokenStore(tmp_path / "tokens.json").load("username") == "token"
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from httpx import AsyncClient, MockTransport, Request, Response
+from pytest import fixture
+
+from pybluecurrent import BlueCurrentClient
+from pybluecurrent.transaction_cache import TransactionCache
+
+TRANSACTIONS = [
+    {
+        "transaction_id": transaction_id,
+        "chargepoint_id": "BCU1",
+        "started_at": f"{day:02}-{month:02}-2023 12:00:00",
+        "end_time": f"{day:02}-{month:02}-2023 14:00:00",
+        "kwh": 10.0,
+        "card_id": card_id,
+        "total_costs": 2.5,
+        "currency": "EUR",
+    }
+    for transaction_id, day, month, card_id in [(4, 2, 8, "B"), (3, 1, 8, "A"), (2, 2, 7, "B"), (1, 1, 7, "A")]
+]
+
+
+class Server:
+    def __init__(self):
+        self.transactions = TRANSACTIONS[1:]
+        self.requests: list[Request] = []
+
+    def handler(self, request: Request) -> Response:
+        self.requests.append(request)
+        page = int(request.url.params["page"])
+        transactions = [dict(tx) for tx in self.transactions[(page - 1) * 2 : page * 2]]
+        total_pages = (len(self.transactions) + 1) // 2
+        return Response(
+            200,
+            json={
+                "data": {
+                    "current_page": page,
+                    "next_page": page + 1 if page < total_pages else None,
+                    "total_pages": total_pages,
+                    "transactions": transactions,
+                }
+            },
+        )
+
+
+@fixture
+def server() -> Server:
+    return Server()
+
+
+@fixture
+def cache(client: BlueCurrentClient, server: Server) -> TransactionCache:
+    client.httpx_client = AsyncClient(transport=MockTransport(server.handler))
+    return TransactionCache(client, max_age=60)
+
+
+class TestTransactionCache:
+    async def test_get_transactions(self, cache: TransactionCache, server: Server):
+        transactions = await cache.get_transactions("BCU1")
+        assert [tx["transaction_id"] for tx in transactions] == [3, 2, 1]
+        assert transactions[0]["started_at"] == datetime(2023, 8, 1, 12)
+        assert len(server.requests) == 2
+        assert len(await cache.get_transactions("BCU1", card_id="A", start=datetime(2023, 7, 15))) == 1
+        assert len(server.requests) == 2
+
+    async def test_refresh(self, cache: TransactionCache, server: Server):
+        assert await cache.refresh("BCU1") == 3
+        server.transactions = TRANSACTIONS
+        assert await cache.refresh("BCU1") == 0
+        n_requests = len(server.requests)
+        assert await cache.refresh("BCU1", force=True) == 1
+        assert len(server.requests) == n_requests + 2  # Up to the first transaction that stopped before the newest.
+        assert len(await cache.get_transactions("BCU1")) == 4
+
+    async def test_refresh_long_session(self, cache: TransactionCache, server: Server):
+        """A session with a lower ID than the newest cached one, that stopped after it."""
+        assert await cache.refresh("BCU1") == 3
+        server.transactions = [dict(TRANSACTIONS[-1], transaction_id=0, end_time="02-08-2023 14:00:00")]
+        server.transactions += TRANSACTIONS[1:]
+        assert await cache.refresh("BCU1", force=True) == 1
+        assert [tx["transaction_id"] for tx in await cache.get_transactions("BCU1")] == [0, 3, 2, 1]
+
+    async def test_aggregates(self, cache: TransactionCache):
+        assert await cache.kwh_per_card("BCU1") == {"A": 20.0, "B": 10.0}
+        assert await cache.costs_per_month("BCU1") == {"2023-07": {"EUR": 5.0}, "2023-08": {"EUR": 2.5}}
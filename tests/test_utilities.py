@@ -1,6 +1,35 @@
 from datetime import date, datetime
 
-from pybluecurrent.utilities import parse_datetime_keys, parse_list_datetime_keys
+from pytest import mark, raises
+
+from pybluecurrent.utilities import (
+    compile_datetime_format,
+    parse_datetime_keys,
+    parse_list_datetime_keys,
+)
+
+
+class TestCompileDateTimeFormat:
+    @mark.parametrize(
+        "datetime_format, value",
+        [
+            ("%d-%m-%Y %H:%M:%S", "01-07-2023 12:34:56"),
+            ("%Y%m%d %H:%M:%S", "20230724 15:25:33"),
+            ("%Y%m%d %H:%M:%S", "20230724   15:25:33"),
+            ("%d-%b-%y", "01-JAN-20"),
+            ("%d-%b-%y", "01-dec-70"),
+            ("%d-%m-%Y", "1-7-2023"),
+            ("%H:%M", "12:30"),
+            ("%Y-%m-%d %f", "2023-06-27 123"),
+        ],
+    )
+    def test_same_as_strptime(self, datetime_format: str, value: str):
+        assert compile_datetime_format(datetime_format)(value) == datetime.strptime(value, datetime_format)
+
+    @mark.parametrize("value", ["32-07-2023", "01-07-2023x", "01-07-23", ""])
+    def test_invalid(self, value: str):
+        with raises(ValueError):
+            compile_datetime_format("%d-%m-%Y")(value)
 
 
 class TestParseDateTimeKeys: